@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import json_scrim
+
+# Frequent champion cores (3 to 5 champions played together by the same side of a game).
+# Each champion is stored as a bitset of the (game, side) it is played in (a Python int, one bit per game side),
+# the support of a core is the popcount of the AND of its champions bitsets. Cores are extended one champion
+# at a time from the frequent cores of the previous size (Apriori / Eclat), a core is only extended if it is frequent.
+
+DEFAULT_MIN_SUPPORT = 5
+
+
+def popcount(bitset : int) -> int :
+    """Number of bits set in a bitset"""
+    return bin(bitset).count("1")
+
+
+def to_bitset(mask : np.ndarray) -> int :
+    """Convert a boolean array into a Python int bitset (bit i is mask[i])"""
+    return int.from_bytes(np.packbits(mask, bitorder="little").tobytes(), "little")
+
+
+def build_side_bitsets(data : pd.DataFrame, team_dict : dict = None) -> dict :
+    """Build the champion bitsets of each side
+
+    Args:
+        data (pd.DataFrame): The data, one row per (match,participant)
+        team_dict (dict, optional): Dictionnary containing the team PUUID. If None, the data is already filtered on the team and every row is on the "ally" side.
+
+    Returns:
+        dict: Dictionnary side -> {"games" : number of game sides, "wins" : bitset of the won games, "champions" : {champion : bitset}}
+    """
+    rows = data.loc[data["SKIN"].notna() & data["WIN"].notna()]
+    if team_dict is None :
+        sides = {"ally" : rows}
+    else :
+        team_mask = json_scrim.get_team_mask(rows, team_dict)
+        sides = {"ally" : rows.loc[team_mask], "enemy" : rows.loc[~team_mask]}
+
+    bitsets = {}
+    for side, side_rows in sides.items() :
+        game_codes, game_ids = pd.factorize(side_rows["_id"])
+        champions = pd.Categorical(side_rows["SKIN"].astype(str))
+        presence = np.zeros((len(champions.categories), len(game_ids)), dtype=bool)
+        presence[champions.codes, game_codes] = True
+        wins = np.zeros(len(game_ids), dtype=bool)
+        wins[game_codes] = side_rows["WIN"].astype(bool).to_numpy()
+        bitsets[side] = {
+            "games" : len(game_ids),
+            "wins" : to_bitset(wins),
+            "champions" : {champion : to_bitset(presence[code]) for code, champion in enumerate(champions.categories)},
+        }
+    return bitsets
+
+
+def mine_side_cores(champion_bitsets : dict, max_size : int, min_support : int) -> dict :
+    """Find every frequent core of at most `max_size` champions
+
+    Args:
+        champion_bitsets (dict): Dictionnary champion -> bitset of the games
+        max_size (int): Maximum number of champions of a core
+        min_support (int): Minimum number of games of a core
+
+    Returns:
+        dict: Dictionnary core (sorted tuple of champions) -> bitset of the games
+    """
+    frequent = {(champion,) : bitset for champion, bitset in sorted(champion_bitsets.items()) if popcount(bitset) >= min_support}
+    cores = dict(frequent)
+    for size in range(2, max_size + 1) :
+        # Cores sharing the same prefix are joined, the new core is kept if it is frequent
+        by_prefix = {}
+        for core, bitset in frequent.items() :
+            by_prefix.setdefault(core[:-1], []).append((core[-1], bitset))
+        next_frequent = {}
+        for prefix, extensions in by_prefix.items() :
+            for index, (champion, bitset) in enumerate(extensions) :
+                for other_champion, other_bitset in extensions[index + 1:] :
+                    core_bitset = bitset & other_bitset
+                    if popcount(core_bitset) >= min_support :
+                        next_frequent[prefix + (champion, other_champion)] = core_bitset
+        if not next_frequent :
+            break
+        cores.update(next_frequent)
+        frequent = next_frequent
+    return cores
+
+
+def mine_champion_cores(data : pd.DataFrame, team_dict : dict = None, min_size : int = 3, max_size : int = 5, min_support : int = DEFAULT_MIN_SUPPORT, min_winrate : float = 0) -> pd.DataFrame :
+    """Find the champion cores played together in at least `min_support` games, for the team and its opponents
+
+    Args:
+        data (pd.DataFrame): The data, one row per (match,participant)
+        team_dict (dict, optional): Dictionnary containing the team PUUID. If None, the data is already filtered on the team. Defaults to None.
+        min_size (int, optional): Minimum number of champions of a core. Defaults to 3.
+        max_size (int, optional): Maximum number of champions of a core. Defaults to 5.
+        min_support (int, optional): Minimum number of games of a core. Defaults to DEFAULT_MIN_SUPPORT.
+        min_winrate (float, optional): Minimum winrate (%) of a core. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: DataFrame with SIDE, SIZE, CHAMPIONS (tuple), GAMES, WINS and Winrate (%), sorted by number of games
+    """
+    records = []
+    for side, bitsets in build_side_bitsets(data, team_dict).items() :
+        for core, bitset in mine_side_cores(bitsets["champions"], max_size, min_support).items() :
+            if len(core) < min_size :
+                continue
+            games = popcount(bitset)
+            wins = popcount(bitset & bitsets["wins"])
+            records.append((side, len(core), core, games, wins, wins / games * 100))
+
+    cores = pd.DataFrame(records, columns=["SIDE", "SIZE", "CHAMPIONS", "GAMES", "WINS", "Winrate (%)"])
+    cores = cores.loc[cores["Winrate (%)"] >= min_winrate]
+    return cores.sort_values(by=["GAMES", "Winrate (%)"], ascending=False).reset_index(drop=True)
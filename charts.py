@@ -0,0 +1,139 @@
+import pandas as pd
+import plotly.express as plty
+import plotly.graph_objects as go
+import plotly.subplots
+import streamlit as st
+
+# Presentation layer : plotly figures and streamlit widgets built from the tables computed by json_scrim and draft_analyze.
+# json_scrim and draft_analyze only import this module when a chart is asked (chart=True),
+# so the analytics can be imported by the scripts without plotly and streamlit.
+
+CHAMPION_ICON_URL = "https://cdn.communitydragon.org/latest/champion/{}/square"
+# Names of the bans (drafts) which differ from the champion id of communitydragon
+CHAMPION_ICON_NAMES = {"Wukong" : "MonkeyKing", "RenataGlasc" : "Renata", "Dr.Mundo" : "Drmundo", "Nunu&Willump" : "Nunu"}
+
+
+def winrate_by_side_chart(winrate_blue : float, winrate_red : float) :
+    """Bar chart of the winrate in blue and red side (see json_scrim.get_winrate_by_side)"""
+    fig = plty.bar(x=['Blue','Red'], y=[winrate_blue,winrate_red], labels={"x" : "Side", "y" : "Winrate (%)"}, text_auto=True)
+    fig.update_layout(margin=dict(l=5, r=5, t=5, b=5))
+    fig.update_traces(marker_color=['#215FAB', '#AB2821'])
+    return fig
+
+
+def winrate_over_time_chart(df_winrate : pd.DataFrame, x_column : str) :
+    """Blue, red and global winrate over time, with the number of games of each period (see json_scrim.get_winrate_by_side_over_time)
+
+    Args:
+        df_winrate (pd.DataFrame): DataFrame with the columns x_column, Blue, Red, Global and Games
+        x_column (str): "Week" for the periods, "Game" for the rolling winrate
+
+    Returns:
+        The plotly figure
+    """
+    color_discrete_map = {"Blue" : "blue", "Red" : "red", "Global" : "purple"}
+    fig = plotly.subplots.make_subplots(specs=[[{"secondary_y": True}]])
+    for side, color in color_discrete_map.items():
+        fig.add_trace(go.Scatter(
+            x=df_winrate[x_column],
+            y=df_winrate[side] if side == "Global" else df_winrate[side].fillna(0),
+            mode="lines",
+            name=side,
+            line=dict(color=color),
+            zorder=2
+        ))
+    fig.update_layout(yaxis_range=[0, 100])
+    if x_column == "Week" :
+        fig.add_trace(go.Bar(x=df_winrate[x_column], y=df_winrate["Games"], name="Number of games", marker_color='rgb(122, 115, 113)',opacity=0.6, zorder=1),secondary_y=True)
+        fig.update_yaxes(title_text='Number of games', secondary_y=True)
+    fig.update_yaxes(title_text='Winrate by side (%)')
+    return fig
+
+
+def pink_bought_chart(positions : list, pink_medians : list) :
+    """Bar chart of the median number of pink bought by position (see json_scrim.get_nb_pink_bought)"""
+    fig = plty.bar(x=positions, y=pink_medians, labels={"x" : "Positions", "y" : "Median nb of pink"})
+    fig.update_traces(marker_color='#f2214a',marker_line_color='black', marker_line_width=1.5)
+    return fig
+
+
+def kda_team_chart(kda_team : pd.DataFrame) :
+    """Mean and median KDA by position (see json_scrim.compute_kda_team)"""
+    kda_team_avg = kda_team.mean()
+    kda_team_med = kda_team.median()
+    return go.Figure(
+        data=[
+            go.Bar(name='Mean KDA', x=kda_team_avg.index, y=kda_team_avg.values,marker_color="#D5C381"),
+            go.Bar(name='Median KDA', x=kda_team_med.index, y=kda_team_med.values,marker_color="#93D581")
+        ],
+        layout=go.Layout(
+            title="Average and Median KDA by Position",
+            xaxis_title="Position",
+            yaxis_title="KDA",
+        )
+    )
+
+
+def champions_bans_chart(champions_bans_df : pd.DataFrame) :
+    """Horizontal histogram of the bans of each champion by side, with the champion icons (see draft_analyze.count_champs_bans)"""
+    fig = plty.histogram(champions_bans_df,y=champions_bans_df.index, x= ["Blue","Red"], orientation='h',title="Champions bans", width=1500, height=800)
+
+    #add image champions
+    for champion in champions_bans_df.index :
+        fig.add_layout_image(
+            dict(
+                source=CHAMPION_ICON_URL.format(champion),
+                xref="x",
+                yref="y",
+                x=0,
+                y=champion,
+                sizex=0.5,
+                sizey=0.5,
+                xanchor="left",
+                yanchor="middle"
+            ))
+    fig.update_layout(
+        xaxis_title="Number of bans",
+        yaxis_title="Champions",
+        legend_title="Side")
+    return fig
+
+
+def show_champions_bans_grid(champions_bans_df : pd.DataFrame, max_cols : int = 30) :
+    """Display the icons of the banned champions in a streamlit grid, with the blue/red share of the bans (see draft_analyze.count_champs_bansv2)
+
+    Args:
+        champions_bans_df (pd.DataFrame): DataFrame indexed by champion with the columns Blue, Red and total
+        max_cols (int, optional): Maximum number of columns. Defaults to 30.
+    """
+    num_rows = -(-len(champions_bans_df.index) // max_cols)
+
+    champion_index = 0
+    for row in range(num_rows):
+        cols = st.columns(max_cols)
+        for col in cols:
+            if champion_index < len(champions_bans_df.index):
+                champion = champions_bans_df.index[champion_index]
+                champion = champion.replace(" ", "")
+                champion = champion.replace("'", "")
+                champion = CHAMPION_ICON_NAMES.get(champion, champion)
+
+                blue_proportion = champions_bans_df['Blue'].iloc[champion_index] / champions_bans_df['total'].iloc[champion_index]
+                red_proportion = champions_bans_df['Red'].iloc[champion_index] / champions_bans_df['total'].iloc[champion_index]
+
+                hover_info = f"Blue Bans: {champions_bans_df['Blue'].iloc[champion_index]}, Red Bans: {champions_bans_df['Red'].iloc[champion_index]}, Total Bans: {champions_bans_df['total'].iloc[champion_index]}"
+
+                col.markdown(f"""
+                    <div style="text-align: center;">
+                        <img src="{CHAMPION_ICON_URL.format(champion)}" width="50" title="{hover_info}">
+                        <div style="width: 100%; height: 10px; display: flex;">
+                            <div style="width: {blue_proportion*100}%; height: 100%; background-color: blue;"></div>
+                            <div style="width: {red_proportion*100}%; height: 100%; background-color: red;"></div>
+                        </div>
+                        <p style='text-align: center'>{champions_bans_df['total'].iloc[champion_index]}</p>
+                    </div>
+                """, unsafe_allow_html=True)
+
+                champion_index += 1
+            else :
+                break
@@ -0,0 +1,314 @@
+import threading
+import time
+from types import MappingProxyType
+import pandas as pd
+from bson import json_util
+import json_scrim
+import scrim_cache
+
+# Process-wide datasets shared by every Streamlit session and page.
+# Each dataset is loaded once per process (concurrent loads of the same dataset wait for the first one)
+# and callers receive shallow copies, so only one copy of the data lives in memory.
+# Shallow copies are only safe with pandas Copy-on-Write (enable_copy_on_write, called by the webapp at start,
+# default since pandas 3) : without it the callers receive deep copies, so they can never write into the shared tables.
+
+DATABASE_NAME = "lol_match_database"
+DEFAULT_MAX_AGE = 300
+MAX_QUERY_DATASETS = 16
+
+_lock = threading.Lock()
+_clients = {}
+_datasets = {}
+_loading = {}
+
+
+def enable_copy_on_write() :
+    """Turn on pandas Copy-on-Write for the whole process (default since pandas 3), so the shared tables are handed out as shallow copies.
+    Called by the webapp at start, the scripts importing this module keep the pandas behaviour they expect.
+    """
+    if int(pd.__version__.split(".")[0]) < 3 :
+        pd.set_option("mode.copy_on_write", True)
+
+
+def is_copy_on_write() -> bool :
+    """True if pandas Copy-on-Write is on"""
+    return int(pd.__version__.split(".")[0]) >= 3 or pd.get_option("mode.copy_on_write") is True
+
+
+def _share(data : pd.DataFrame) -> pd.DataFrame :
+    """Copy of a shared table handed to a caller : shallow with Copy-on-Write, deep otherwise"""
+    return data.copy(deep=not is_copy_on_write())
+
+
+def _read_only_cube(cube : dict) -> dict :
+    """Read-only version of a matchup cube (see json_scrim.build_matchup_cube), built once when the cube is loaded :
+    the enemies and details of each role become read-only dictionnaries and tuples"""
+    return {
+        role : {
+            "table" : matchups["table"],
+            "enemies" : MappingProxyType({champion : tuple(enemies) for champion, enemies in matchups["enemies"].items()}),
+            "details" : MappingProxyType({key : MappingProxyType(row) for key, row in matchups["details"].items()}),
+        }
+        for role, matchups in cube.items()
+    }
+
+
+def _share_cube(cube : dict) -> MappingProxyType :
+    """Read-only view of a shared matchup cube handed to a caller, with a copy of the tables (see _share)"""
+    return MappingProxyType({role : MappingProxyType({**matchups, "table" : _share(matchups["table"])}) for role, matchups in cube.items()})
+
+
+def get_database(host : str, database_name : str = DATABASE_NAME) :
+    """Get the Mongo database, the client is created once per host and shared by the whole process
+
+    Args:
+        host (str): Host string of the database
+        database_name (str, optional): Name of the database. Defaults to DATABASE_NAME.
+
+    Returns:
+        The Mongo database
+    """
+    with _lock :
+        if host not in _clients :
+            _clients[host] = json_scrim.connect_database(database_name, host=host).client
+        return _clients[host][database_name]
+
+
+def _query_key(query : dict) -> str :
+    """Canonical string of a Mongo query, used as cache key"""
+    return json_util.dumps(query or {}, sort_keys=True)
+
+
+def _load_once(key : tuple, loader, max_age : float) -> pd.DataFrame :
+    """Return the cached dataset for `key`, calling `loader` if it is missing or older than `max_age` seconds.
+    Only one thread runs `loader` for a given key, the others wait for its result (single-flight).
+
+    Args:
+        key (tuple): Key of the dataset
+        loader (Callable): Function without argument returning the dataset
+        max_age (float): Maximum age of the cached dataset in seconds, None to never reload
+
+    Returns:
+        The shared dataset
+    """
+    while True :
+        with _lock :
+            entry = _datasets.get(key)
+            if entry is not None and (max_age is None or time.monotonic() - entry[0] < max_age) :
+                return entry[1]
+            event = _loading.get(key)
+            is_leader = event is None
+            if is_leader :
+                event = threading.Event()
+                _loading[key] = event
+
+        if not is_leader :
+            # Another thread is loading the same dataset, wait for it and read the result
+            event.wait()
+            continue
+
+        try :
+            data = loader()
+            with _lock :
+                _datasets.pop(key, None)
+                _datasets[key] = (time.monotonic(), data)
+                # Only keep the most recent results of pushed down queries
+                query_keys = [cached_key for cached_key in _datasets if cached_key[0] in ("scrim_matches_query", "distinct", "duo_table", "champion_cores")]
+                for cached_key in query_keys[:-MAX_QUERY_DATASETS] :
+                    del _datasets[cached_key]
+            return data
+        finally :
+            with _lock :
+                del _loading[key]
+            event.set()
+
+
+def get_scrim_matches(host : str, query : dict = None, team_dict : dict = None, max_age : float = DEFAULT_MAX_AGE) -> pd.DataFrame :
+    """Get the (match,participant) table of the scrim_matches collection.
+    Without query, the full table is shared and refreshed with only the new games when it is older than `max_age` (see scrim_cache).
+    With a query (built with the json_scrim.filter_data_* functions), only the matching games and the fields of
+    json_scrim.SCRIM_PROJECTION are fetched, the last MAX_QUERY_DATASETS results are kept.
+
+    Args:
+        host (str): Host string of the database
+        query (dict, optional): Mongo query. Defaults to None for all the games.
+        team_dict (dict, optional): Dictionnary containing the team PUUID, used to add the IS_ALLY and ALLY_ROLE columns once at load (see json_scrim.add_team_membership). Defaults to None.
+        max_age (float, optional): Maximum age of the shared copy in seconds. Defaults to DEFAULT_MAX_AGE.
+
+    Returns:
+        pd.DataFrame: A copy of the shared table (shallow with Copy-on-Write, see _share)
+    """
+    collection = json_scrim.get_collection(get_database(host), "scrim_matches")
+    team_dict = {role : list(puuids) for role, puuids in team_dict.items()} if team_dict else None
+
+    def with_team_membership(data : pd.DataFrame) -> pd.DataFrame :
+        return json_scrim.add_team_membership(data, team_dict) if team_dict else data
+
+    if not query :
+        loader = lambda : with_team_membership(scrim_cache.load_participants_dataframe(collection))
+        return _share(_load_once(("scrim_matches", host, _query_key(team_dict)), loader, max_age))
+
+    loader = lambda : with_team_membership(json_scrim.read_and_create_dataframe(collection, query=query, projection=json_scrim.SCRIM_PROJECTION))
+    return _share(_load_once(("scrim_matches_query", host, _query_key(query), _query_key(team_dict)), loader, max_age))
+
+
+def get_matchup_cube(host : str, team_dict : dict, max_age : float = DEFAULT_MAX_AGE) -> dict :
+    """Get the matchups of every role computed on all the scrim games (see json_scrim.build_matchup_cube).
+    The cube is computed once per process, switching role or matchup on the Matchups page is a dictionnary lookup.
+
+    Args:
+        host (str): Host string of the database
+        team_dict (dict): Dictionnary containing the team PUUID
+        max_age (float, optional): Maximum age of the shared cube in seconds. Defaults to DEFAULT_MAX_AGE.
+
+    Returns:
+        MappingProxyType: Read-only view of the shared cube
+    """
+    team_dict = {role : list(puuids) for role, puuids in team_dict.items()}
+    loader = lambda : _read_only_cube(json_scrim.build_matchup_cube(get_scrim_matches(host, team_dict=team_dict, max_age=max_age), team_dict))
+    return _share_cube(_load_once(("matchup_cube", host, _query_key(team_dict)), loader, max_age))
+
+
+def get_duo_table(host : str, query : dict = None, team_dict : dict = None, roster : list = None, max_age : float = DEFAULT_MAX_AGE) -> pd.DataFrame :
+    """Get the duo table of the 10 pairs of roles for the team and its opponents (see json_scrim.build_duo_table).
+    The table is computed once for a query, the pages only slice it.
+
+    Args:
+        host (str): Host string of the database
+        query (dict, optional): Mongo query (see get_scrim_matches). Defaults to None for all the games.
+        team_dict (dict, optional): Dictionnary containing the team PUUID. Defaults to None.
+        roster (list, optional): Roster variants to keep (see json_scrim.filter_roster_variant). Defaults to None to keep every player.
+        max_age (float, optional): Maximum age of the shared table in seconds. Defaults to DEFAULT_MAX_AGE.
+
+    Returns:
+        pd.DataFrame: A copy of the shared table (shallow with Copy-on-Write, see _share)
+    """
+    team_dict = {role : list(puuids) for role, puuids in team_dict.items()} if team_dict else None
+
+    def loader() :
+        data = get_scrim_matches(host, query, team_dict=team_dict, max_age=max_age)
+        if roster and team_dict :
+            data = json_scrim.filter_roster_variant(data, roster, team_dict)
+        return json_scrim.build_duo_table(data, team_dict)
+
+    key = ("duo_table", host, _query_key(query), _query_key(team_dict), tuple(roster or []))
+    return _share(_load_once(key, loader, max_age))
+
+
+def get_champion_cores(host : str, query : dict = None, team_dict : dict = None, roster : list = None, min_size : int = 3, max_size : int = 5, min_support : int = None, max_age : float = DEFAULT_MAX_AGE) -> pd.DataFrame :
+    """Get the champion cores of the team and its opponents (see champion_cores.mine_champion_cores).
+    The cores are mined once for a query and parameters, the reruns of the page only read them.
+
+    Args:
+        host (str): Host string of the database
+        query (dict, optional): Mongo query (see get_scrim_matches). Defaults to None for all the games.
+        team_dict (dict, optional): Dictionnary containing the team PUUID. Defaults to None.
+        roster (list, optional): Roster variants to keep (see json_scrim.filter_roster_variant). Defaults to None to keep every player.
+        min_size (int, optional): Minimum number of champions of a core. Defaults to 3.
+        max_size (int, optional): Maximum number of champions of a core. Defaults to 5.
+        min_support (int, optional): Minimum number of games of a core. Defaults to None for champion_cores.DEFAULT_MIN_SUPPORT.
+        max_age (float, optional): Maximum age of the shared table in seconds. Defaults to DEFAULT_MAX_AGE.
+
+    Returns:
+        pd.DataFrame: A copy of the shared table (shallow with Copy-on-Write, see _share)
+    """
+    import champion_cores
+    team_dict = {role : list(puuids) for role, puuids in team_dict.items()} if team_dict else None
+    min_support = champion_cores.DEFAULT_MIN_SUPPORT if min_support is None else int(min_support)
+
+    def loader() :
+        data = get_scrim_matches(host, query, team_dict=team_dict, max_age=max_age)
+        if roster and team_dict :
+            data = json_scrim.filter_roster_variant(data, roster, team_dict)
+        return champion_cores.mine_champion_cores(data, team_dict, min_size=min_size, max_size=max_size, min_support=min_support)
+
+    key = ("champion_cores", host, _query_key(query), _query_key(team_dict), tuple(roster or []), min_size, max_size, min_support)
+    return _share(_load_once(key, loader, max_age))
+
+
+def get_distinct(host : str, field : str, query : dict = None, max_age : float = DEFAULT_MAX_AGE) -> list :
+    """Get the sorted distinct values of a field of the scrim_matches games (used for the sidebar options)
+
+    Args:
+        host (str): Host string of the database
+        field (str): Name of the field (for example "patchVersion")
+        query (dict, optional): Mongo query restricting the games. Defaults to None for all the games.
+        max_age (float, optional): Maximum age of the shared values in seconds. Defaults to DEFAULT_MAX_AGE.
+
+    Returns:
+        list: The distinct values
+    """
+    collection = json_scrim.get_collection(get_database(host), "scrim_matches")
+    loader = lambda : sorted(value for value in collection.distinct(field, query or {}) if value is not None)
+    return list(_load_once(("distinct", host, field, _query_key(query)), loader, max_age))
+
+
+def get_drafts(host : str, max_age : float = DEFAULT_MAX_AGE) -> pd.DataFrame :
+    """Get the dataframe of the drafts collection
+
+    Args:
+        host (str): Host string of the database
+        max_age (float, optional): Maximum age of the shared copy in seconds. Defaults to DEFAULT_MAX_AGE.
+
+    Returns:
+        pd.DataFrame: A copy of the shared table (shallow with Copy-on-Write, see _share)
+    """
+    def loader() :
+        import draft_analyze
+        collection = draft_analyze.get_collection(get_database(host), "drafts")
+        return draft_analyze.read_and_create_dataframe(collection)
+
+    return _share(_load_once(("drafts", host), loader, max_age))
+
+
+def get_draft_facts(host : str, max_age : float = DEFAULT_MAX_AGE) -> pd.DataFrame :
+    """Get the fact table of the drafts (see draft_analyze.build_draft_facts), built once from the shared drafts
+
+    Args:
+        host (str): Host string of the database
+        max_age (float, optional): Maximum age of the shared table in seconds. Defaults to DEFAULT_MAX_AGE.
+
+    Returns:
+        pd.DataFrame: A copy of the shared table (shallow with Copy-on-Write, see _share)
+    """
+    def loader() :
+        import draft_analyze
+        return draft_analyze.build_draft_facts(get_drafts(host, max_age=max_age))
+
+    return _share(_load_once(("draft_facts", host), loader, max_age))
+
+
+def get_scrims_with_drafts(host : str, max_age : float = DEFAULT_MAX_AGE) -> pd.DataFrame :
+    """Get the scrim games merged with their drafts (see draft_analyze.merge_scrim_with_draft), merged once from the shared tables
+
+    Args:
+        host (str): Host string of the database
+        max_age (float, optional): Maximum age of the shared table in seconds. Defaults to DEFAULT_MAX_AGE.
+
+    Returns:
+        pd.DataFrame: A copy of the shared table (shallow with Copy-on-Write, see _share)
+    """
+    def loader() :
+        import draft_analyze
+        return draft_analyze.merge_scrim_with_draft(get_scrim_matches(host, max_age=max_age), get_drafts(host, max_age=max_age))
+
+    return _share(_load_once(("scrims_with_drafts", host), loader, max_age))
+
+
+def invalidate(name : str = None) :
+    """Drop the shared datasets so the next call reloads them
+
+    Args:
+        name (str, optional): Name of the dataset to drop ("scrim_matches", "drafts"). Defaults to None for all datasets.
+            Dropping "scrim_matches" also drops the results of the pushed down queries and the tables computed from the games,
+            dropping "drafts" also drops the fact table of the drafts. Both drop the games merged with the drafts.
+    """
+    names = {name, "scrim_matches_query", "distinct", "matchup_cube", "duo_table", "champion_cores"} if name == "scrim_matches" else {name}
+    if name == "drafts" :
+        names.add("draft_facts")
+    if name in ("scrim_matches", "drafts") :
+        names.add("scrims_with_drafts")
+    with _lock :
+        for key in list(_datasets) :
+            if name is None or key[0] in names :
+                del _datasets[key]
@@ -12,21 +12,14 @@
 #     name: python3
 # ---
 
-from pymongo import MongoClient
-from dotenv import load_dotenv
 import os
-import pandas as pd
-from collections import Counter
 import itertools
-import plotly.express as plty
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from skimage import io
-import requests
-from io import BytesIO
-import streamlit as st
+import numpy as np
+import pandas as pd
 from typing import Literal
 
+# Analytics of the drafts. pymongo is imported when connecting, plotly and streamlit only when a chart is asked (see charts.py).
+
 
 
 # +
@@ -40,6 +33,7 @@ def connect_database(database_name : str, host : str) :
     Returns:
         Client connexion
     """
+    from pymongo import MongoClient
     client = MongoClient(host=host)
     return client[database_name]
 
@@ -66,64 +60,130 @@ def read_and_create_dataframe(collection) -> pd.DataFrame :
     Returns:
         pd.DataFrame: DataFrame of the JSON data
     """
-    df = pd.DataFrame()
-    for game in collection.find() :
-        df = pd.concat([df,pd.json_normalize(game)])
-    return df
+    # One json_normalize for all the documents (a concat per document is quadratic)
+    return pd.json_normalize(list(collection.find()))
 
 
 # -
 
-load_dotenv()
-mongo_host = st.secrets["MONGO_DB"]["RO_connection_string"]
-connect = connect_database('lol_match_database', host=mongo_host)
-drafts = get_collection(connect,"drafts")
-df = read_and_create_dataframe(drafts)
+# The drafts are not loaded at import, use dataset_service.get_drafts (loaded once per process) :
+# df = dataset_service.get_drafts(st.secrets["MONGO_DB"]["RO_connection_string"])
 
 
-def count_champs_bans(data : pd.DataFrame, chart : bool = False) :
-    """Count number of time a champion is banned for each side
+# +
+# Fact table of the drafts : one row per (draft, side, action, order), built once and shared by all the statistics
+DRAFT_SIDES = ["blue", "red"]
+DRAFT_ACTIONS = {"picks" : "pick", "bans" : "ban"}
+DRAFT_FACT_COLUMNS = ["draft_id", "date", "side", "team", "opponent", "action", "order", "champion"]
+
+
+def build_draft_facts(drafts) -> pd.DataFrame :
+    """Explode the drafts into a long table, the picks and bans lists are walked once
 
     Args:
-        data (pd.DataFrame): The dataframe containing the data (filtered or not)
-        chart (bool, optional): Choice to display or not the chart. Defaults to False.
+        drafts (pd.DataFrame or list): DataFrame of the drafts (see read_and_create_dataframe) or list of draft documents
 
     Returns:
-        
+        pd.DataFrame: DataFrame with the columns of DRAFT_FACT_COLUMNS :
+            * draft_id : `_id` of the draft (position of the draft if there is no `_id`)
+            * date, team, opponent : date of the draft, team of the side and team of the other side (categorical)
+            * side (blue/red), action (pick/ban), order (0 for the first pick or ban of the side), champion (categorical)
     """
+    if not isinstance(drafts, pd.DataFrame) :
+        drafts = pd.json_normalize(list(drafts))
+
+    def column(name : str) -> np.ndarray :
+        return drafts[name].to_numpy() if name in drafts.columns else np.full(len(drafts), None, dtype=object)
+
+    # Teams are factorized on the drafts, before being repeated on every pick and ban
+    team_codes, teams = pd.factorize(np.concatenate([column(f"{side}.team") for side in DRAFT_SIDES]))
+    team_codes = team_codes.reshape(len(DRAFT_SIDES), len(drafts))
+
+    positions, side_codes, action_codes, orders, champions = [], [], [], [], []
+    for side_code, side in enumerate(DRAFT_SIDES) :
+        for action_code, list_name in enumerate(DRAFT_ACTIONS) :
+            if f"{side}.{list_name}" not in drafts.columns :
+                continue
+            # Missing lists (NaN) are empty
+            lists = [value if isinstance(value, list) else [] for value in drafts[f"{side}.{list_name}"]]
+            lengths = np.fromiter(map(len, lists), dtype=np.int64, count=len(lists))
+            starts = np.cumsum(lengths) - lengths
+            positions.append(np.repeat(np.arange(len(lists)), lengths))
+            orders.append(np.arange(lengths.sum()) - np.repeat(starts, lengths))
+            side_codes.append(np.full(lengths.sum(), side_code, dtype=np.int8))
+            action_codes.append(np.full(lengths.sum(), action_code, dtype=np.int8))
+            champions.extend(itertools.chain.from_iterable(lists))
+
+    champion_codes, champion_names = pd.factorize(np.array(champions, dtype=object), sort=True)
+    positions = np.concatenate(positions) if positions else np.zeros(0, dtype=np.int64)
+    side_codes = np.concatenate(side_codes) if side_codes else np.zeros(0, dtype=np.int8)
+    draft_ids = drafts["_id"].to_numpy() if "_id" in drafts.columns else np.arange(len(drafts))
+    return pd.DataFrame({
+        "draft_id" : draft_ids[positions],
+        "date" : column("date")[positions],
+        "side" : pd.Categorical.from_codes(side_codes, DRAFT_SIDES),
+        "team" : pd.Categorical.from_codes(team_codes[side_codes, positions], teams),
+        "opponent" : pd.Categorical.from_codes(team_codes[1 - side_codes, positions], teams),
+        "action" : pd.Categorical.from_codes(np.concatenate(action_codes) if action_codes else np.zeros(0, dtype=np.int8), list(DRAFT_ACTIONS.values())),
+        "order" : np.concatenate(orders).astype(np.int8) if orders else np.zeros(0, dtype=np.int8),
+        "champion" : pd.Categorical.from_codes(champion_codes, champion_names),
+    }, columns=DRAFT_FACT_COLUMNS)
+
+
+def get_draft_facts(drafts) -> pd.DataFrame :
+    """Fact table of drafts given as a fact table (returned as is), a DataFrame of drafts or a list of draft documents"""
+    if isinstance(drafts, pd.DataFrame) and "action" in drafts.columns :
+        return drafts
+    return build_draft_facts(drafts)
+
+
+def count_facts(facts : pd.DataFrame, by : str, columns, values : list) -> pd.DataFrame :
+    """Count the rows of the fact table by `by` (index) and `columns`, with a column for each of `values` (0 if missing).
+    The counts are a bincount of the categorical codes, only the rows with at least one count are kept.
 
-    blue_bans = Counter(list(itertools.chain.from_iterable(data['blue.bans'])))
-    red_bans = Counter(list(itertools.chain.from_iterable(data['red.bans'])))
+    Args:
+        facts (pd.DataFrame): Rows of the fact table
+        by (str): Column of the index (for example "champion")
+        columns (str or np.ndarray): Column of the counted values (for example "action"), or the code of each row (position in `values`)
+        values (list): Values counted
 
-    champions_bans_df = pd.DataFrame([blue_bans,red_bans]).T.rename(columns={0:'Blue',1:'Red'}).fillna(0)
-    champions_bans_df['Blue'] = champions_bans_df['Blue'].astype(int)
-    champions_bans_df['Red'] = champions_bans_df['Red'].astype(int)
+    Returns:
+        pd.DataFrame: Counts indexed by the values of `by`, with a column for each of `values`
+    """
+    index = pd.Categorical(facts[by])
+    counted_codes = pd.Categorical(facts[columns], categories=values).codes if isinstance(columns, str) else columns
+    kept = (index.codes >= 0) & (counted_codes >= 0)
+    flat_codes = index.codes[kept].astype(np.int64) * len(values) + counted_codes[kept]
+    counts = np.bincount(flat_codes, minlength=len(index.categories) * len(values)).reshape(-1, len(values))
+    observed = counts.sum(axis=1) > 0
+    return pd.DataFrame(counts[observed], index=pd.Index(index.categories[observed], dtype=object), columns=list(values))
+
+
+def count_bans_by_side(data : pd.DataFrame) -> pd.DataFrame :
+    """Number of bans of each champion on each side, with columns Blue, Red and total"""
+    facts = get_draft_facts(data)
+    bans = facts.loc[facts["action"] == "ban", ["champion", "side"]]
+    champions_bans_df = count_facts(bans, "champion", "side", DRAFT_SIDES).rename(columns={"blue" : "Blue", "red" : "Red"})
     champions_bans_df['total'] = champions_bans_df['Blue'] + champions_bans_df['Red']
+    return champions_bans_df
+# -
+
+
+def count_champs_bans(data : pd.DataFrame, chart : bool = False) :
+    """Count number of time a champion is banned for each side
+
+    Args:
+        data (pd.DataFrame): The drafts (filtered or not) or their fact table (see build_draft_facts)
+        chart (bool, optional): Choice to display or not the chart. Defaults to False.
 
-    champions_bans_df.sort_values(by=['total'],ascending=True,inplace=True)
+    Returns:
+        pd.DataFrame: Number of bans of each champion (Blue, Red, total), sorted by total, or the figure
+    """
+    champions_bans_df = count_bans_by_side(data).sort_values(by=['total'],ascending=True)
 
     if chart :
-        fig = plty.histogram(champions_bans_df,y=champions_bans_df.index, x= ["Blue","Red"], orientation='h',title="Champions bans", width=1500, height=800)
-        
-        #add image champions
-        for champion in champions_bans_df.index :
-            fig.add_layout_image(
-                dict(
-                    source="https://cdn.communitydragon.org/latest/champion/"+champion+"/square",
-                    xref="x",
-                    yref="y",
-                    x=0,
-                    y=champion,
-                    sizex=0.5,
-                    sizey=0.5,
-                    xanchor="left",
-                    yanchor="middle"
-                ))
-        fig.update_layout(
-            xaxis_title="Number of bans",
-            yaxis_title="Champions",
-            legend_title="Side")
-        return fig
+        import charts
+        return charts.champions_bans_chart(champions_bans_df)
 
     return champions_bans_df
 
@@ -132,64 +192,17 @@ def count_champs_bansv2(data : pd.DataFrame, chart : bool = False) :
     """Count number of time a champion is banned for each side
 
     Args:
-        data (pd.DataFrame): The dataframe containing the data (filtered or not)
+        data (pd.DataFrame): The drafts (filtered or not) or their fact table (see build_draft_facts and filter_drafts)
         chart (bool, optional): Choice to display or not the chart. Defaults to False.
 
     Returns:
-        
+        pd.DataFrame: Number of bans of each champion (Blue, Red, total), sorted by total, None if the chart is displayed
     """
-
-    blue_bans = Counter(list(itertools.chain.from_iterable(data['blue.bans'].dropna())))
-    red_bans = Counter(list(itertools.chain.from_iterable(data['red.bans'].dropna())))
-
-    champions_bans_df = pd.DataFrame([blue_bans,red_bans]).T.rename(columns={0:'Blue',1:'Red'}).fillna(0)
-    champions_bans_df['Blue'] = champions_bans_df['Blue'].astype(int)
-    champions_bans_df['Red'] = champions_bans_df['Red'].astype(int)
-    champions_bans_df['total'] = champions_bans_df['Blue'] + champions_bans_df['Red']
-
-    champions_bans_df.sort_values(by='total',ascending=False,inplace=True)
+    champions_bans_df = count_bans_by_side(data).sort_values(by='total',ascending=False)
 
     if chart :
-        max_cols = 30  # Maximum number of columns
-        num_rows = -(-len(champions_bans_df.index) // max_cols)  
-        
-        champion_index = 0
-        for row in range(num_rows):
-            cols = st.columns(max_cols)
-            for col in cols:
-                if champion_index < len(champions_bans_df.index):
-                    champion = champions_bans_df.index[champion_index]
-                    champion = champion.replace(" ", "")
-                    champion = champion.replace("'", "")
-                    if champion == "Wukong":
-                        champion = "MonkeyKing"
-                    elif champion =="RenataGlasc":
-                        champion = "Renata"
-                    elif champion == "Dr.Mundo":
-                        champion = "Drmundo"
-                    elif champion == "Nunu&Willump":
-                        champion = "Nunu"
-
-                    blue_proportion = champions_bans_df['Blue'].iloc[champion_index] / champions_bans_df['total'].iloc[champion_index]
-                    red_proportion = champions_bans_df['Red'].iloc[champion_index] / champions_bans_df['total'].iloc[champion_index]
-                    
-                    hover_info = f"Blue Bans: {champions_bans_df['Blue'].iloc[champion_index]}, Red Bans: {champions_bans_df['Red'].iloc[champion_index]}, Total Bans: {champions_bans_df['total'].iloc[champion_index]}"
-
-                    col.markdown(f"""
-                        <div style="text-align: center;">
-                            <img src="https://cdn.communitydragon.org/latest/champion/{champion}/square" width="50" title="{hover_info}">
-                            <div style="width: 100%; height: 10px; display: flex;">
-                                <div style="width: {blue_proportion*100}%; height: 100%; background-color: blue;"></div>
-                                <div style="width: {red_proportion*100}%; height: 100%; background-color: red;"></div>
-                            </div>
-                            <p style='text-align: center'>{champions_bans_df['total'].iloc[champion_index]}</p>
-                        </div>
-                    """, unsafe_allow_html=True)
-                    
-                    champion_index += 1
-                else :
-                    break
-                
+        import charts
+        charts.show_champions_bans_grid(champions_bans_df)
         return None
 
     else : 
@@ -200,47 +213,62 @@ def count_champs_bansv2(data : pd.DataFrame, chart : bool = False) :
 
 
 # Merge function
+def get_match_keys(data : pd.DataFrame, source_column : str) -> pd.Series :
+    """matchKey column of the games or the drafts (see utils.get_match_key), computed from `source_column` for the documents stored without it
+
+    Args:
+        data (pd.DataFrame): The games ("jsonFileName") or the drafts ("date")
+        source_column (str): Column the key is computed from
+
+    Returns:
+        pd.Series: The keys (object)
+    """
+    computed = data[source_column].astype(object).str.replace(" ", "", regex=False)
+    if "matchKey" not in data.columns :
+        return computed
+    return data["matchKey"].astype(object).fillna(computed)
+
+
 def merge_scrim_with_draft(df_scrim : pd.DataFrame, df_draft : pd.DataFrame) -> pd.DataFrame :
-    """Merge scrim data with draft data based on the date of the match (i.e : 03022025_2)
+    """Merge scrim data with draft data on the matchKey of the match (i.e : 03022025_2), the dataframes are not modified.
+    Use dataset_service.get_scrims_with_drafts to merge the shared tables once per load.
 
     Args:
         df_scrim (pd.DataFrame): DataFrame contaning the scrim data (json from rofl)
         df_draft (pd.DataFrame): DataFrame containing the draft data from scraping.
 
     Returns:
-        pd.DataFrame: The merged DataFrame (left merge)
+        pd.DataFrame: The merged DataFrame (left merge), with the date of the drafts without blank space
     """
-    df_draft['date'] = df_draft['date'].apply(lambda x : x.replace(" ",""))
-    return df_scrim.merge(df_draft, how='left', left_on="jsonFileName",right_on="date")
+    scrims = df_scrim.assign(matchKey=get_match_keys(df_scrim, "jsonFileName"))
+    drafts = df_draft.drop(columns="matchKey", errors="ignore").assign(date=get_match_keys(df_draft, "date"))
+    return scrims.merge(drafts, how='left', left_on="matchKey", right_on="date")
 # +
 # count_champs_bans(df,chart=True)
 
 # +
 
-def filter_drafts(df_draft : pd.DataFrame, ally_team_tag : str,view : Literal["Both","Enemies Bans","Allies bans"] = "Both") -> pd.DataFrame:
+def filter_drafts(df_draft : pd.DataFrame, ally_team_tag : str,view : Literal["Both","Enemies bans","Allies bans"] = "Both") -> pd.DataFrame:
     """Function for filtering drafts bases on the ally or enemy view
 
     Args:
-        df_draft (pd.DataFrame): The dataframe containing draft info
+        df_draft (pd.DataFrame): The dataframe containing draft info, or its fact table (see build_draft_facts)
         ally_team_tag (str): The tag of the team considered as ally
-        view (Literal[Both;Enemies Bans;Allies bans], optional): The filter, with use with streamlit button. Defaults to "Both".
+        view (Literal[Both;Enemies bans;Allies bans], optional): The filter, with use with streamlit button. Defaults to "Both".
 
     Returns:
-        pd.DataFrame: DataFrame containing columns with blue bans and columns with red bans, filtered.
+        pd.DataFrame: The bans of the fact table, filtered (see count_champs_bansv2).
     """
+    facts = get_draft_facts(df_draft)
+    bans = facts.loc[facts["action"] == "ban"]
     if view == "Both" :
-        blue_bans = df_draft[['blue.bans']]
-        red_bans = df_draft[['red.bans']]
-    elif view == "Enemies bans" :
+        return bans
+    if view == "Enemies bans" :
         #Filter on enemies ban where we played vs them
-        blue_bans = df_draft.loc[(df_draft['blue.team']!=ally_team_tag) & (df_draft['red.team']==ally_team_tag),['blue.bans']]
-        red_bans = df_draft.loc[(df_draft['red.team']!= ally_team_tag) & (df_draft['blue.team']==ally_team_tag),['red.bans']]
-
-    elif view == "Allies bans" :
-        blue_bans = df_draft.loc[df_draft['blue.team']== ally_team_tag,['blue.bans']]
-        red_bans = df_draft.loc[df_draft['red.team']== ally_team_tag,['red.bans']]
-
-    return pd.concat([blue_bans,red_bans])
+        return bans.loc[(bans["team"] != ally_team_tag) & (bans["opponent"] == ally_team_tag)]
+    if view == "Allies bans" :
+        return bans.loc[bans["team"] == ally_team_tag]
+    raise ValueError("View must be 'Both', 'Enemies bans' or 'Allies bans'.")
 
 def filter_by_team_and_side(collection, team_name: str, side: str):
     """
@@ -289,7 +317,7 @@ def calculate_pick_ban_counts(
     sorted by presence, then pick count, and finally alphabetical order.
 
     Args:
-        drafts_list (list or list of lists): List containing one or more sets of drafts.
+        drafts_list (list or list of lists): List containing one or more sets of drafts, or a fact table (see build_draft_facts).
         min_picks (int): Minimum number of picks to include.
         max_picks (int): Maximum number of picks to include.
         min_bans (int): Minimum number of bans to include.
@@ -300,45 +328,19 @@ def calculate_pick_ban_counts(
     Returns:
         pd.DataFrame: DataFrame containing filtered champion statistics.
     """
-    import pandas as pd
-    from collections import Counter
-
-    # If drafts_list is not a list of lists, wrap it in another list for consistency
-    if isinstance(drafts_list, list) and not isinstance(drafts_list[0], list):
-        drafts_list = [drafts_list]
-
-    # Counters to track picks and bans across all drafts
-    pick_counter = Counter()
-    ban_counter = Counter()
-
-    # Iterate through each set of drafts
-    for drafts in drafts_list:
-        for draft in drafts:
-            # Count blue and red picks
-            pick_counter.update(draft['blue']['picks'])
-            pick_counter.update(draft['red']['picks'])
-            # Count blue and red bans
-            ban_counter.update(draft['blue']['bans'])
-            ban_counter.update(draft['red']['bans'])
-
-    # Build a list of champions with their statistics
-    champions = set(pick_counter.keys()).union(set(ban_counter.keys()))
-    stats = []
-
-    for champ in champions:
-        picks = pick_counter[champ]
-        bans = ban_counter[champ]
-        presence = picks + bans
-
-        stats.append({
-            'Champion': champ,       # Name of the champion
-            'Presence': presence,    # Total presence (picks + bans)
-            'Pick Count': picks,     # Number of times picked
-            'Ban Count': bans        # Number of times banned
-        })
-
-    # Convert the statistics into a DataFrame
-    df = pd.DataFrame(stats)
+    # If drafts_list is a list of lists, the sets of drafts are counted together
+    if isinstance(drafts_list, list) and drafts_list and isinstance(drafts_list[0], list):
+        facts = pd.concat([build_draft_facts(drafts) for drafts in drafts_list], ignore_index=True)
+    else :
+        facts = get_draft_facts(drafts_list)
+
+    counts = count_facts(facts, "champion", "action", list(DRAFT_ACTIONS.values()))
+    df = pd.DataFrame({
+        'Champion': counts.index.to_numpy(),                            # Name of the champion
+        'Presence': (counts["pick"] + counts["ban"]).to_numpy(),       # Total presence (picks + bans)
+        'Pick Count': counts["pick"].to_numpy(),                        # Number of times picked
+        'Ban Count': counts["ban"].to_numpy(),                          # Number of times banned
+    })
 
     # Apply filters for picks, bans, and presence
     if min_picks is not None:
@@ -357,7 +359,7 @@ def calculate_pick_ban_counts(
     # Sort the DataFrame by Presence (descending), Pick Count (descending), and Champion (alphabetically)
     df = df.sort_values(by=['Presence', 'Pick Count', 'Champion'], ascending=[False, False, True])
 
-    return df
+    return df.reset_index(drop=True)
 
 
 # pick_ban_stats=calculate_pick_ban_counts(blue_side_scl)
@@ -457,68 +459,31 @@ def calculate_pick_priority(drafts, team_name, side):
     B1, B2/B3 for the blue side, and R1/R2 for the red side.
 
     Args:
-        drafts (list): List of drafts (typically filtered by `filter_by_team_and_side`).
+        drafts (list): List of drafts (typically filtered by `filter_by_team_and_side`), or a fact table (see build_draft_facts).
         team_name (str): Name of the team for which to calculate priorities.
         side (str): "blue" or "red".
 
     Returns:
         pd.DataFrame: DataFrame containing champions and their frequencies for specified positions.
     """
-    from collections import Counter
-    import pandas as pd
-
     # Validate the side parameter
     if side not in ["blue", "red"]:
         raise ValueError("The 'side' parameter must be 'blue' or 'red'.")
 
-    # Filter drafts to only include those where the team is on the specified side
-    team_drafts = [draft for draft in drafts if draft[side]["team"] == team_name]
-
-    # Initialize counters for specific positions
-    position_counters = {"B1": Counter(), "B2_B3": Counter(), "R1_R2": Counter()}
-
-    # Iterate through the drafts to collect picks for each position
-    for draft in team_drafts:
-        picks = draft[side]["picks"]
-        if side == "blue":
-            # Count picks for B1 (first pick) and B2/B3 (second and third picks)
-            if len(picks) > 0:
-                position_counters["B1"].update([picks[0]])  # First pick (blue1)
-            if len(picks) > 1:
-                position_counters["B2_B3"].update(picks[1:3])  # Second and third picks (blue2, blue3)
-        elif side == "red":
-            # Count picks for R1 (first pick) and R2 (second pick)
-            if len(picks) > 0:
-                position_counters["R1_R2"].update([picks[0]])  # First pick (red1)
-            if len(picks) > 1:
-                position_counters["R1_R2"].update([picks[1]])  # Second pick (red2)
-
-    # Build the data for the DataFrame
-    data = []
+    # Picks of the team on the specified side, with the position of each pick (B1, B2_B3 or R1_R2)
+    facts = get_draft_facts(drafts)
+    picks = facts.loc[(facts["side"] == side) & (facts["team"] == team_name) & (facts["action"] == "pick") & (facts["order"] < 3), ["champion", "order"]]
     if side == "blue":
-        # Combine data for B1 and B2/B3 positions
-        for champ in position_counters["B1"].keys() | position_counters["B2_B3"].keys():
-            data.append({
-                "Champion": champ,
-                "B1": position_counters["B1"][champ],
-                "B2_B3": position_counters["B2_B3"][champ],
-                "Total": position_counters["B1"][champ] + position_counters["B2_B3"][champ]
-            })
-    elif side == "red":
-        # Only use R1/R2 data for the red side
-        for champ in position_counters["R1_R2"].keys():
-            data.append({
-                "Champion": champ,
-                "R1_R2": position_counters["R1_R2"][champ],
-                "Total": position_counters["R1_R2"][champ]
-            })
-
-    # If no data is available, return an empty DataFrame with the appropriate columns
-    if not data:
-        return pd.DataFrame(columns=["Champion", "B1", "B2_B3", "R1_R2", "Total"][:3 if side == "red" else 4])
+        positions = ["B1", "B2_B3"]
+        pick_positions = (picks["order"].to_numpy() > 0).astype(np.int8)
+    else :
+        positions = ["R1_R2"]
+        picks = picks.loc[picks["order"] < 2]
+        pick_positions = np.zeros(len(picks), dtype=np.int8)
 
-    # Create the DataFrame
-    df = pd.DataFrame(data)
+    df = count_facts(picks, "champion", pick_positions, positions)
+    df["Total"] = df[positions].sum(axis=1)
+    df = df.rename_axis("Champion").reset_index()
 
     # Sort the data
     if side == "blue":
@@ -529,7 +494,7 @@ def calculate_pick_priority(drafts, team_name, side):
         df = df.sort_values(by="Total", ascending=False)
 
     # Return the sorted DataFrame
-    return df.fillna(0)
+    return df.reset_index(drop=True)
 
 
 
@@ -545,37 +510,25 @@ def calculate_ban_priority_by_side(drafts, team_name, side):
     Calculates the priority of the top three bans performed by a team on a specific side (blue or red).
 
     Args:
-        drafts (list): List of drafts (typically filtered by `filter_by_team_and_side`).
+        drafts (list): List of drafts (typically filtered by `filter_by_team_and_side`), or a fact table (see build_draft_facts).
         team_name (str): Name of the team for which to calculate ban priorities.
         side (str): "blue" or "red".
 
     Returns:
         pd.DataFrame: DataFrame containing champions banned by the team and their frequencies.
     """
-    from collections import Counter
-    import pandas as pd
-
     # Validate the side parameter
     if side not in ["blue", "red"]:
         raise ValueError("The 'side' parameter must be 'blue' or 'red'.")
 
-    # Filter drafts to only include those where the team is on the specified side
-    team_drafts = [draft for draft in drafts if draft[side]["team"] == team_name]
-
-    # Counter for bans performed by the team
-    ban_counter = Counter()
-
-    # Iterate through the drafts to collect the top three bans
-    for draft in team_drafts:
-        bans = draft[side]["bans"][:3]  # Only consider the first three bans
-        ban_counter.update(bans)
+    # Only consider the first three bans of the team on the specified side
+    facts = get_draft_facts(drafts)
+    bans = facts.loc[(facts["side"] == side) & (facts["team"] == team_name) & (facts["action"] == "ban") & (facts["order"] < 3), ["champion", "action"]]
 
-    # Build a DataFrame from the results
-    data = [{"Champion": champ, "Frequency": freq} for champ, freq in ban_counter.items()]
-    df = pd.DataFrame(data)
+    df = count_facts(bans, "champion", "action", ["ban"]).rename(columns={"ban" : "Frequency"}).rename_axis("Champion").reset_index()
 
     # Sort by frequency (descending) and champion name (alphabetical order)
-    return df.sort_values(by=["Frequency", "Champion"], ascending=[False, True])
+    return df.sort_values(by=["Frequency", "Champion"], ascending=[False, True]).reset_index(drop=True)
 
 
 # +
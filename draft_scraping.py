@@ -24,6 +24,7 @@ import gspread
 from dotenv import load_dotenv
 import os
 from itertools import chain
+import utils
 
 
 # +
@@ -196,6 +197,8 @@ def scraping_draft(draft_url : str,team_reference_dict : dict , mongo_collection
     draft_json = {
         "link" : draft_url,
         "date" : teams_names[2],
+        # Key of the scrim game of the draft (jsonFileName), see draft_analyze.merge_scrim_with_draft
+        "matchKey" : utils.get_match_key(teams_names[2]),
         "blue" : 
             {
                 "picks" : blue[0],
@@ -243,6 +246,7 @@ list_draft_url = list(chain.from_iterable(sh.worksheet("Historique de Scrim").ge
 
 connect = connect_database('lol_match_database', host=os.getenv("ATLAS_CONNEXION_STRING"))
 drafts_collection = get_collection(connect,"drafts")
+# The indexes of the collection (link for document_exist) are created by `python mongo_indexes.py`
 list_draft_url = [x for x in list_draft_url if x != ""]
 # -
 
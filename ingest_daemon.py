@@ -0,0 +1,203 @@
+import argparse
+import os
+import threading
+import time
+import traceback
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+import rofl_converter
+
+# Ingestion daemon : watches rofl_folder and json_folder and pushes the new games into MongoDB as they arrive.
+# The file system events (inotify on Linux) only wake the daemon up, the files arriving together are gathered
+# in one batch (debounce window), then the replays are converted (rofl_converter) and the JSON games pushed (push_json_to_db).
+# Between two batches the daemon is waiting on an event, without polling the folders.
+# A failed batch (database unreachable...) is logged and run again after a growing delay, the daemon keeps running.
+# A replay which can not be converted is left in rofl_folder and ignored by the next batches until the file changes (see rofl_converter).
+# Run with : python ingest_daemon.py [--debounce 2] [--workers 4]
+
+DEBOUNCE_SECONDS = 2.0
+MAX_BATCH_DELAY = 30.0
+RESCAN_SECONDS = 600.0
+RETRY_DELAY = 5.0
+MAX_RETRY_DELAY = 300.0
+WATCHED_EXTENSIONS = (".rofl", ".json")
+
+
+class BatchTrigger(FileSystemEventHandler) :
+    """Record the arrival of replays and JSON games, see wait_for_batch"""
+
+    def __init__(self) :
+        super().__init__()
+        self.pending = threading.Event()
+        self.lock = threading.Lock()
+        self.first_event = None
+        self.last_event = None
+        # Path -> time of its last event, to drop the events of the files processed by a batch
+        self.files = {}
+
+    def on_any_event(self, event) :
+        if event.is_directory or event.event_type not in ("created", "modified", "moved", "closed") :
+            return
+        path = getattr(event, "dest_path", "") or event.src_path
+        file_name = os.path.basename(path)
+        # The manifests and the temporary files written by the pipeline are ignored
+        if file_name.startswith(".") or not file_name.endswith(WATCHED_EXTENSIONS) :
+            return
+        with self.lock :
+            self.last_event = time.monotonic()
+            self.files[path] = self.last_event
+            if self.first_event is None :
+                self.first_event = self.last_event
+        self.pending.set()
+
+    def discard_processed(self, batch_start : float) :
+        """Drop the events of the files seen by a batch : the files arrived before the batch started and the files
+        which do not exist anymore (JSON games written by the converter then pushed and removed in the same batch).
+        No batch is started again if only these files had events.
+
+        Args:
+            batch_start (float): time.monotonic() at the start of the batch
+        """
+        with self.lock :
+            self.files = {path : event_time for path, event_time in self.files.items() if event_time > batch_start and os.path.exists(path)}
+            if not self.files :
+                self.first_event, self.last_event = None, None
+                self.pending.clear()
+
+    def wait_for_batch(self, stop : threading.Event, debounce : float = DEBOUNCE_SECONDS, max_delay : float = MAX_BATCH_DELAY, rescan : float = RESCAN_SECONDS) -> bool :
+        """Wait until files arrived and no new file arrived for `debounce` seconds (or `max_delay` seconds after the first one).
+        Without event for `rescan` seconds, a batch is started anyway in case an event was missed (network folders).
+
+        Args:
+            stop (threading.Event): Set to stop waiting
+            debounce (float, optional): Quiet time closing a batch in seconds. Defaults to DEBOUNCE_SECONDS.
+            max_delay (float, optional): Maximum time between the first file of a batch and the batch. Defaults to MAX_BATCH_DELAY.
+            rescan (float, optional): Maximum time between two batches. Defaults to RESCAN_SECONDS.
+
+        Returns:
+            bool: True if a batch must be run, False if the daemon is stopped
+        """
+        deadline = time.monotonic() + rescan
+        # Timeout of 1 s so the daemon can be stopped (Ctrl+C) on every platform
+        while not self.pending.wait(1.0) :
+            if stop.is_set() :
+                return False
+            if time.monotonic() >= deadline :
+                return True
+
+        while not stop.is_set() :
+            with self.lock :
+                now = time.monotonic()
+                remaining = min(self.last_event + debounce, self.first_event + max_delay) - now
+                if remaining <= 0 :
+                    # The events arriving during the batch start the next one
+                    self.first_event, self.last_event = None, None
+                    self.files.clear()
+                    self.pending.clear()
+                    return True
+            stop.wait(remaining)
+        return False
+
+
+def run_batch(collection, rofl_folder : str, json_folder : str, backup_folder : str, team_dict : dict = None, workers : int = None) -> dict :
+    """Convert the replays of `rofl_folder` then push the JSON games of `json_folder`
+
+    Args:
+        collection : Mongo collection (scrim_matches)
+        rofl_folder (str): Folder of the replays
+        json_folder (str): Folder of the JSON games
+        backup_folder (str): Folder of the converted replays
+        team_dict (dict, optional): Dictionnary containing the team PUUID. Defaults to None.
+        workers (int, optional): Number of processes. Defaults to None for the number of CPU.
+
+    Returns:
+        dict: {"convert" : report of rofl_converter.convert_folder (None without replay), "push" : report of push_json_to_db.push_folder}
+    """
+    import push_json_to_db
+
+    convert_report = None
+    if any(file_name.endswith(".rofl") for file_name in os.listdir(rofl_folder)) :
+        convert_report = rofl_converter.convert_folder(rofl_folder, json_folder, backup_folder, workers=workers)
+    push_report = push_json_to_db.push_folder(collection, json_folder, team_dict, workers=workers)
+    return {"convert" : convert_report, "push" : push_report}
+
+
+def watch(collection, rofl_folder : str = rofl_converter.sourceFolderRofl, json_folder : str = rofl_converter.targetFolderJson, backup_folder : str = rofl_converter.backupFolderRofl,
+          team_dict : dict = None, workers : int = None, debounce : float = DEBOUNCE_SECONDS, max_delay : float = MAX_BATCH_DELAY, stop : threading.Event = None, on_batch = None) :
+    """Push the files already in the folders, then every new file until `stop` is set.
+    An error during a batch is logged, the batch is run again after RETRY_DELAY seconds (doubled on each failure, up to MAX_RETRY_DELAY).
+
+    Args:
+        collection : Mongo collection (scrim_matches)
+        rofl_folder (str, optional): Folder of the replays. Defaults to rofl_converter.sourceFolderRofl.
+        json_folder (str, optional): Folder of the JSON games. Defaults to rofl_converter.targetFolderJson.
+        backup_folder (str, optional): Folder of the converted replays. Defaults to rofl_converter.backupFolderRofl.
+        team_dict (dict, optional): Dictionnary containing the team PUUID. Defaults to None.
+        workers (int, optional): Number of processes. Defaults to None for the number of CPU.
+        debounce (float, optional): Quiet time closing a batch in seconds. Defaults to DEBOUNCE_SECONDS.
+        max_delay (float, optional): Maximum time between the first file of a batch and the batch. Defaults to MAX_BATCH_DELAY.
+        stop (threading.Event, optional): Set to stop the daemon. Defaults to None to run until interrupted.
+        on_batch (Callable, optional): Called with the report of each batch. Defaults to None to print it.
+    """
+    stop = stop or threading.Event()
+    on_batch = on_batch or print_batch
+    for folder in (rofl_folder, json_folder, backup_folder) :
+        os.makedirs(folder, exist_ok=True)
+
+    trigger = BatchTrigger()
+    observer = Observer()
+    observer.schedule(trigger, rofl_folder, recursive=False)
+    observer.schedule(trigger, json_folder, recursive=False)
+    observer.start()
+    try :
+        run_next, retry_delay = True, RETRY_DELAY
+        while run_next :
+            batch_start = time.monotonic()
+            try :
+                report = run_batch(collection, rofl_folder, json_folder, backup_folder, team_dict, workers)
+            except Exception :
+                print(f"{time.strftime('%H:%M:%S')} Batch failed, next try in {retry_delay:.0f} s :\n{traceback.format_exc()}")
+                # The files of the failed batch are still in the folders, the batch is run again after the delay
+                run_next = not stop.wait(retry_delay)
+                retry_delay = min(2 * retry_delay, MAX_RETRY_DELAY)
+                continue
+            retry_delay = RETRY_DELAY
+            on_batch(report)
+            trigger.discard_processed(batch_start)
+            run_next = trigger.wait_for_batch(stop, debounce, max_delay)
+    finally :
+        observer.stop()
+        observer.join()
+
+
+def print_batch(report : dict) :
+    """Print the report of a batch, nothing if no file was processed"""
+    convert_report, push_report = report["convert"], report["push"]
+    if convert_report and (convert_report["converted"] or convert_report["failed"]) :
+        print(f"{time.strftime('%H:%M:%S')} {len(convert_report['converted'])} replays converted, {len(convert_report['failed'])} failed.")
+    if push_report["pushed"] or push_report["failed"] :
+        print(f"{time.strftime('%H:%M:%S')} {push_report['games']} games pushed from {len(push_report['pushed'])} files ({push_report['games_per_second']:.0f} games/s), failed : {push_report['failed']}")
+
+
+if __name__ == "__main__" :
+    import pymongo
+    import push_json_to_db
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rofl-folder", default=rofl_converter.sourceFolderRofl)
+    parser.add_argument("--json-folder", default=rofl_converter.targetFolderJson)
+    parser.add_argument("--backup-folder", default=rofl_converter.backupFolderRofl)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS, help="Seconds without new file before a batch is pushed")
+    parser.add_argument("--max-delay", type=float, default=MAX_BATCH_DELAY, help="Maximum seconds between the arrival of a file and its push")
+    args = parser.parse_args()
+
+    myclient = pymongo.MongoClient(host=os.getenv("ATLAS_CONNEXION_STRING"))
+    collection = myclient["lol_match_database"]["scrim_matches"]
+    print(f"Watching {args.rofl_folder} and {args.json_folder} (Ctrl+C to stop)")
+    try :
+        watch(collection, args.rofl_folder, args.json_folder, args.backup_folder, push_json_to_db.get_team_dict(), workers=args.workers, debounce=args.debounce, max_delay=args.max_delay)
+    except KeyboardInterrupt :
+        pass
+    finally :
+        myclient.close()
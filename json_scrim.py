@@ -13,20 +13,18 @@
 # ---
 
 # %%
-from pymongo import MongoClient
 import pandas as pd
-import plotly.express as plty
-import plotly.graph_objects as go
-import plotly.subplots
 import os
+import hashlib
+import json
 from datetime import datetime
-from dotenv import load_dotenv
-import streamlit as st
 import warnings
-from bson import ObjectId
 import numpy as np
 import utils
-load_dotenv()
+import winrate_series
+
+# Analytics of the scrim games. Only pandas and numpy are imported here : pymongo is imported when connecting,
+# plotly and streamlit only when a chart is asked (see charts.py), so the scripts import this module quickly.
 
 
 # %%
@@ -39,6 +37,7 @@ def connect_database(database_name : str, host : str = 'localhost') :
     Returns:
         Client connexion
     """
+    from pymongo import MongoClient
     client = MongoClient(host=host)
     return client[database_name]
 
@@ -56,25 +55,240 @@ def get_collection(connection, collection_name : str) :
 
 
 # %%
-def read_and_create_dataframe(collection) -> pd.DataFrame :
+DEFAULT_BATCH_SIZE = 1000
+
+# Fields used by the webapp pages, to avoid transferring every participant stat when a filter is pushed down to Mongo
+SCRIM_PROJECTION = [
+    "_id", "gameDuration", "jsonFileName", "patchVersion", "officialMatch", "enemyTeamName", "gameType",
+    "participants.PUUID", "participants.RIOT_ID_GAME_NAME", "participants.SKIN", "participants.TEAM",
+    "participants.WIN", "participants.TRUE_POSITION", "participants.CHAMPIONS_KILLED", "participants.NUM_DEATHS",
+    "participants.ASSISTS", "participants.GOLD_EARNED", "participants.TOTAL_DAMAGE_DEALT_TO_CHAMPIONS",
+    "participants.VISION_SCORE", "participants.MINIONS_KILLED", "participants.NEUTRAL_MINIONS_KILLED",
+    "participants.VISION_WARDS_BOUGHT_IN_GAME", "participants.KDA", "datetime", "matchKey",
+]
+
+# Declared dtypes of the participants table (see apply_schema)
+CATEGORICAL_COLUMNS = [
+    "SKIN", "TRUE_POSITION", "TEAM", "PUUID", "RIOT_ID_GAME_NAME", "RIOT_ID_TAG_LINE", "NAME",
+    "INDIVIDUAL_POSITION", "TEAM_POSITION", "patchVersion", "enemyTeamName", "gameType", "jsonFileName", "allyTeam", "matchKey",
+]
+BOOLEAN_COLUMNS = {"WIN" : "Win", "IS_ALLY" : True}
+NON_NUMERIC_COLUMNS = ["_id", "datetime"]
+# Averaged then rounded to 2 decimals by the pages, float32 would change the rounding
+FLOAT64_COLUMNS = ["KDA"]
+
+POSITIONS = ["TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"]
+TEAMS = ["100", "200"]
+
+def parse_file_date(json_file_name : str) -> datetime :
+    """Date of a game from its json file name (DDMMYYYY_N.json)"""
+    return datetime.strptime(json_file_name.split('_')[0], '%d%m%Y')
+
+
+def to_number(value) :
+    """Convert a stat stored as string to int (or float), other values are returned unchanged"""
+    if not isinstance(value, str) :
+        return value
+    try :
+        return int(value)
+    except ValueError :
+        try :
+            return float(value)
+        except ValueError :
+            return value
+
+
+def normalize_game_document(game : dict, team_dict : dict = None) -> dict :
+    """Add the fields derived at ingest to a game document (produced by main.js), so the readers do not parse them :
+        * datetime : Date of the game (BSON date), from jsonFileName
+        * matchKey : Key of the draft of the game, from jsonFileName (see utils.get_match_key)
+        * Participants stats as numbers (the ROFL stats are strings), text fields (CATEGORICAL_COLUMNS, WIN) are kept
+        * VISION_WARDS_BOUGHT_IN_GAME : 0 when missing
+        * KDA : (kills + assists) / max(deaths, 1)
+        * IS_ALLY : True for the players of team_dict, and allyTeam the TEAM of the team in the game (only with a team_dict).
+          It is a hint for the queries on the collection, it is not updated when the roster changes : the loaded tables
+          drop it (see drop_stored_ally_marker) and resolve the membership with the current roster (see add_team_membership)
+
+    Args:
+        game (dict): The game document
+        team_dict (dict, optional): Dictionnary containing the team PUUID. Defaults to None.
+
+    Returns:
+        dict: The normalized document (a new dict)
+    """
+    game = dict(game)
+    if "jsonFileName" in game and "datetime" not in game :
+        game["datetime"] = parse_file_date(game["jsonFileName"])
+    if "jsonFileName" in game :
+        game["matchKey"] = utils.get_match_key(game["jsonFileName"])
+    team_puuids = {puuid for puuids in team_dict.values() for puuid in puuids} if team_dict else None
+
+    participants = []
+    for participant in game.get("participants", []) :
+        participant = {
+            key : value if key in CATEGORICAL_COLUMNS or key in BOOLEAN_COLUMNS else to_number(value)
+            for key, value in participant.items()
+        }
+        participant.setdefault("VISION_WARDS_BOUGHT_IN_GAME", 0)
+        if all(isinstance(participant.get(stat), (int, float)) for stat in ["CHAMPIONS_KILLED", "NUM_DEATHS", "ASSISTS"]) :
+            participant["KDA"] = (participant["CHAMPIONS_KILLED"] + participant["ASSISTS"]) / max(participant["NUM_DEATHS"], 1)
+        if team_puuids is not None :
+            participant["IS_ALLY"] = participant.get("PUUID") in team_puuids
+            if participant["IS_ALLY"] :
+                game["allyTeam"] = participant.get("TEAM")
+        participants.append(participant)
+    game["participants"] = participants
+    return game
+
+
+def create_participants_dataframe(games : list) -> pd.DataFrame :
+    """Flatten a list of game documents into the (match,participant) dataframe.
+    The whole list is normalized and exploded once, so the cost is linear in the number of games.
+
+    Args:
+        games (list): List of game documents (dict) as stored in the scrim_matches collection
+
+    Returns:
+        pd.DataFrame: DataFrame with one row per (match,participant)
+    """
+    if not games :
+        return pd.DataFrame()
+    df = pd.json_normalize(games)
+    df = df.explode('participants', ignore_index=True)
+    df_participants = pd.json_normalize(df['participants'].tolist())
+    df = pd.concat([df.drop(columns='participants'),df_participants],axis = 1)
+    # Documents normalized at ingest (see normalize_game_document) already contain these fields, only the older ones are completed
+    if 'VISION_WARDS_BOUGHT_IN_GAME' not in df.columns :
+        df['VISION_WARDS_BOUGHT_IN_GAME'] = 0
+    if df['VISION_WARDS_BOUGHT_IN_GAME'].isna().any() or not pd.api.types.is_numeric_dtype(df['VISION_WARDS_BOUGHT_IN_GAME']) :
+        df['VISION_WARDS_BOUGHT_IN_GAME'] = pd.to_numeric(df['VISION_WARDS_BOUGHT_IN_GAME']).fillna(0).astype('int')
+    if 'datetime' not in df.columns :
+        df['datetime'] = pd.NaT
+    missing_date = df['datetime'].isna()
+    if missing_date.any() :
+        df.loc[missing_date, 'datetime'] = pd.to_datetime(df.loc[missing_date, 'jsonFileName'].str.split('_').str[0], format='%d%m%Y')
+    df['datetime'] = pd.to_datetime(df['datetime'])
+    return apply_schema(drop_stored_ally_marker(df))
+
+
+def drop_stored_ally_marker(data : pd.DataFrame) -> pd.DataFrame :
+    """Drop the IS_ALLY and allyTeam columns stored at ingest (see normalize_game_document).
+    They were computed with the roster of the ingest, which may have changed since : the membership is resolved
+    at load with the current roster (see add_team_membership).
+
+    Args:
+        data (pd.DataFrame): The participants table
+
+    Returns:
+        pd.DataFrame: The table without the stored marker
+    """
+    return data.drop(columns=['IS_ALLY', 'allyTeam'], errors='ignore')
+
+
+def to_compact_numeric(values : pd.Series) -> pd.Series :
+    """Convert a column of numbers (or numbers stored as strings) to int32, or float32 when values are missing or decimal.
+    The column is returned unchanged if it contains text.
+
+    Args:
+        values (pd.Series): The column
+
+    Returns:
+        pd.Series: The converted column
+    """
+    numbers = values if pd.api.types.is_numeric_dtype(values) else pd.to_numeric(values, errors="coerce")
+    if numbers.notna().sum() != values.notna().sum() :
+        return values
+    if numbers.isna().any() :
+        return numbers.astype("float32")
+    if not (numbers % 1 == 0).all() :
+        return numbers.astype("float32")
+    if numbers.empty or (numbers.min() >= np.iinfo(np.int32).min and numbers.max() <= np.iinfo(np.int32).max) :
+        return numbers.astype("int32")
+    return numbers.astype("int64")
+
+
+def to_boolean(values : pd.Series, column : str = "WIN") -> pd.Series :
+    """Convert a column of BOOLEAN_COLUMNS to booleans : True when equal to the declared value ("Win" for WIN) or to True.
+    A boolean column is returned unchanged, the missing values are False.
+
+    Args:
+        values (pd.Series): The column
+        column (str, optional): Name of the column in BOOLEAN_COLUMNS. Defaults to "WIN".
+
+    Returns:
+        pd.Series: The boolean column
+    """
+    if pd.api.types.is_bool_dtype(values) :
+        return values
+    # A boolean column with missing values (after a merge or a reindex) has the object dtype
+    return values.eq(BOOLEAN_COLUMNS[column]) | values.eq(True)
+
+
+def apply_schema(data : pd.DataFrame) -> pd.DataFrame :
+    """Apply the declared dtypes to the participants table :
+        * CATEGORICAL_COLUMNS (few values repeated on many rows) become categoricals
+        * BOOLEAN_COLUMNS become booleans (True when equal to the declared value)
+        * FLOAT64_COLUMNS become float64
+        * Other columns (participant stats arrive as strings) become int32/float32, except NON_NUMERIC_COLUMNS and text columns
+
+    Args:
+        data (pd.DataFrame): The participants table
+
+    Returns:
+        pd.DataFrame: The table with compact dtypes
+    """
+    columns = {}
+    for column in data.columns :
+        values = data[column]
+        if column in CATEGORICAL_COLUMNS :
+            columns[column] = values.astype("category")
+        elif column in BOOLEAN_COLUMNS :
+            columns[column] = to_boolean(values, column)
+        elif column in FLOAT64_COLUMNS :
+            columns[column] = pd.to_numeric(values, errors="coerce").astype("float64")
+        elif column in NON_NUMERIC_COLUMNS or pd.api.types.is_bool_dtype(values) or pd.api.types.is_datetime64_any_dtype(values) :
+            columns[column] = values
+        else :
+            columns[column] = to_compact_numeric(values)
+    return pd.DataFrame(columns, index=data.index)
+
+
+def memory_report(data : pd.DataFrame) -> pd.DataFrame :
+    """Memory used by each column of a dataframe
+
+    Args:
+        data (pd.DataFrame): The dataframe
+
+    Returns:
+        pd.DataFrame: DataFrame with the dtype and the memory (bytes, deep) of each column, sorted by memory
+    """
+    report = pd.DataFrame({
+        "dtype" : data.dtypes.astype(str),
+        "bytes" : data.memory_usage(index=False, deep=True),
+    })
+    return report.sort_values(by="bytes", ascending=False)
+
+
+def read_and_create_dataframe(collection, batch_size : int = DEFAULT_BATCH_SIZE, query : dict = None, projection : list = None) -> pd.DataFrame :
     """Read a collection with League of Legends JSON data and create the associated dataframe
     Each row correspond to (match,participant) key.
 
     Args:
         collection (_type_): Mongo collection
+        batch_size (int, optional): Number of documents fetched per cursor batch. Defaults to DEFAULT_BATCH_SIZE.
+        query (dict, optional): Mongo query, built with the filter_data_* functions. Defaults to None for all the games.
+        projection (list, optional): Fields to retrieve (for example SCRIM_PROJECTION). Defaults to None for all the fields.
 
     Returns:
         pd.DataFrame: DataFrame of the JSON data
     """
-    df = pd.DataFrame()
-    for game in collection.find() :
-        df = pd.concat([df,pd.json_normalize(game)])
-    df = df.explode('participants').reset_index(drop=True)
-    df_participants = pd.json_normalize(df['participants'])
-    df = pd.concat([df.drop(columns='participants'),df_participants],axis = 1)
-    df['VISION_WARDS_BOUGHT_IN_GAME'] = df['VISION_WARDS_BOUGHT_IN_GAME'].fillna(0).astype('int')
-    df['datetime'] = pd.to_datetime(df['jsonFileName'].apply(lambda x : x.split('_')[0]), format='%d%m%Y')
-    return df
+    mongo_projection = {field : 1 for field in projection} if projection else None
+    games = list(collection.find(query or {}, mongo_projection, batch_size=batch_size))
+    if not games and projection :
+        # Keep the expected columns so the pages can still filter an empty result
+        columns = [field.removeprefix("participants.") for field in projection]
+        return pd.DataFrame(columns=list(dict.fromkeys(columns + ["VISION_WARDS_BOUGHT_IN_GAME", "datetime"])))
+    return create_participants_dataframe(games)
 
 
 # %%
@@ -84,6 +298,80 @@ def read_and_create_dataframe(collection) -> pd.DataFrame :
 
 
 # %%
+def build_team_index(team_dict : dict) -> dict :
+    """Flatten a team PUUID dictionnary into a PUUID -> (role, roster slot) hash map
+
+    Args:
+        team_dict (dict): Dictionnary containing PUUID. Example = {"TOP" : ["9df5d86"], "JUNGLE" : ..., "JUNGLE_2" : ...}
+
+    Returns:
+        dict: Dictionnary PUUID -> (role, slot), where role is the key of team_dict (JUNGLE_2...) and slot the position of the PUUID in its list
+    """
+    team_index = {}
+    for role, puuids in team_dict.items() :
+        for slot, puuid in enumerate(puuids) :
+            team_index.setdefault(puuid, (role, slot))
+    return team_index
+
+
+def get_roster_version(team_dict : dict) -> str :
+    """Version of a team PUUID dictionnary : it changes when a player is added, removed or moved to another role
+
+    Args:
+        team_dict (dict): Dictionnary containing PUUID. Example = {"TOP" : ["9df5d86"], "JUNGLE" : ...}
+
+    Returns:
+        str: Short hash of the dictionnary
+    """
+    return hashlib.sha256(json.dumps(team_dict, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def add_team_membership(data : pd.DataFrame, team_dict : dict) -> pd.DataFrame :
+    """Resolve once which participants belong to the team. Add the columns :
+        * IS_ALLY : True if the PUUID is in team_dict
+        * ALLY_ROLE : The key of team_dict containing the PUUID (JUNGLE, JUNGLE_2...), NaN for enemies
+    The roster version of team_dict is kept in data.attrs["roster_version"], so get_team_mask only reuses IS_ALLY for the same dictionnary.
+
+    Args:
+        data (pd.DataFrame): Input data
+        team_dict (dict): Dictionnary containing PUUID. Example = {"TOP" : ["9df5d86"], "JUNGLE" : ...}
+
+    Returns:
+        pd.DataFrame: The data with the membership columns
+    """
+    if "PUUID" not in data.columns :
+        data = data.assign(IS_ALLY=pd.Series(dtype=bool), ALLY_ROLE=pd.Series(dtype="category"))
+    else :
+        puuid_to_role = {puuid : role for puuid, (role, slot) in build_team_index(team_dict).items()}
+        # On a categorical column the map is only computed on the categories
+        ally_role = data["PUUID"].map(puuid_to_role).astype("category")
+        data = data.assign(IS_ALLY=ally_role.notna().astype(bool), ALLY_ROLE=ally_role)
+    data.attrs["roster_version"] = get_roster_version(team_dict)
+    return data
+
+
+def get_team_mask(data : pd.DataFrame, team_dict : dict) -> pd.Series :
+    """Boolean mask of the rows of the team players. The IS_ALLY column is only used when it was computed
+    from the same team_dict (see add_team_membership), otherwise the mask is computed from the PUUID.
+
+    Args:
+        data (pd.DataFrame): Input data
+        team_dict (dict): Dictionnary containing PUUID. Example = {"TOP" : ["9df5d86"], "JUNGLE" : ...}
+
+    Returns:
+        pd.Series: The mask
+    """
+    if "IS_ALLY" in data.columns and data.attrs.get("roster_version") == get_roster_version(team_dict) :
+        return data["IS_ALLY"].astype(bool)
+    team_puuids = list(build_team_index(team_dict))
+    puuids = data["PUUID"]
+    if isinstance(puuids.dtype, pd.CategoricalDtype) :
+        # The membership is computed on the categories, the missing PUUID (code -1) are not in the team
+        is_ally = np.append(puuids.cat.categories.isin(team_puuids), False)
+        return pd.Series(is_ally[puuids.cat.codes.to_numpy()], index=data.index, name="PUUID")
+    return puuids.isin(team_puuids)
+
+
 def filter_data_on_team(data : pd.DataFrame,team_dict : dict, enemies : bool = False) -> pd.DataFrame :
     """Filter data based on a team PUUID dictionnary
 
@@ -97,9 +385,9 @@ def filter_data_on_team(data : pd.DataFrame,team_dict : dict, enemies : bool = F
     """
     try :
         if enemies : 
-            return data.loc[~data['PUUID'].apply(lambda puuid: any(puuid in sublist for sublist in team_dict.values()))]
+            return data.loc[~get_team_mask(data, team_dict)]
         else :
-            return data.loc[data['PUUID'].apply(lambda puuid: any(puuid in sublist for sublist in team_dict.values()))]
+            return data.loc[get_team_mask(data, team_dict)]
     except KeyError :
         warnings.warn("Filter_data_on_team : KeyError, maybe caused by filtering on empty data")
         return pd.DataFrame(columns=data.columns)
@@ -108,21 +396,56 @@ def filter_data_on_team(data : pd.DataFrame,team_dict : dict, enemies : bool = F
 # print(data_scrim_matches.shape)
 # print(filter_data_on_team(data_scrim_matches,team_dict=st.secrets["TEAM_SCRIM_ID"],enemies=False).iloc[5]['RIOT_ID_GAME_NAME'])
 
+def add_query_clause(query : dict, clause : dict) -> dict :
+    """Combine a Mongo query with a new clause (logical AND), without modifying the input query
+
+    Args:
+        query (dict): The Mongo query
+        clause (dict): The clause to add
+
+    Returns:
+        dict: The new Mongo query
+    """
+    if not query :
+        return clause
+    if list(query.keys()) == ["$and"] :
+        return {"$and" : query["$and"] + [clause]}
+    return {"$and" : [query, clause]}
+
+
 def filter_data_official_matches(data : pd.DataFrame, list_etape : list = []) ->pd.DataFrame :
     """Filter data on the selected official matches (list of nexus tour steps)
 
     Args:
-        data (pd.DataFrame): Input data
+        data (pd.DataFrame): Input data, or a Mongo query (dict) to push the filter down to the database
         list_etape (list): A list containing the official match steps (for example : [0,1,2,3,...])
 
     Returns:
-        pd.DataFrame: The filtered Data
+        pd.DataFrame: The filtered Data (or the Mongo query with the filter)
     """
     if list_etape == [] :
         return data
+    if isinstance(data, dict) :
+        return add_query_clause(data, {"officialMatch" : {"$in" : list(list_etape)}})
     return data.loc[data['officialMatch'].isin(list_etape)]
 
 def filter_data_date(data : pd.DataFrame, start_date : datetime.date , end_date : datetime.date) -> pd.DataFrame :
+    """Filter data between two dates (included)
+
+    Args:
+        data (pd.DataFrame): Input data, or a Mongo query (dict) to push the filter down to the database
+        start_date (datetime.date): First day
+        end_date (datetime.date): Last day
+
+    Returns:
+        pd.DataFrame: The filtered data (or the Mongo query with the filter)
+    """
+    if isinstance(data, dict) :
+        # datetime is added at ingest (see normalize_game_document) and indexed, older games get it from mongo_indexes.backfill_game_dates
+        return add_query_clause(data, {"datetime" : {
+            "$gte" : datetime.combine(start_date, datetime.min.time()),
+            "$lte" : datetime.combine(end_date, datetime.min.time()),
+        }})
 
     time_filtered_df = data.loc[(start_date <= data["datetime"].dt.date) & (data["datetime"].dt.date<= end_date)]
     if time_filtered_df.empty :
@@ -133,14 +456,16 @@ def filter_data_patch(data : pd.DataFrame, list_patch : list) -> pd.DataFrame :
     """Filter data on the selected patches
 
     Args:
-        data (pd.DataFrame): Input data
+        data (pd.DataFrame): Input data, or a Mongo query (dict) to push the filter down to the database
         list_patch (list): A list of patch version
 
     Returns:
-        pd.DataFrame: The filtered data
+        pd.DataFrame: The filtered data (or the Mongo query with the filter)
     """
     if list_patch == [] :
         return data
+    if isinstance(data, dict) :
+        return add_query_clause(data, {"patchVersion" : {"$in" : list(list_patch)}})
     return data.loc[data["patchVersion"].isin(list_patch)]
 
 
@@ -148,40 +473,44 @@ def filter_data_enemy_team(data : pd.DataFrame, list_team_name : list) -> pd.Dat
     """Filter data on the selected teams opponents (to retrieve only matches against these teams)
 
     Args:
-        data (pd.DataFrame): Input data
+        data (pd.DataFrame): Input data, or a Mongo query (dict) to push the filter down to the database
         list_team_name (list): A list of team names
 
     Returns:
-        pd.DataFrame: The filtered data
+        pd.DataFrame: The filtered data (or the Mongo query with the filter)
     """
     if list_team_name == [] :
         return data
+    if isinstance(data, dict) :
+        return add_query_clause(data, {"enemyTeamName" : {"$in" : list(list_team_name)}})
     return data.loc[data["enemyTeamName"].isin(list_team_name)]
 
 def filter_data_typeGame(data : pd.DataFrame, list_type_game : list) -> pd.DataFrame :
     """Filter data on the selected type of game
 
     Args:
-        data (pd.DataFrame): Input data
+        data (pd.DataFrame): Input data, or a Mongo query (dict) to push the filter down to the database
         list_type_game (list): A list of type of games
 
     Returns:
-        pd.DataFrame: The filtered data
+        pd.DataFrame: The filtered data (or the Mongo query with the filter)
     """
     if list_type_game == [] :
         return data
+    if isinstance(data, dict) :
+        return add_query_clause(data, {"gameType" : {"$in" : list(list_type_game)}})
     return data.loc[data["gameType"].isin(list_type_game)]
 
 def filter_data_team_side(data : pd.DataFrame, team_side : list, team_dict : dict) -> pd.DataFrame :
     """Filter data on the ally team side.
 
     Args:
-        data (pd.DataFrame): The input data
+        data (pd.DataFrame): The input data, or a Mongo query (dict) to push the filter down to the database
         team_side (list): The side selected example : ["Blue","Red"]
         team_dict (dict): Dictionnary containing PUUID. Example = {"TOP" : ["9df5d86"], "JUNGLE" : ...}
 
     Returns:
-        pd.DataFrame: The filtered data
+        pd.DataFrame: The filtered data (or the Mongo query with the filter)
     """
     if team_side == [] :
         return data
@@ -191,10 +520,13 @@ def filter_data_team_side(data : pd.DataFrame, team_side : list, team_dict : dic
     }
 
     mapped_team_side = [team_side_mapping[side] for side in team_side if side in team_side_mapping]
-    team_data = filter_data_on_team(data,team_dict=team_dict)
-    team_side_data = team_data.loc[team_data["TEAM"].isin(mapped_team_side)]
+    if isinstance(data, dict) :
+        team_puuids = [puuid for puuids in team_dict.values() for puuid in puuids]
+        return add_query_clause(data, {"participants" : {"$elemMatch" : {"PUUID" : {"$in" : team_puuids}, "TEAM" : {"$in" : mapped_team_side}}}})
+
+    team_side_ids = data.loc[get_team_mask(data, team_dict) & data["TEAM"].isin(mapped_team_side), "_id"].unique()
 
-    return data.loc[data["_id"].isin(team_side_data["_id"].unique())]
+    return data.loc[data["_id"].isin(team_side_ids)]
 
 def get_mean_winrate(data : pd.DataFrame) -> float:
     """Get mean of winrate on global team data
@@ -205,7 +537,7 @@ def get_mean_winrate(data : pd.DataFrame) -> float:
     Returns:
         float: The mean winrate of the team
     """
-    return data.loc[(data['WIN']=='Win'),"WIN"].count() / len(data) * 100
+    return data.loc[to_boolean(data['WIN']),"WIN"].count() / len(data) * 100
 
 
 def get_mean_duration(data : pd.DataFrame) -> int :
@@ -230,87 +562,104 @@ def get_winrate_by_side(data : pd.DataFrame, chart = False) :
     Returns:
         _type_: Return dict of both winrate side
     """
-    winrate_blue = data.loc[(data['WIN']=='Win') & (data['TEAM']=='100'),'WIN'].count() / len(data.loc[data['TEAM']=='100']) * 100
-    winrate_red = data.loc[(data['WIN']=='Win') & (data['TEAM']=='200'),'WIN'].count() / len(data.loc[data['TEAM']=='200']) * 100
+    winrate_blue = data.loc[to_boolean(data['WIN']) & (data['TEAM']=='100'),'WIN'].count() / len(data.loc[data['TEAM']=='100']) * 100
+    winrate_red = data.loc[to_boolean(data['WIN']) & (data['TEAM']=='200'),'WIN'].count() / len(data.loc[data['TEAM']=='200']) * 100
     winrate_blue = round(float(winrate_blue),2)
     winrate_red = round(float(winrate_red),2)
 
     if chart : 
-        fig = plty.bar(x=['Blue','Red'], y=[winrate_blue,winrate_red], labels={"x" : "Side", "y" : "Winrate (%)"}, text_auto=True)
-        fig.update_layout(margin=dict(l=5, r=5, t=5, b=5))
-        fig.update_traces(marker_color=['#215FAB', '#AB2821'])
-        return fig
+        import charts
+        return charts.winrate_by_side_chart(winrate_blue, winrate_red)
     return {"blue" : winrate_blue , "red" : winrate_red}
 
 
-def get_winrate_by_side_every_two_weeks(data : pd.DataFrame, chart = False) :
-    """Function to have the winrate by side every to weeks. Teh chart also containg global winrate.
+def get_winrate_by_side_over_time(data : pd.DataFrame, window = 2, chart = False) :
+    """Function to have the winrate by side over time. The chart also contains global winrate.
 
     Args:
         data (pd.DataFrame): The filtered dataframe from team's data
+        window (int or str, optional): Number of weeks of a period (1 for weekly, 2 for every two weeks...),
+            or "<N> games" for a rolling winrate over the last N games. Defaults to 2.
         chart (bool, optional): Chose to display chart or not. Defaults to False.
 
     Returns:
-        A pandas DataFrame or a plolty chart.
+        A pandas DataFrame (Week or Game, Blue, Red, Global, Games) or a plolty chart.
     """
-    # retrive date_time regexpour clear numero de game tranformen format bien puis boucler dessus
-    data = data.copy()
-    data['formatted_date'] = data['jsonFileName'].apply(lambda x: datetime.strptime(x.split("_")[0], "%d%m%Y").strftime("%d-%m-%Y"))
-    data['week_of_the_year'] = data['formatted_date'].apply(lambda x: datetime.strptime(x, "%d-%m-%Y").isocalendar()[1])
-
-    data['paired_week'] = data['week_of_the_year'].apply(lambda x: x + 1 if x % 2 != 0 else x)
-    #print("Semaines disponibles dans data :", data['week_of_the_year'].unique())
-    winrate_blue = (
-        data.loc[(data['WIN'] == 'Win') & (data['TEAM'] == '100')]
-        .groupby('paired_week')['WIN'].count() /
-        data.loc[data['TEAM'] == '100'].groupby('paired_week')['WIN'].count() * 100
-    ).rename("Blue")
-
-    winrate_red = (
-        data.loc[(data['WIN'] == 'Win') & (data['TEAM'] == '200')]
-        .groupby('paired_week')['WIN'].count() /
-        data.loc[data['TEAM'] == '200'].groupby('paired_week')['WIN'].count() * 100
-    ).rename("Red")
-
-    winrate_global = (
-        data.loc[(data['WIN'] == 'Win')]
-        .groupby('paired_week')['WIN'].count() /
-        data.groupby('paired_week')['WIN'].count() * 100
-    )
-
-    count_game = data.drop_duplicates(subset="_id",keep="last").groupby(['paired_week'])['WIN'].count()
-
-    df_winrate = pd.concat([winrate_blue, winrate_red], axis=1).reset_index()
-    df_winrate.rename(columns={"paired_week": "Week"}, inplace=True)
-    df_winrate_long = df_winrate.melt(id_vars=["Week"], var_name="Side", value_name="Winrate (%)").fillna(0)
+    if isinstance(window, str) :
+        df_winrate = winrate_series.get_rolling_winrate(data, int(window.split()[0])).reset_index()
+        x_column = "Game"
+    else :
+        df_winrate = winrate_series.get_period_winrate(data, window).reset_index()
+        x_column = "Week"
 
     if chart:
-        color_discrete_map = {"Blue" : "blue", "Red" : "red"}
-        fig = plotly.subplots.make_subplots(specs=[[{"secondary_y": True}]])
-        for side, color in color_discrete_map.items():
-            fig.add_trace(go.Scatter(
-                x=df_winrate_long[df_winrate_long["Side"] == side]["Week"],
-                y=df_winrate_long[df_winrate_long["Side"] == side]["Winrate (%)"],
-                mode="lines",
-                name=side,
-                line=dict(color=color),
-                zorder=2
-            ))
-        fig.update_layout(yaxis_range=[0, 100])
-        fig.add_trace(go.Scatter(x=winrate_global.index,y=winrate_global.values,mode="lines",name="Global",line=dict(color="purple"),zorder=2))
-        fig.add_trace(go.Bar(x=count_game.index, y=count_game.values, name="Number of games", marker_color='rgb(122, 115, 113)',opacity=0.6, zorder=1),secondary_y=True)
-        fig.update_yaxes(title_text='Winrate by side (%)')
-        fig.update_yaxes(title_text='Number of games', secondary_y=True)
-
-        return fig
+        import charts
+        return charts.winrate_over_time_chart(df_winrate, x_column)
     return df_winrate
 
 
+def get_winrate_by_side_every_two_weeks(data : pd.DataFrame, chart = False) :
+    """Function to have the winrate by side every to weeks. Teh chart also containg global winrate.
+
+    Args:
+        data (pd.DataFrame): The filtered dataframe from team's data
+        chart (bool, optional): Chose to display chart or not. Defaults to False.
+
+    Returns:
+        A pandas DataFrame or a plolty chart.
+    """
+    if chart :
+        return get_winrate_by_side_over_time(data, 2, chart=True)
+    return get_winrate_by_side_over_time(data, 2)[["Week", "Blue", "Red"]]
+
+
 # %%
 # get_winrate_by_side(scl, chart=True)
 
 
 # %%
+def aggregate_role_champions(data : pd.DataFrame, by : list = None, stats : dict = None) -> pd.DataFrame :
+    """Aggregate every per-role statistic in a single groupby (by default on (TRUE_POSITION, SKIN)). Use this with filtered data.
+
+    Args:
+        data (pd.DataFrame): The filtered DataFrame
+        by (list, optional): Grouping columns. Defaults to None for ["TRUE_POSITION", "SKIN"].
+        stats (dict, optional): Added statistics, name -> (column, aggfunc). Example = {"GOLD" : ("GOLD_EARNED", "mean")}. Defaults to None.
+
+    Returns:
+        pd.DataFrame: DataFrame indexed by `by` with the columns :
+            * GAMES, WINS, WINRATE : Number of games, of wins and winrate (%)
+            * KDA_GAMES, KDA : Number of games with a KDA and mean KDA
+            * PINKS, PINKS_MEDIAN : Mean and median number of pink bought
+            * The added statistics
+    """
+    by = list(by) if by else ["TRUE_POSITION", "SKIN"]
+    stats = stats or {}
+    prepared = data[by].assign(
+        GAME=data["WIN"].notna(),
+        WIN=to_boolean(data["WIN"]),
+        kda=get_kda(data),
+        PINKS=pd.to_numeric(data["VISION_WARDS_BOUGHT_IN_GAME"], errors="coerce"),
+        **{name : pd.to_numeric(data[column], errors="coerce") for name, (column, aggfunc) in stats.items()},
+    )
+    aggregated = prepared.groupby(by, observed=True).agg(
+        GAMES=("GAME", "sum"),
+        WINS=("WIN", "sum"),
+        KDA_GAMES=("kda", "count"),
+        KDA=("kda", "mean"),
+        PINKS=("PINKS", "mean"),
+        PINKS_MEDIAN=("PINKS", "median"),
+        **{name : (name, aggfunc) for name, (column, aggfunc) in stats.items()},
+    )
+    aggregated.insert(2, "WINRATE", aggregated["WINS"] / aggregated["GAMES"] * 100)
+    return aggregated
+
+
+def get_position_rows(aggregated : pd.DataFrame, position : str) -> pd.DataFrame :
+    """Rows of one position of aggregate_role_champions, indexed by champion"""
+    return aggregated.loc[aggregated.index.get_level_values("TRUE_POSITION") == position].droplevel("TRUE_POSITION")
+
+
 def table_winrate_champs(data : pd.DataFrame) :
     """Retrieve and groupby champion from the dataFrame and get number of game and number of win (+winrate). Use this with filtered data.
 
@@ -321,15 +670,12 @@ def table_winrate_champs(data : pd.DataFrame) :
         list : List from TOP to SUPPORT champions game and winrate
     """
     positions = ["TOP","JUNGLE","MIDDLE","BOTTOM","UTILITY"]
+    aggregated = aggregate_role_champions(data)
     top_to_bot_champs = []
     for position in positions :
-
-        all = data.loc[data['TRUE_POSITION'] == position].groupby("SKIN")['WIN'].count()
-        win = data.loc[(data['TRUE_POSITION'] == position) & (data['WIN'] == 'Win')].groupby("SKIN")['WIN'].count()
-
-        df_player = pd.DataFrame(data= {'Count' : all,'Win' : win}).fillna(0)
-        df_player = df_player.astype({'Win' : int})
-        df_player['Winrate (%)'] = ((df_player['Win'] / df_player['Count']) * 100).round(2)
+        position_rows = get_position_rows(aggregated, position)
+        df_player = pd.DataFrame(data= {'Count' : position_rows['GAMES'],'Win' : position_rows['WINS'].astype(int)})
+        df_player['Winrate (%)'] = position_rows['WINRATE'].round(2)
         df_player.sort_values(by='Count',ascending=False,inplace=True)
         df_player.index = df_player.index.map(utils.get_champion_image_from_id)
         df_player = df_player.style.format({'Winrate (%)': '{:.2f}'}).background_gradient(subset=['Winrate (%)'], cmap='RdYlGn', vmin=0, vmax=100)
@@ -354,18 +700,53 @@ def get_nb_pink_bought(data : pd.DataFrame, chart=False) -> list :
     """
     
     positions = ["TOP","JUNGLE","MIDDLE","BOTTOM","UTILITY"]
-    top_to_bot_pink_median = []
-
-    for position in positions :
-        top_to_bot_pink_median.append(data.loc[data['TRUE_POSITION'] == position, 'VISION_WARDS_BOUGHT_IN_GAME'].median())
+    # The median is not computed from the per-champion rows, the engine is grouped on the position only
+    pink_median = aggregate_role_champions(data, by=["TRUE_POSITION"])["PINKS_MEDIAN"]
+    top_to_bot_pink_median = [pink_median.get(position, np.nan) for position in positions]
     
     if chart :
-        fig = plty.bar(x=positions, y=top_to_bot_pink_median, labels={"x" : "Positions", "y" : "Median nb of pink"})
-        fig.update_traces(marker_color='#f2214a',marker_line_color='black', marker_line_width=1.5)
-        return fig
+        import charts
+        return charts.pink_bought_chart(positions, top_to_bot_pink_median)
     return top_to_bot_pink_median
 
 
+# Resources shared by a team : name -> stats summed for each player
+RESOURCE_STATS = {
+    "GOLD" : ["GOLD_EARNED"],
+    "DAMAGE" : ["TOTAL_DAMAGE_DEALT_TO_CHAMPIONS"],
+    "VISION" : ["VISION_SCORE"],
+    "CS" : ["MINIONS_KILLED", "NEUTRAL_MINIONS_KILLED"],
+}
+
+
+def get_resource_share(data : pd.DataFrame, resources : list = None) -> pd.DataFrame :
+    """Compute the share of each player in the team total of each resource (gold, damage, vision, CS...).
+    The team totals of every resource are computed in one grouped pass over (game, team).
+
+    Args:
+        data (pd.DataFrame): The data, one row per (match,participant)
+        resources (list, optional): Keys of RESOURCE_STATS. Defaults to None for all the resources.
+
+    Returns:
+        pd.DataFrame: Tidy DataFrame with one row per (match,participant,resource) and the columns :
+            _id, TEAM, TRUE_POSITION, WIN, RESOURCE, VALUE, TEAM_TOTAL, SHARE
+    """
+    resources = list(RESOURCE_STATS) if resources is None else resources
+    values = pd.DataFrame({
+        resource : data[RESOURCE_STATS[resource]].apply(pd.to_numeric, errors="coerce").sum(axis=1, min_count=len(RESOURCE_STATS[resource]))
+        for resource in resources
+    }, index=data.index)
+    team_totals = values.groupby([data["_id"], data["TEAM"]], observed=True, sort=False).transform("sum")
+    shares = values / team_totals
+
+    keys = data[["_id", "TEAM", "TRUE_POSITION", "WIN"]]
+    tidy = pd.concat([
+        keys.assign(RESOURCE=resource, VALUE=values[resource], TEAM_TOTAL=team_totals[resource], SHARE=shares[resource])
+        for resource in resources
+    ], ignore_index=True)
+    return tidy.astype({"RESOURCE" : pd.CategoricalDtype(resources)})
+
+
 def get_gold_percent(data : pd.DataFrame) -> pd.DataFrame:
     """Create a dataframe with the percentage of gold by player. Use this function with filtered data on a specific team.
     Drop NAN values to the returned dataframe.
@@ -379,29 +760,67 @@ def get_gold_percent(data : pd.DataFrame) -> pd.DataFrame:
             * Columns = %gold per role and if the game is won or not
     """
     true_position_list = ['TOP', 'JUNGLE', 'MIDDLE', 'BOTTOM', 'UTILITY']
+    gold_share = get_resource_share(data, ["GOLD"])
+    gold_share = gold_share.loc[gold_share["TRUE_POSITION"].isin(true_position_list)]
     unique_game_id = data["_id"].unique()
-    res_df = pd.DataFrame(columns=['TOP', 'JUNGLE', 'MIDDLE', 'BOTTOM', 'UTILITY','WIN'],index=unique_game_id)
-    for match_id in unique_game_id :
-        res_df.loc[ObjectId(match_id), "WIN"] = data.loc[data["_id"] == ObjectId(match_id), "WIN"].values[0]
-        for position_role in true_position_list:
-            gold_value = data.loc[(data["_id"] == ObjectId(match_id)) & (data["TRUE_POSITION"] == position_role), "GOLD_EARNED"].values
-            if gold_value.size <= 0 :
-                res_df.loc[ObjectId(match_id), position_role] = np.nan
-            else :
-                res_df.loc[ObjectId(match_id),position_role] = int(gold_value[0])
-                
-    res_df["SUM_GOLD"] = res_df.drop("WIN",axis=1).sum(axis=1)
-    for position_role in true_position_list:
-        res_df[position_role] = res_df[position_role] / res_df["SUM_GOLD"]
+
+    res_df = gold_share.pivot_table(index="_id", columns="TRUE_POSITION", values="SHARE", aggfunc="first", observed=True)
+    res_df = res_df.reindex(index=unique_game_id, columns=true_position_list).rename_axis(None)
+    res_df.columns = list(res_df.columns)
+    res_df["WIN"] = data.groupby("_id", sort=False)["WIN"].first().reindex(unique_game_id)
+    res_df["SUM_GOLD"] = gold_share.groupby("_id", sort=False)["TEAM_TOTAL"].first().reindex(unique_game_id)
     return res_df.dropna(axis=0)
 
 
+# Labels of the jungler toggle of the Champions_stats page -> key of TEAM_SCRIM_ID
+JUNGLER_FILTER_ROLES = {"Old Jungler" : "JUNGLE", "New Jungler" : "JUNGLE_2"}
+
+
+def get_roster_position(role : str) -> str :
+    """Position of a roster variant key of TEAM_SCRIM_ID (JUNGLE_2 -> JUNGLE, TOP_3 -> TOP, MIDDLE -> MIDDLE)"""
+    position, _, suffix = role.rpartition("_")
+    return position if position and suffix.isdigit() else role
+
+
+def get_roster_variants(team_dict : dict) -> dict :
+    """Group the keys of a team PUUID dictionnary by position
+
+    Args:
+        team_dict (dict): Dictionnary containing PUUID. Example = {"TOP" : [...], "JUNGLE" : [...], "JUNGLE_2" : [...]}
+
+    Returns:
+        dict: Dictionnary position -> list of roster variants. Example = {"TOP" : ["TOP"], "JUNGLE" : ["JUNGLE", "JUNGLE_2"]}
+    """
+    variants = {}
+    for role in team_dict :
+        variants.setdefault(get_roster_position(role), []).append(role)
+    return variants
+
+
+def filter_roster_variant(data : pd.DataFrame, roster : list, team_dict : dict) -> pd.DataFrame :
+    """Keep only the selected roster variants of the team. For each position of `roster`, the team rows played
+    at this position by a player who is not in the selected variants are removed. Enemies and other positions are kept.
+
+    Args:
+        data (pd.DataFrame): Input data
+        roster (list): Keys of team_dict to keep. Example = ["JUNGLE_2"] or ["JUNGLE", "TOP_2"]
+        team_dict (dict): Dictionnary containing PUUID. Example = {"TOP" : [...], "JUNGLE" : [...], "JUNGLE_2" : [...]}
+
+    Returns:
+        pd.DataFrame: The filtered DataFrame
+    """
+    positions = {get_roster_position(role) for role in roster}
+    kept_puuids = [puuid for role in roster for puuid in team_dict.get(role, [])]
+    removed = get_team_mask(data, team_dict) & data["TRUE_POSITION"].isin(list(positions)) & ~data["PUUID"].isin(kept_puuids)
+    return data.loc[~removed]
+
+
 def get_jungler_puuid(data: pd.DataFrame, jungler_filter: list = None, team_dict: dict = None) -> pd.DataFrame:
     """Get the jungler PUUID from the data.
 
     Args:
         data (pd.DataFrame): The filtered DataFrame.
-        jungler_filter (list): List of jungler PUUIDs to keep.
+        jungler_filter (list): Junglers to keep, labels of JUNGLER_FILTER_ROLES ("Old Jungler", "New Jungler") or keys of team_dict (JUNGLE_2...).
         team_dict (dict): Dictionary containing PUUIDs.
 
     Returns:
@@ -413,25 +832,8 @@ def get_jungler_puuid(data: pd.DataFrame, jungler_filter: list = None, team_dict
     if not jungler_filter or not team_dict:
         return data
 
-    puuids = []
-    if "Old Jungler" in jungler_filter:
-        puuids += st.secrets["TEAM_SCRIM_ID"]["JUNGLE"]
-    if "New Jungler" in jungler_filter:
-        puuids += st.secrets["TEAM_SCRIM_ID"]["JUNGLE_2"]
-
-    team_puuids = []
-    for v in team_dict.values():
-        team_puuids += v
-
-    def keep_row(row):
-        if row["TRUE_POSITION"] != "JUNGLE":  # If player is not jungler, return True
-            return True
-        if row["PUUID"] not in team_puuids:  # If PUUID is not in team, return True (enemy)
-            return True
-        return row["PUUID"] in puuids  # If jungler is ally, return PUUID
-
-    mask = data.apply(keep_row, axis=1)
-    filtered_data = data[mask]
+    roster = [JUNGLER_FILTER_ROLES.get(jungler, jungler) for jungler in jungler_filter]
+    filtered_data = filter_roster_variant(data, roster, team_dict)
 
     # Ensure column names are preserved if the result is empty
     return filtered_data if not filtered_data.empty else pd.DataFrame(columns=data.columns)
@@ -440,95 +842,190 @@ def get_jungler_puuid(data: pd.DataFrame, jungler_filter: list = None, team_dict
 
 
 # %%
-def calculate_matchup_winrate(data: pd.DataFrame, team_dict: dict, role: str, enemy_dict: dict = None, position_filter: str = None) -> pd.DataFrame:
+def build_matchup_cube(data: pd.DataFrame, team_dict: dict, enemy_dict: dict = None, position_filter: str = None) -> dict:
     """
-    Calculate the winrate of a specific role in matchups.
+    Compute the matchups of every role at once : (role, ally champion, enemy champion) -> games, wins and game ids.
 
     Args:
         data (pd.DataFrame): The DataFrame containing the match data.
         team_dict (dict): Dictionary mapping roles to player PUUIDs.
-        role (str): Role to analyze (e.g., "TOP", "JUNGLE").
-        chart (bool): Whether to display the result as a chart (currently not implemented).
-        enemy_dict (dict): Dictionnary mapping role to enemy PUUIDs.
+        enemy_dict (dict): Dictionnary mapping role to enemy PUUIDs. If None, every player of the role who is not in team_dict[role] is an opponent.
         position_filter (str): Optionally specify a position to filter the allies by (e.g., "TOP"). If None, no position filter is applied.
 
     Returns:
-        pd.DataFrame: A DataFrame containing winrates for each matchup.
+        dict: Dictionnary role -> {
+            "table" : DataFrame with ALLY_CHAMPION, ENEMY_CHAMPION, GAMES, WINS, Winrate (%) and GAME_IDS,
+            "enemies" : Dictionnary ally champion -> sorted enemy champions,
+            "details" : Dictionnary (ally champion, enemy champion) -> row of the table as a dict
+        }
     """
-    # Retrieve allied data for the specified position
-    if position_filter:
-        role_data = data[(data['PUUID'].isin(team_dict[role])) & (data['TRUE_POSITION'] == position_filter)][['_id', 'SKIN', 'WIN']]
-    else:
-        role_data = data[data['PUUID'].isin(team_dict[role])][['_id', 'SKIN', 'WIN']]
-
-    # Retrieve the direct opponents in the specified position
+    roles = [role for role in POSITIONS if role in team_dict]
+    puuids = data['PUUID'].astype(str)
+    positions = data['TRUE_POSITION'].astype(str)
+    # Games are joined on integer codes, hashing ObjectId is slow
+    game_codes, game_ids = pd.factorize(data['_id'])
+    data = data[['SKIN', 'WIN', 'TRUE_POSITION']].assign(_id=game_codes)
+
+    # Allied rows, one per (row, role of the player)
+    ally_roles = pd.DataFrame([(puuid, role) for role in roles for puuid in team_dict[role]], columns=['PUUID', 'ROLE'])
+    ally_mask = data['TRUE_POSITION'] == position_filter if position_filter else pd.Series(True, index=data.index)
+    role_data = data.loc[ally_mask, ['_id', 'SKIN', 'WIN']].assign(PUUID=puuids[ally_mask]).merge(ally_roles, on='PUUID')
+
+    # Direct opponents : players of the role in enemy_dict, or not in team_dict
+    player_roles = pd.MultiIndex.from_arrays([puuids, positions])
     if enemy_dict :
-        opponent_data = data[           
-            (data['TRUE_POSITION'] == role) & 
-            (data['PUUID'].isin(enemy_dict[role]))  # get the enemy team dict
-        ][['_id', 'SKIN']].rename(columns={'SKIN': 'ENEMY_CHAMPION'})
+        opponent_mask = player_roles.isin([(puuid, role) for role in roles for puuid in enemy_dict.get(role, [])])
     else :
-        opponent_data = data[
-            (data['TRUE_POSITION'] == role) & 
-            (~data['PUUID'].isin(team_dict[role]))  # Exclude allies
-        ][['_id', 'SKIN']].rename(columns={'SKIN': 'ENEMY_CHAMPION'})
-
+        opponent_mask = positions.isin(roles).to_numpy() & ~player_roles.isin([(puuid, role) for role in roles for puuid in team_dict[role]])
+    opponent_data = data.loc[opponent_mask, ['_id', 'SKIN']].assign(ROLE=positions[opponent_mask]).rename(columns={'SKIN': 'ENEMY_CHAMPION'})
 
-    # Merge on "_id"
-    merged_data = pd.merge(role_data, opponent_data, on='_id')
-
-    # Group : calculate the number of games played and the wins
-    matchup_stats = merged_data.groupby(['SKIN', 'ENEMY_CHAMPION']).agg(
+    merged_data = pd.merge(role_data, opponent_data, on=['_id', 'ROLE'])
+    groups = merged_data.groupby(['ROLE', 'SKIN', 'ENEMY_CHAMPION'], observed=True)
+    cube = groups.agg(
         GAMES=('WIN', 'count'),
-        WINS=('WIN', lambda x: (x == 'Win').sum())  # Count the wins
+        WINS=('WIN', 'sum'),
     ).reset_index()
+    # Game ids of each matchup : the rows are sorted by group then split, instead of a Python call per group
+    group_numbers = groups.ngroup().to_numpy()
+    order = np.argsort(group_numbers, kind='stable')
+    group_sizes = np.bincount(group_numbers, minlength=len(cube))
+    sorted_ids = np.asarray(game_ids, dtype=object)[merged_data['_id'].to_numpy()[order]]
+    cube['GAME_IDS'] = pd.Series(np.split(sorted_ids, np.cumsum(group_sizes)[:-1])[:len(cube)], index=cube.index, dtype=object)
+    cube['Winrate (%)'] = (cube['WINS'] / cube['GAMES']) * 100
+    cube = cube.rename({"SKIN": "ALLY_CHAMPION"}, axis=1)[['ROLE', 'ALLY_CHAMPION', 'ENEMY_CHAMPION', 'GAMES', 'WINS', 'Winrate (%)', 'GAME_IDS']]
+
+    matchups = {}
+    for role in roles :
+        table = cube.loc[cube['ROLE'] == role].drop(columns='ROLE').reset_index(drop=True)
+        enemies = table.groupby('ALLY_CHAMPION', observed=True)['ENEMY_CHAMPION'].agg(lambda champions : sorted(champions.astype(str))).to_dict()
+        details = {(str(row['ALLY_CHAMPION']), str(row['ENEMY_CHAMPION'])) : row for row in table.to_dict('records')}
+        matchups[role] = {"table" : table, "enemies" : enemies, "details" : details}
+    return matchups
+
+
+def calculate_matchup_winrate(data: pd.DataFrame, team_dict: dict, role: str, enemy_dict: dict = None, position_filter: str = None, matchup_cube: dict = None) -> pd.DataFrame:
+    """
+    Calculate the winrate of a specific role in matchups.
+
+    Args:
+        data (pd.DataFrame): The DataFrame containing the match data.
+        team_dict (dict): Dictionary mapping roles to player PUUIDs.
+        role (str): Role to analyze (e.g., "TOP", "JUNGLE").
+        enemy_dict (dict): Dictionnary mapping role to enemy PUUIDs.
+        position_filter (str): Optionally specify a position to filter the allies by (e.g., "TOP"). If None, no position filter is applied.
+        matchup_cube (dict): Result of build_matchup_cube, computed from the other arguments if None.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing winrates for each matchup.
+    """
+    if matchup_cube is None :
+        matchup_cube = build_matchup_cube(data, team_dict, enemy_dict=enemy_dict, position_filter=position_filter)
+    empty_table = pd.DataFrame(columns=['ALLY_CHAMPION', 'ENEMY_CHAMPION', 'GAMES', 'WINS', 'Winrate (%)', 'GAME_IDS'])
+    matchup_stats = matchup_cube.get(role, {"table" : empty_table})["table"].drop(columns='GAME_IDS')
 
-    # Winrate
-    matchup_stats['Winrate (%)'] = (matchup_stats['WINS'] / matchup_stats['GAMES']) * 100
-    matchup_stats.rename({"SKIN": "ALLY_CHAMPION"},axis=1,inplace=True)
     # Sort ny number of games played
     matchup_stats = matchup_stats.sort_values(by='GAMES', ascending=False)
     matchup_stats_style = matchup_stats.style.background_gradient(subset=['Winrate (%)'], cmap='RdYlGn', vmin=0, vmax=100)
 
-    # display(matchup_stats) 
-
     return matchup_stats , matchup_stats_style
 
 
 
 
-def calculate_duo_winrate(filtered_data: pd.DataFrame, roles: tuple = ("MIDDLE", "JUNGLE")) -> pd.DataFrame:
+DUO_SIDES = ["ally", "enemy"]
+
+
+def build_duo_table(data: pd.DataFrame, team_dict: dict = None) -> pd.DataFrame:
+    """
+    Calculate games and wins of every champion duo for the 10 pairs of roles, for the team and for its opponents.
+    The champions of each (game, side) are placed in a (game, side, position) array and every pair of positions is read at once.
+
+    Args:
+        data (pd.DataFrame): The DataFrame containing the match data.
+        team_dict (dict): Dictionnary containing the team PUUID. If None, the data is already filtered on the team and every row is on the "ally" side.
+
+    Returns:
+        pd.DataFrame: A DataFrame with SIDE, ROLE_1, ROLE_2, CHAMPION_1, CHAMPION_2, GAMES and WINS, ROLE_1 is before ROLE_2 in POSITIONS.
+    """
+    pairs = [(first, second) for first in range(len(POSITIONS)) for second in range(first + 1, len(POSITIONS))]
+    first_positions, second_positions = np.array(pairs).T
+
+    rows = data.loc[data['SKIN'].notna() & data['WIN'].notna()]
+    side_codes = np.zeros(len(rows), dtype=int) if team_dict is None else (~get_team_mask(rows, team_dict)).to_numpy().astype(int)
+    position_codes = pd.Categorical(rows['TRUE_POSITION'].astype(str), categories=POSITIONS).codes
+    is_known = position_codes >= 0
+    rows, side_codes, position_codes = rows.loc[is_known], side_codes[is_known], position_codes[is_known]
+    skins = pd.Categorical(rows['SKIN'].astype(str))
+    game_codes = pd.factorize(rows['_id'])[0]
+    nb_games = game_codes.max() + 1 if len(game_codes) else 0
+
+    champions = np.full((nb_games, len(DUO_SIDES), len(POSITIONS)), -1)
+    champions[game_codes, side_codes, position_codes] = skins.codes
+    # Win of the first role of the pair, as in a merge of the two roles
+    wins = np.zeros((nb_games, len(DUO_SIDES), len(POSITIONS)), dtype=bool)
+    wins[game_codes, side_codes, position_codes] = to_boolean(rows['WIN']).to_numpy()
+
+    first_champions, second_champions = champions[:, :, first_positions], champions[:, :, second_positions]
+    pair_numbers = np.broadcast_to(np.arange(len(pairs)), first_champions.shape)
+    side_numbers = np.broadcast_to(np.arange(len(DUO_SIDES))[None, :, None], first_champions.shape)
+    is_duo = (first_champions >= 0) & (second_champions >= 0)
+    duos = pd.DataFrame({
+        'SIDE': side_numbers[is_duo],
+        'PAIR': pair_numbers[is_duo],
+        'CHAMPION_1': first_champions[is_duo],
+        'CHAMPION_2': second_champions[is_duo],
+        'WIN': wins[:, :, first_positions][is_duo],
+    })
+
+    duo_table = duos.groupby(['SIDE', 'PAIR', 'CHAMPION_1', 'CHAMPION_2']).agg(
+        GAMES=('WIN', 'count'),
+        WINS=('WIN', 'sum')
+    ).reset_index()
+    champion_names = np.asarray(skins.categories, dtype=object)
+    return pd.DataFrame({
+        'SIDE': pd.Categorical.from_codes(duo_table['SIDE'], categories=DUO_SIDES),
+        'ROLE_1': pd.Categorical.from_codes(first_positions[duo_table['PAIR']], categories=POSITIONS),
+        'ROLE_2': pd.Categorical.from_codes(second_positions[duo_table['PAIR']], categories=POSITIONS),
+        'CHAMPION_1': champion_names[duo_table['CHAMPION_1']],
+        'CHAMPION_2': champion_names[duo_table['CHAMPION_2']],
+        'GAMES': duo_table['GAMES'],
+        'WINS': duo_table['WINS'],
+    })
+
+
+def calculate_duo_winrate(filtered_data: pd.DataFrame, roles: tuple = ("MIDDLE", "JUNGLE"), duo_table: pd.DataFrame = None, side: str = "ally") -> pd.DataFrame:
     """
     Calculate winrate for champion duos in specified roles using pre-filtered data.
 
     Args:
         filtered_data (pd.DataFrame): The DataFrame already filtered for the team's matches.
         roles (tuple): Roles to analyze (e.g., ("MIDDLE", "JUNGLE")).
+        duo_table (pd.DataFrame): Result of build_duo_table, computed from filtered_data if None.
+        side (str): Side of the duos in duo_table ("ally" or "enemy").
 
     Returns:
         pd.DataFrame: A DataFrame containing winrates for each duo.
     """
-    # Extract the data for each role
-    role1_data = filtered_data[filtered_data['TRUE_POSITION'] == roles[0]][['_id', 'SKIN', 'WIN']].rename(
-        columns={'SKIN': f"{roles[0]}_CHAMPION"}
-    )
-    role2_data = filtered_data[filtered_data['TRUE_POSITION'] == roles[1]][['_id', 'SKIN']].rename(
-        columns={'SKIN': f"{roles[1]}_CHAMPION"}
-    )
-
-    # Merge the two roles' data on '_id' (mongo attribute)
-    duo_data = pd.merge(role1_data, role2_data, on="_id")
-
-    # Group by the duo of champions and calculate stats
-    duo_stats = duo_data.groupby([f"{roles[0]}_CHAMPION", f"{roles[1]}_CHAMPION"]).agg(
-        GAMES=('WIN', 'count'),
-        WINS=('WIN', lambda x: (x == 'Win').sum())  # Count the wins
-    ).reset_index()
+    if duo_table is None :
+        duo_table = build_duo_table(filtered_data)
+
+    # The table only contains the pairs in the POSITIONS order, the columns are swapped for the other order
+    first, second = roles[0], roles[1]
+    is_swapped = POSITIONS.index(first) > POSITIONS.index(second)
+    pair_role_1, pair_role_2 = (second, first) if is_swapped else (first, second)
+    duo_rows = duo_table.loc[(duo_table['SIDE'] == side) & (duo_table['ROLE_1'] == pair_role_1) & (duo_table['ROLE_2'] == pair_role_2)]
+    champion_columns = ['CHAMPION_2', 'CHAMPION_1'] if is_swapped else ['CHAMPION_1', 'CHAMPION_2']
+    duo_stats = pd.DataFrame({
+        f"{first}_CHAMPION": duo_rows[champion_columns[0]],
+        f"{second}_CHAMPION": duo_rows[champion_columns[1]],
+        'GAMES': duo_rows['GAMES'],
+        'WINS': duo_rows['WINS'],
+    }).sort_values([f"{first}_CHAMPION", f"{second}_CHAMPION"]).reset_index(drop=True)
 
     # Calculate the winrate
     duo_stats['Winrate (%)'] = (duo_stats['WINS'] / duo_stats['GAMES']) * 100
-    duo_stats[f"{roles[0]}_CHAMPION"] = duo_stats[f"{roles[0]}_CHAMPION"].map(utils.get_champion_image_from_id)
-    duo_stats[f"{roles[1]}_CHAMPION"] = duo_stats[f"{roles[1]}_CHAMPION"].map(utils.get_champion_image_from_id)
+    duo_stats[f"{first}_CHAMPION"] = duo_stats[f"{first}_CHAMPION"].map(utils.get_champion_image_from_id)
+    duo_stats[f"{second}_CHAMPION"] = duo_stats[f"{second}_CHAMPION"].map(utils.get_champion_image_from_id)
     # Sort by the number of games played
     duo_stats = duo_stats.sort_values(by='GAMES', ascending=False)
     duo_stats = duo_stats.style.format({'Winrate (%)': '{:.2f}'}).background_gradient(subset=['Winrate (%)'], cmap='RdYlGn', vmin=0, vmax=100)
@@ -539,6 +1036,21 @@ def calculate_duo_winrate(filtered_data: pd.DataFrame, roles: tuple = ("MIDDLE",
 
 
 ## KDA calcul
+def get_kda(data : pd.DataFrame) -> pd.Series :
+    """KDA of each row : (kills + assists) / max(deaths, 1). The KDA stored at ingest is used when every row has it.
+
+    Args:
+        data (pd.DataFrame): The data, one row per (match,participant)
+
+    Returns:
+        pd.Series: The KDA, NaN when a stat is missing
+    """
+    if "KDA" in data.columns and data["KDA"].notna().all() :
+        return data["KDA"].astype(float)
+    kills, deaths, assists = (pd.to_numeric(data[column], errors="coerce") for column in ["CHAMPIONS_KILLED", "NUM_DEATHS", "ASSISTS"])
+    return (kills + assists) / deaths.replace(0,1)
+
+
 def compute_kda_team(filtered_data : pd.DataFrame, chart : bool =False) -> pd.DataFrame :
     """Get the KDA for a team for each game
 
@@ -549,27 +1061,12 @@ def compute_kda_team(filtered_data : pd.DataFrame, chart : bool =False) -> pd.Da
     Returns:
         pd.DataFrame: The KDA pivot table dataframe
     """
-    data = filtered_data.copy()
-    data = data.dropna(subset=["CHAMPIONS_KILLED", "NUM_DEATHS", "ASSISTS"])
-    data.loc[:, ["CHAMPIONS_KILLED", "NUM_DEATHS", "ASSISTS"]] = data.loc[:, ["CHAMPIONS_KILLED", "NUM_DEATHS", "ASSISTS"]].astype(int)
-    data.loc[:,"kda"] = (data["CHAMPIONS_KILLED"] + data["ASSISTS"]) / data["NUM_DEATHS"].replace(0,1)
-    kda_team = data.pivot_table(index='_id',columns="TRUE_POSITION",values="kda",aggfunc='mean')[["TOP","JUNGLE","MIDDLE","BOTTOM","UTILITY"]]
+    data = filtered_data.assign(kda=get_kda(filtered_data)).dropna(subset=["kda"])
+    kda_team = data.pivot_table(index='_id',columns="TRUE_POSITION",values="kda",aggfunc='mean',observed=True)[["TOP","JUNGLE","MIDDLE","BOTTOM","UTILITY"]]
     
     if chart :
-        kda_team_avg = kda_team.mean()
-        kda_team_med = kda_team.median()
-        fig = go.Figure(
-            data=[
-                go.Bar(name='Mean KDA', x=kda_team_avg.index, y=kda_team_avg.values,marker_color="#D5C381"),
-                go.Bar(name='Median KDA', x=kda_team_med.index, y=kda_team_med.values,marker_color="#93D581") 
-            ],
-            layout=go.Layout(
-                title="Average and Median KDA by Position",
-                xaxis_title="Position",
-                yaxis_title="KDA",
-            )
-        )
-        return fig
+        import charts
+        return charts.kda_team_chart(kda_team)
     return kda_team
 
 def compute_kda_per_champion(filtered_data : pd.DataFrame) -> list :
@@ -582,17 +1079,13 @@ def compute_kda_per_champion(filtered_data : pd.DataFrame) -> list :
         list: A list containing from TOP to UTILITY the pandas dataframe containing the data
     """
 
-    data = filtered_data.copy()
-    data = data.dropna(subset=["CHAMPIONS_KILLED", "NUM_DEATHS", "ASSISTS"])
-    data.loc[:, ["CHAMPIONS_KILLED", "NUM_DEATHS", "ASSISTS"]] = data.loc[:, ["CHAMPIONS_KILLED", "NUM_DEATHS", "ASSISTS"]].astype(int)
-    data.loc[:,"kda"] = (data["CHAMPIONS_KILLED"] + data["ASSISTS"]) / data["NUM_DEATHS"].replace(0,1)
-    
+    aggregated = aggregate_role_champions(filtered_data)
+    aggregated = aggregated.loc[aggregated["KDA_GAMES"] > 0]
+
     list_dataframe_kda = [0] * 5
     for idx, position in enumerate(["TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"]):
-        df = data.loc[data["TRUE_POSITION"] == position].groupby("SKIN").agg(
-            KDA=( "kda", lambda x: round(x.mean(), 2) ),
-            Count=( "kda", "count" )
-        )
+        position_rows = get_position_rows(aggregated, position)
+        df = pd.DataFrame({"KDA" : position_rows["KDA"].round(2), "Count" : position_rows["KDA_GAMES"]})
         df.sort_values(by='Count',ascending=False,inplace=True)
         max_kda = df['KDA'].max()
         avg_kda = df['KDA'].mean()
@@ -605,152 +1098,101 @@ def compute_kda_per_champion(filtered_data : pd.DataFrame) -> list :
 
     return list_dataframe_kda
 
-def history(data : pd.DataFrame, dict_name : dict) -> pd.DataFrame :
+GAME_COLUMNS = ["gameDuration", "enemyTeamName", "datetime", "patchVersion"]
+
+
+def build_game_table(data : pd.DataFrame, team_dict : dict) -> pd.DataFrame :
+    """Create a per-game wide table (one row per game) with the ally and enemy values side by side.
+    The participants are scattered in a (game, team, position) array, the ally and enemy teams are then picked by array indexing.
+    Participants with missing data are ignored, games without any team player are removed.
+
+    Args:
+        data (pd.DataFrame): All data table (one row per (match,participant))
+        team_dict (dict): Dictionnary containing the team PUUID. Example = {"TOP" : ["9df5d86"], "JUNGLE" : ...}
+
+    Returns:
+        pd.DataFrame: Table indexed by `_id` (sorted) with the columns :
+            * ALLY_TEAM : 100 or 200, ALLY_WIN : bool
+            * ALLY_<POSITION> / ENEMY_<POSITION> : Champion (SKIN) played at each position
+            * ALLY_KILLS_<POSITION> / ENEMY_KILLS_<POSITION>, TOTAL_ALLY_KILL, TOTAL_ENEMY_KILL : Kills
+            * gameDuration, enemyTeamName, datetime, patchVersion
+    """
+    columns = ["_id", "WIN", "TEAM", "PUUID", "TRUE_POSITION", "SKIN", "CHAMPIONS_KILLED", "gameDuration", "enemyTeamName", "jsonFileName", "patchVersion"]
+    rows = data.loc[data[columns].notna().all(axis=1)]
+    team_codes = pd.Categorical(rows["TEAM"].astype(str), categories=TEAMS).codes
+    position_codes = pd.Categorical(rows["TRUE_POSITION"].astype(str), categories=POSITIONS).codes
+    is_known = (team_codes >= 0) & (position_codes >= 0)
+    rows, team_codes, position_codes = rows.loc[is_known], team_codes[is_known], position_codes[is_known]
+
+    # Hashing ObjectId is slow : `_id` is factorized once and only the unique values are sorted
+    game_codes, game_ids = pd.factorize(rows["_id"])
+    game_ids = np.asarray(game_ids, dtype=object)
+    order = np.argsort(game_ids, kind="stable")
+    game_codes, game_ids = np.argsort(order)[game_codes], game_ids[order]
+    first_rows = np.unique(game_codes, return_index=True)[1]
+    nb_games = len(game_ids)
+
+    skins = np.full((nb_games, len(TEAMS), len(POSITIONS)), None, dtype=object)
+    skins[game_codes, team_codes, position_codes] = rows["SKIN"].astype(object).to_numpy()
+    kills = np.zeros((nb_games, len(TEAMS), len(POSITIONS)), dtype=np.int64)
+    kills[game_codes, team_codes, position_codes] = rows["CHAMPIONS_KILLED"].astype(int).to_numpy()
+    wins = np.zeros((nb_games, len(TEAMS)), dtype=bool)
+    wins[game_codes, team_codes] = to_boolean(rows["WIN"]).to_numpy()
+
+    # Team of the players of team_dict, the blue side is kept if both teams contain one
+    ally_team = np.full(nb_games, len(TEAMS))
+    team_mask = get_team_mask(rows, team_dict).to_numpy()
+    np.minimum.at(ally_team, game_codes[team_mask], team_codes[team_mask])
+    has_ally = ally_team < len(TEAMS)
+    game_ids, skins, kills, wins, ally_team = game_ids[has_ally], skins[has_ally], kills[has_ally], wins[has_ally], ally_team[has_ally]
+    enemy_team = 1 - ally_team
+    games = np.arange(len(game_ids))
+
+    ally_skins, enemy_skins = skins[games, ally_team], skins[games, enemy_team]
+    ally_kills, enemy_kills = kills[games, ally_team], kills[games, enemy_team]
+    game_table = pd.DataFrame({
+        "ALLY_TEAM" : np.array(TEAMS, dtype=int)[ally_team],
+        "ALLY_WIN" : wins[games, ally_team],
+        **{f"ALLY_{position}" : ally_skins[:, index] for index, position in enumerate(POSITIONS)},
+        **{f"ENEMY_{position}" : enemy_skins[:, index] for index, position in enumerate(POSITIONS)},
+        **{f"ALLY_KILLS_{position}" : ally_kills[:, index] for index, position in enumerate(POSITIONS)},
+        **{f"ENEMY_KILLS_{position}" : enemy_kills[:, index] for index, position in enumerate(POSITIONS)},
+        "TOTAL_ALLY_KILL" : ally_kills.sum(axis=1),
+        "TOTAL_ENEMY_KILL" : enemy_kills.sum(axis=1),
+    }, index=pd.Index(game_ids, name="_id"))
+
+    game_values = rows[GAME_COLUMNS].iloc[first_rows[has_ally]].set_axis(game_table.index)
+    return pd.concat([game_table, game_values], axis=1)
+
+
+def history(data : pd.DataFrame, dict_name : dict, team_dict : dict = None) -> pd.DataFrame :
     """Create a pandas table, history of scrim games, game will be filtered when we don"t have all data
 
     Args:
         data (pd.DataFrame): All data table
         dict_name (dict): Dict of matching Name player with role Example : {Filou : BOTTOM}
+        team_dict (dict, optional): Dictionnary containing the team PUUID. Defaults to None for st.secrets["TEAM_SCRIM_ID"].
 
     Returns:
         pd.DataFrame: History dataframe
     """
-    
-    def get_enemy_value(row, role):
-        ally_team = int(row["ALLY_TEAM__"])
-        enemy_team = 300 - ally_team
-
-        col_name = f"SKIN_{enemy_team}_{role}"
-
-        return row[col_name] if col_name in row else None
-    
-    def get_enemy_kill(row) :
-        ally_team = int(row["ALLY_TEAM__"])
-        enemy_team = 300 - ally_team       
-        
-        col_name = f"TOTALKILL_TEAM_{enemy_team}__"
-        return row[col_name] if col_name in row else None
-
-    def detect_ally_team(row, ally_dict):
-        puuid_cols = row["PUUID"]
-
-        for team in ["100", "200"]:
-            for position in ally_dict.keys():
-
-                col = (team, position)
-
-                if col not in puuid_cols.index:
-                    continue
-
-                puuid_value = puuid_cols[col]
-
-                if pd.isna(puuid_value):
-                    continue
-
-                if puuid_value in ally_dict[position]:
-                    return int(team)
-
-        return None
-    
-    df_columns = data[["_id","WIN","TEAM","PUUID","TRUE_POSITION","SKIN","CHAMPIONS_KILLED","gameDuration","enemyTeamName","jsonFileName","patchVersion"]].dropna().astype({
-        "CHAMPIONS_KILLED" : int
-    })
-    pivot = df_columns.pivot(
-        index="_id",
-        columns=["TEAM","TRUE_POSITION"],
-        values=["SKIN","PUUID","WIN","CHAMPIONS_KILLED"]
-    )
-
-
-    pivot["TOTALKILL_TEAM_100"] = (
-        pivot["CHAMPIONS_KILLED"]
-        .loc[:, ("100", slice(None))]
-        .sum(axis=1)
-    )
-    pivot["TOTALKILL_TEAM_200"] = (
-        pivot["CHAMPIONS_KILLED"]
-        .loc[:, ("200", slice(None))]
-        .sum(axis=1)
-    )
-    pivot["TEAM_WIN_100"] = (
-        pivot["WIN"]
-        .loc[:, ("100", slice(None))]
-        .bfill(axis=1)
-        .iloc[:, 0]
-    )
-
-    pivot["TEAM_WIN_200"] = (
-        pivot["WIN"]
-        .loc[:, ("200", slice(None))]
-        .bfill(axis=1)
-        .iloc[:, 0]
-    )
-
-    pivot["ALLY_TEAM"] = pivot.apply(
-        detect_ally_team,
-        axis=1,
-        ally_dict=st.secrets["TEAM_SCRIM_ID"]
-    )
-
-    pivot = pivot.drop(["CHAMPIONS_KILLED","WIN"],axis=1)
-    pivot.columns = ["_".join(col) for col in pivot.columns]
-
-
-    merged = pivot.merge(data[["_id","gameDuration","enemyTeamName","datetime","patchVersion"]].drop_duplicates(subset="_id"),on="_id")
-
-    for name,role in dict_name.items() :
-        merged[name] = merged.apply(
-            lambda row: row[f"SKIN_{int(row['ALLY_TEAM__'])}_{role}"],
-            axis=1
-        )
-        merged[name] = merged[name].map(utils.get_champion_image_from_id)
-        merged[f"enemy_{role}"] = merged.apply(
-            lambda row: get_enemy_value(row, role),
-            axis=1
-        )
-        merged[f"enemy_{role}"] = merged[f"enemy_{role}"].map(utils.get_champion_image_from_id)
-
-        
-    merged = merged.drop(
-        [col for col in merged.columns if col.startswith("SKIN_")],
-        axis=1
-    )
-
-    merged = merged.drop(
-        [col for col in merged.columns if col.startswith("PUUID_")],
-        axis=1
-    )
-
-    merged["Win"] = merged.apply(
-        lambda row : row[f"TEAM_WIN_{int(row['ALLY_TEAM__'])}__"],
-        axis=1
-    )
-
-    merged["gameDuration"] = merged["gameDuration"] / 60000
-
-    merged["TOTAL_ALLY_KILL"] = merged.apply(
-        lambda row : row[f"TOTALKILL_TEAM_{int(row['ALLY_TEAM__'])}__"],
-        axis=1
-    )
-    
-    merged["TOTAL_ENEMY_KILL"] = merged.apply(
-        lambda row: get_enemy_kill(row),
-        axis=1
-    )
-    merged = merged.drop(
-        [col for col in merged.columns if col.startswith("TEAM_WIN_")],
-        axis=1
-    )
-
-    merged["gameDuration"] = pd.to_numeric(
-        merged["gameDuration"],
-        errors="coerce"
-    ).round(0)
-
+    if team_dict is None :
+        import streamlit as st
+        team_dict = st.secrets["TEAM_SCRIM_ID"]
+    games = build_game_table(data, team_dict).reset_index(drop=True)
+
+    merged = games[["ALLY_TEAM"]].rename(columns={"ALLY_TEAM" : "ALLY_TEAM__"})
+    merged["gameDuration"] = (pd.to_numeric(games["gameDuration"], errors="coerce") / 60000).round(0)
+    merged[["enemyTeamName", "datetime", "patchVersion"]] = games[["enemyTeamName", "datetime", "patchVersion"]]
+    for name, role in dict_name.items() :
+        merged[name] = games[f"ALLY_{role}"].map(utils.get_champion_image_from_id)
+        merged[f"enemy_{role}"] = games[f"ENEMY_{role}"].map(utils.get_champion_image_from_id)
+    merged["Win"] = games["ALLY_WIN"].map({True : "Win", False : "Fail"})
+    merged["TOTAL_ALLY_KILL"] = games["TOTAL_ALLY_KILL"]
+    merged["TOTAL_ENEMY_KILL"] = games["TOTAL_ENEMY_KILL"]
     merged["Ally side"] = merged["ALLY_TEAM__"].replace({
         100 : "Blue",
         200 : "Red"
     })
-    
-    return merged.drop(["_id","TOTALKILL_TEAM_100__","TOTALKILL_TEAM_200__"],axis=1).sort_values("datetime",ascending=False)
 
+    return merged.sort_values("datetime",ascending=False)
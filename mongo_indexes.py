@@ -0,0 +1,241 @@
+from datetime import datetime
+from pymongo import ASCENDING, MongoClient
+from pymongo.errors import OperationFailure
+from dotenv import load_dotenv
+import os
+
+# Indexes of the lol_match_database collections and a check of the query plans of the hot queries.
+# Run with : python mongo_indexes.py (uses ATLAS_CONNEXION_STRING, needs write access to create the indexes and add the missing datetime and matchKey)
+
+DATABASE_NAME = "lol_match_database"
+# Error codes of create_index when an index with the same name exists with other options or keys
+INDEX_CONFLICT_CODES = (85, 86)
+
+INDEXES = {
+    "scrim_matches" : [
+        # Key of the upserts of push_json_to_db, unique so that concurrent pushes of the same file can not insert it twice.
+        # The games without jsonFileName are inserted without key, they are not in the index
+        {"keys" : [("jsonFileName", ASCENDING)], "name" : "jsonFileName", "unique" : True, "partialFilterExpression" : {"jsonFileName" : {"$exists" : True}}},
+        {"keys" : [("matchKey", ASCENDING)], "name" : "matchKey"},
+        {"keys" : [("datetime", ASCENDING)], "name" : "datetime"},
+        {"keys" : [("patchVersion", ASCENDING)], "name" : "patchVersion"},
+        {"keys" : [("enemyTeamName", ASCENDING)], "name" : "enemyTeamName"},
+        {"keys" : [("participants.PUUID", ASCENDING)], "name" : "participants_PUUID"},
+    ],
+    "drafts" : [
+        {"keys" : [("link", ASCENDING)], "name" : "link", "unique" : True},
+        {"keys" : [("blue.team", ASCENDING)], "name" : "blue_team"},
+        {"keys" : [("red.team", ASCENDING)], "name" : "red_team"},
+        {"keys" : [("matchKey", ASCENDING)], "name" : "matchKey"},
+    ],
+}
+
+# Queries run by the scripts and the webapp, they must be answered with an index
+HOT_QUERIES = {
+    "scrim_matches" : {
+        "jsonFileName" : {"jsonFileName" : "__explain__"},
+        "matchKey" : {"matchKey" : "__explain__"},
+        "filter_data_date" : {"datetime" : {"$gte" : datetime(2025, 1, 1), "$lte" : datetime(2025, 1, 31)}},
+        "patchVersion" : {"patchVersion" : {"$in" : ["__explain__"]}},
+        "enemyTeamName" : {"enemyTeamName" : {"$in" : ["__explain__"]}},
+        "participants.PUUID" : {"participants.PUUID" : {"$in" : ["__explain__"]}},
+        "filter_data_team_side" : {"participants" : {"$elemMatch" : {"PUUID" : {"$in" : ["__explain__"]}, "TEAM" : {"$in" : ["100"]}}}},
+    },
+    "drafts" : {
+        "document_exist" : {"link" : "__explain__"},
+        "filter_by_team_and_side blue" : {"blue.team" : "__explain__"},
+        "filter_by_team_and_side red" : {"red.team" : "__explain__"},
+        "matchKey" : {"matchKey" : "__explain__"},
+    },
+}
+
+# Field each collection computes its matchKey from (see utils.get_match_key), for the documents stored before the key
+MATCH_KEY_SOURCES = {"scrim_matches" : "jsonFileName", "drafts" : "date"}
+
+
+def find_duplicates(collection, field : str, limit : int = 10) -> list :
+    """Values of a field shared by several documents (they prevent the creation of a unique index)
+
+    Args:
+        collection : Mongo collection
+        field (str): Name of the field
+        limit (int, optional): Maximum number of values returned. Defaults to 10.
+
+    Returns:
+        list: List of (value, number of documents)
+    """
+    pipeline = [
+        {"$match" : {field : {"$exists" : True}}},
+        {"$group" : {"_id" : f"${field}", "count" : {"$sum" : 1}}},
+        {"$match" : {"count" : {"$gt" : 1}}},
+        {"$limit" : limit},
+    ]
+    return [(document["_id"], document["count"]) for document in collection.aggregate(pipeline)]
+
+
+def _index_error(collection, index : dict, error : OperationFailure) -> OperationFailure :
+    """Error of an index which can not be built, with the duplicated values for a unique index"""
+    message = f"Index {index['name']} on {collection.name} : {error}"
+    if index.get("unique") :
+        # A unique index can not be built while the collection contains duplicates
+        field = index["keys"][0][0]
+        duplicates = find_duplicates(collection, field)
+        if duplicates :
+            message += f" (duplicated {field} : {', '.join(f'{value} x{count}' for value, count in duplicates)})"
+    return OperationFailure(message, code=error.code, details=error.details)
+
+
+def create_index(collection, index : dict) -> str :
+    """Create an index. An index with the same name and other options (for example not unique yet) is built again.
+    The existing index is kept when the new one can not be built : a unique index is not built while the collection
+    contains duplicates, and the previous index is restored if the build fails after it was dropped.
+
+    Args:
+        collection : Mongo collection
+        index (dict): The index (keys, name and the options of create_index)
+
+    Raises:
+        OperationFailure: If the index can not be built, with the duplicated values for a unique index
+
+    Returns:
+        str: Name of the index
+    """
+    options = {key : value for key, value in index.items() if key != "keys"}
+    try :
+        return collection.create_index(index["keys"], **options)
+    except OperationFailure as e :
+        if e.code not in INDEX_CONFLICT_CODES :
+            raise _index_error(collection, index, e) from e
+        conflict = e
+
+    if index.get("unique") and find_duplicates(collection, index["keys"][0][0], limit=1) :
+        raise _index_error(collection, index, conflict) from conflict
+    previous = collection.index_information().get(index["name"])
+    collection.drop_index(index["name"])
+    try :
+        return collection.create_index(index["keys"], **options)
+    except OperationFailure as e :
+        if previous is not None :
+            previous_options = {key : value for key, value in previous.items() if key not in ("key", "v", "ns")}
+            collection.create_index(previous["key"], name=index["name"], **previous_options)
+        raise _index_error(collection, index, e) from e
+
+
+def ensure_indexes(database, indexes : dict = INDEXES) -> dict :
+    """Create the indexes of each collection (nothing is done for the indexes which already exist)
+
+    Args:
+        database : Mongo database
+        indexes (dict, optional): Indexes to create by collection. Defaults to INDEXES.
+
+    Returns:
+        dict: Names of the indexes by collection
+    """
+    created = {}
+    for collection_name, collection_indexes in indexes.items() :
+        collection = database[collection_name]
+        created[collection_name] = []
+        for index in collection_indexes :
+            created[collection_name].append(create_index(collection, index))
+    return created
+
+
+def backfill_match_keys(database, sources : dict = MATCH_KEY_SOURCES) -> dict :
+    """Add the matchKey (source field without blank space) to the documents stored without it
+
+    Args:
+        database : Mongo database
+        sources (dict, optional): Source field of the key by collection. Defaults to MATCH_KEY_SOURCES.
+
+    Returns:
+        dict: Number of updated documents by collection
+    """
+    updated = {}
+    for collection_name, source in sources.items() :
+        match_key = {"$replaceAll" : {"input" : f"${source}", "find" : " ", "replacement" : ""}}
+        result = database[collection_name].update_many(
+            {"matchKey" : {"$exists" : False}, source : {"$type" : "string"}},
+            [{"$set" : {"matchKey" : match_key}}],
+        )
+        updated[collection_name] = result.modified_count
+    return updated
+
+
+def backfill_game_dates(database) -> int :
+    """Add the datetime of the games stored without it (parsed from the ddmmyyyy prefix of jsonFileName, see json_scrim.normalize_game_document),
+    the date filter of the pages is answered by the datetime index
+
+    Args:
+        database : Mongo database
+
+    Returns:
+        int: Number of updated games
+    """
+    game_date = {"$dateFromString" : {"dateString" : {"$substrBytes" : ["$jsonFileName", 0, 8]}, "format" : "%d%m%Y", "onError" : None}}
+    result = database["scrim_matches"].update_many(
+        {"datetime" : {"$exists" : False}, "jsonFileName" : {"$type" : "string"}},
+        [{"$set" : {"datetime" : game_date}}],
+    )
+    return result.modified_count
+
+
+def get_plan_stages(plan) -> list :
+    """List every stage of a query plan (explain output), depth first
+
+    Args:
+        plan : The plan, or any part of the explain output
+
+    Returns:
+        list: Names of the stages
+    """
+    stages = []
+    if isinstance(plan, dict) :
+        if "stage" in plan :
+            stages.append(plan["stage"])
+        for value in plan.values() :
+            stages += get_plan_stages(value)
+    elif isinstance(plan, list) :
+        for value in plan :
+            stages += get_plan_stages(value)
+    return stages
+
+
+def check_query_plans(database, hot_queries : dict = HOT_QUERIES) -> dict :
+    """Explain every hot query and check that none of them falls back to a collection scan
+
+    Args:
+        database : Mongo database
+        hot_queries (dict, optional): Queries by name for each collection. Defaults to HOT_QUERIES.
+
+    Raises:
+        RuntimeError: If the winning plan of a query contains a COLLSCAN stage
+
+    Returns:
+        dict: Stages of the winning plan for each (collection, query name)
+    """
+    plans = {}
+    collscans = []
+    for collection_name, queries in hot_queries.items() :
+        for query_name, query in queries.items() :
+            explain = database[collection_name].find(query).explain()
+            stages = get_plan_stages(explain["queryPlanner"]["winningPlan"])
+            plans[(collection_name, query_name)] = stages
+            if "COLLSCAN" in stages :
+                collscans.append(f"{collection_name} : {query_name}")
+    if collscans :
+        raise RuntimeError("Queries without index (COLLSCAN) : " + ", ".join(collscans))
+    return plans
+
+
+if __name__ == "__main__" :
+    load_dotenv()
+    client = MongoClient(host=os.getenv("ATLAS_CONNEXION_STRING"))
+    database = client[DATABASE_NAME]
+    for collection_name, names in ensure_indexes(database).items() :
+        print(f"{collection_name} : {', '.join(names)}")
+    print(f"scrim_matches : datetime added to {backfill_game_dates(database)} games")
+    for collection_name, count in backfill_match_keys(database).items() :
+        print(f"{collection_name} : matchKey added to {count} documents")
+    for (collection_name, query_name), stages in check_query_plans(database).items() :
+        print(f"{collection_name} - {query_name} : {' > '.join(stages)}")
+    client.close()
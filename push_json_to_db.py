@@ -1,44 +1,218 @@
 import pymongo
+from pymongo import ReplaceOne, InsertOne
+from pymongo.errors import BulkWriteError
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter
+import argparse
 import json
 import os  # Import os to work with directories
+import time
 from dotenv import load_dotenv
+import json_scrim
 load_dotenv()
 
+# Push the JSON games produced by main.js into the scrim_matches collection.
+# Each game is upserted on its jsonFileName, so pushing the same file twice does not duplicate games
+# (the jsonFileName index is unique, see mongo_indexes, so it also holds for concurrent pushes).
+# A manifest in the folder records the files already pushed : a rerun after a failure only pushes the remaining files,
+# and only the files entirely pushed are removed from the folder.
+# Run with : python push_json_to_db.py [--folder ./json_folder] [--workers 4] [--batch-size 500] [--keep-files]
+
 sourceJsonFolder = "./json_folder"
+MANIFEST_NAME = ".push_manifest.json"
+DEFAULT_BATCH_SIZE = 500
+DUPLICATE_KEY_ERROR = 11000
+
+
+def get_team_dict() -> dict :
+    """PUUID of the team (.streamlit/secrets.toml), used to mark the team players of each game at ingest.
+    The marker is only a hint for the queries, the readers resolve the membership with the current roster (see json_scrim.add_team_membership)"""
+    # Imported here so the workers parsing the files and the ingestion daemon do not load streamlit
+    import streamlit as st
+    try :
+        return {role : list(puuids) for role, puuids in st.secrets["TEAM_SCRIM_ID"].items()}
+    except (FileNotFoundError, KeyError) :
+        print("TEAM_SCRIM_ID not found in the streamlit secrets, the games are pushed without the IS_ALLY marker.")
+        return None
+
+
+def get_file_signature(file_path : str) -> list :
+    """Size and modification time of a file, a file is pushed again if its signature changed"""
+    stat = os.stat(file_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def read_manifest(folder_path : str) -> dict :
+    """Read the manifest of the pushed files of a folder (file name -> {"signature", "games"})"""
+    manifest_path = os.path.join(folder_path, MANIFEST_NAME)
+    if not os.path.isfile(manifest_path) :
+        return {}
+    with open(manifest_path, "r") as f :
+        return json.load(f)
+
+
+def write_manifest(folder_path : str, manifest : dict) :
+    """Write the manifest, the file is replaced atomically"""
+    manifest_path = os.path.join(folder_path, MANIFEST_NAME)
+    with open(manifest_path + ".tmp", "w") as f :
+        json.dump(manifest, f, indent=1)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+
+def load_json_file(file_path : str, team_dict : dict = None) -> list :
+    """Read a JSON file of games and normalize them (see json_scrim.normalize_game_document)
+
+    Args:
+        file_path (str): Path of the JSON file, containing a game or a list of games
+        team_dict (dict, optional): Dictionnary containing the team PUUID. Defaults to None.
+
+    Returns:
+        list: The normalized games, None if the file is not a valid list of documents
+    """
+    try :
+        with open(file_path, 'rb') as f:
+            file_data = json.load(f)
+
+        if isinstance(file_data, dict):
+            file_data = [file_data]
+        if not isinstance(file_data, list) or not file_data or not all(isinstance(game, dict) for game in file_data) :
+            return None
+        return [json_scrim.normalize_game_document(game, team_dict) for game in file_data]
+    except ValueError :
+        # Invalid JSON or file name without date (DDMMYYYY_N), the other files are still pushed
+        return None
+
+
+def to_upsert(game : dict) :
+    """Write operation of a game : replaced on its jsonFileName, inserted if it has none"""
+    if "jsonFileName" in game :
+        return ReplaceOne({"jsonFileName" : game["jsonFileName"]}, game, upsert=True)
+    return InsertOne(game)
+
+
+def bulk_upsert(collection, operations : list, retry : bool = True) -> set :
+    """Run the operations with an unordered bulk write
+
+    Args:
+        collection : Mongo collection
+        operations (list): Write operations
+        retry (bool, optional): Run again once the upserts failing on a duplicated key. Defaults to True.
+
+    Returns:
+        set: Index of the operations which failed
+    """
+    if not operations :
+        return set()
+    try :
+        collection.bulk_write(operations, ordered=False)
+    except BulkWriteError as e :
+        failed = {error["index"] for error in e.details["writeErrors"]}
+        # An upsert racing with another push of the same game hits the unique jsonFileName index,
+        # the game exists now so the replacement is run once again
+        duplicates = sorted(error["index"] for error in e.details["writeErrors"] if error["code"] == DUPLICATE_KEY_ERROR and isinstance(operations[error["index"]], ReplaceOne))
+        if duplicates :
+            retried = bulk_upsert(collection, [operations[index] for index in duplicates], retry=False) if retry else set(range(len(duplicates)))
+            failed = (failed - set(duplicates)) | {duplicates[index] for index in retried}
+        return failed
+    return set()
+
+
+def push_folder(collection, folder_path : str = sourceJsonFolder, team_dict : dict = None, workers : int = None, batch_size : int = DEFAULT_BATCH_SIZE, keep_files : bool = False) -> dict :
+    """Push every JSON file of a folder which is not in the manifest yet.
+    The files are parsed in parallel, the games are upserted with unordered bulk writes of `batch_size` games.
+
+    Args:
+        collection : Mongo collection (scrim_matches)
+        folder_path (str, optional): Folder of the JSON files. Defaults to sourceJsonFolder.
+        team_dict (dict, optional): Dictionnary containing the team PUUID. Defaults to None.
+        workers (int, optional): Number of processes parsing the files. Defaults to None for the number of CPU.
+        batch_size (int, optional): Number of games per bulk write. Defaults to DEFAULT_BATCH_SIZE.
+        keep_files (bool, optional): Keep the pushed files in the folder. Defaults to False.
+
+    Returns:
+        dict: Report with the pushed, skipped and failed files, the number of games and the throughput (games/s)
+    """
+    start = time.perf_counter()
+    manifest = read_manifest(folder_path)
+    file_names = sorted(
+        file_name for file_name in os.listdir(folder_path)
+        if file_name.endswith('.json') and file_name != MANIFEST_NAME and os.path.isfile(os.path.join(folder_path, file_name))
+    )
+    to_push = [
+        file_name for file_name in file_names
+        if manifest.get(file_name, {}).get("signature") != get_file_signature(os.path.join(folder_path, file_name))
+    ]
+    report = {"pushed" : [], "skipped" : sorted(set(file_names) - set(to_push)), "failed" : [], "games" : 0}
 
-myclient = pymongo.MongoClient(host=os.getenv("ATLAS_CONNEXION_STRING"))
-db = myclient["lol_match_database"]
-collection = db["scrim_matches"]
+    # No pool of processes is started when there is no new file
+    if to_push :
+        with ProcessPoolExecutor(max_workers=workers) as executor :
+            paths = [os.path.join(folder_path, file_name) for file_name in to_push]
+            parsed_files = executor.map(load_json_file, paths, [team_dict] * len(paths), chunksize=8)
 
-def clear_json_folder(folder_path):
-    """Function to clear all files in the specified folder."""
-    for file_name in os.listdir(folder_path):
-        file_path = os.path.join(folder_path, file_name)
-        if os.path.isfile(file_path):
-            os.unlink(file_path)
-    print("Json folder cleared.")
+            # Games of each file not written yet, a file is added to the manifest when all its games are written
+            pending, games_by_file = {}, {}
+            operations, operation_files = [], []
 
+            def flush() :
+                failed_operations = bulk_upsert(collection, operations)
+                failed_files = {operation_files[index] for index in failed_operations}
+                for file_name, nb_operations in Counter(operation_files).items() :
+                    if file_name in failed_files :
+                        report["failed"].append(file_name)
+                        continue
+                    pending[file_name] -= nb_operations
+                    if pending[file_name] == 0 :
+                        games = games_by_file.pop(file_name)
+                        manifest[file_name] = {"signature" : get_file_signature(os.path.join(folder_path, file_name)), "games" : games}
+                        report["pushed"].append(file_name)
+                        report["games"] += games
+                operations.clear()
+                operation_files.clear()
+                write_manifest(folder_path, manifest)
 
-try:
-    for file_name in os.listdir(sourceJsonFolder):
-        file_path = os.path.join(sourceJsonFolder, file_name)
-        
-        if os.path.isfile(file_path) and file_name.endswith('.json'):
-            with open(file_path, 'rb') as f:
-                file_data = json.load(f)
+            for file_name, games in zip(to_push, parsed_files) :
+                if games is None :
+                    print(f"Skipping file {file_name}: Not a valid list of documents.")
+                    report["failed"].append(file_name)
+                    continue
+                pending[file_name], games_by_file[file_name] = len(games), len(games)
+                for game in games :
+                    operations.append(to_upsert(game))
+                    operation_files.append(file_name)
+                    if len(operations) >= batch_size :
+                        flush()
+            flush()
 
-            if isinstance(file_data, dict):
-                file_data = [file_data] 
+    # A file with a failed game is pushed again entirely on the next run (upserts are idempotent)
+    report["failed"] = sorted(set(report["failed"]))
+    for file_name in report["failed"] :
+        manifest.pop(file_name, None)
+    write_manifest(folder_path, manifest)
 
-            if isinstance(file_data, list) and file_data:  
-                collection.insert_many(file_data)
-            else:
-                print(f"Skipping file {file_name}: Not a valid list of documents.")
+    if not keep_files :
+        for file_name in report["pushed"] + report["skipped"] :
+            os.unlink(os.path.join(folder_path, file_name))
+    report["seconds"] = time.perf_counter() - start
+    report["games_per_second"] = report["games"] / report["seconds"] if report["seconds"] > 0 else 0
+    return report
 
-    myclient.close()
-    print("Data pushed successfully, and connection closed.")
-    clear_json_folder(sourceJsonFolder)
 
+if __name__ == "__main__" :
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--folder", default=sourceJsonFolder)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--keep-files", action="store_true", help="Do not remove the pushed files from the folder")
+    args = parser.parse_args()
 
-except Exception as e:
-    print(f"Error: {e}")
+    myclient = pymongo.MongoClient(host=os.getenv("ATLAS_CONNEXION_STRING"))
+    db = myclient["lol_match_database"]
+    collection = db["scrim_matches"]
+    try :
+        report = push_folder(collection, args.folder, get_team_dict(), workers=args.workers, batch_size=args.batch_size, keep_files=args.keep_files)
+    finally :
+        myclient.close()
+    print(f"{report['games']} games pushed from {len(report['pushed'])} files in {report['seconds']:.2f} s ({report['games_per_second']:.0f} games/s), {len(report['skipped'])} files already pushed.")
+    if report["failed"] :
+        print(f"Failed files (kept in {args.folder}, run again to retry) : {', '.join(report['failed'])}")
@@ -0,0 +1,191 @@
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import rofl_reader
+
+# Batch conversion of the replays of rofl_folder into the JSON games of json_folder, then push into MongoDB.
+# Each replay goes through : fingerprint (rofl_reader.get_replay_fingerprint) -> metadata read (rofl_reader) -> JSON written -> replay moved to rofl_backup.
+# The replays are converted by a pool of processes, with a bounded number of replays in flight.
+# A manifest of the converted replays (by fingerprint) is kept in rofl_backup : a replay already converted is only removed,
+# a run stopped midway converts again the replays not in the manifest (every step can be replayed, the push is an upsert).
+# The replays which fail are recorded with their size and modification time (FAILURES_NAME) and left in rofl_folder :
+# they are not read again until the file changes (or with --retry-failed).
+# Run with : python rofl_converter.py [--workers 4] [--no-push]
+
+sourceFolderRofl = "./rofl_folder"
+targetFolderJson = "./json_folder"
+backupFolderRofl = "./rofl_backup"
+MANIFEST_NAME = ".convert_manifest.json"
+FAILURES_NAME = ".convert_failures.json"
+
+_converted_hashes = frozenset()
+
+
+def read_manifest(backup_folder : str, manifest_name : str = MANIFEST_NAME) -> dict :
+    """Read the manifest of the converted replays (fingerprint -> {"file", "json", "converted_at"}),
+    or with FAILURES_NAME the failed replays (file name -> {"signature", "error", "failed_at"})"""
+    manifest_path = os.path.join(backup_folder, manifest_name)
+    if not os.path.isfile(manifest_path) :
+        return {}
+    with open(manifest_path, "r") as f :
+        return json.load(f)
+
+
+def write_manifest(backup_folder : str, manifest : dict, manifest_name : str = MANIFEST_NAME) :
+    """Write the manifest, the file is replaced atomically"""
+    manifest_path = os.path.join(backup_folder, manifest_name)
+    with open(manifest_path + ".tmp", "w") as f :
+        json.dump(manifest, f, indent=1)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+
+def get_file_signature(file_path : str) -> list :
+    """Size and modification time of a file, a failed replay is converted again if its signature changed"""
+    stat = os.stat(file_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _init_worker(converted_hashes : frozenset) :
+    """Give the hashes of the converted replays to a worker, once per process"""
+    global _converted_hashes
+    _converted_hashes = converted_hashes
+
+
+def convert_replay(rofl_path : str, json_folder : str = targetFolderJson, backup_folder : str = backupFolderRofl) -> dict :
+    """Convert a replay into its JSON game and move it to the backup folder
+
+    Args:
+        rofl_path (str): Path of the replay
+        json_folder (str, optional): Folder of the JSON games. Defaults to targetFolderJson.
+        backup_folder (str, optional): Folder of the converted replays. Defaults to backupFolderRofl.
+
+    Returns:
+        dict: {"file", "hash", "status"} with status "converted", "already converted" or "failed" (and "error")
+    """
+    file_name = os.path.basename(rofl_path)
+    result = {"file" : file_name, "hash" : None, "status" : "failed"}
+    try :
+        result["hash"] = rofl_reader.get_replay_fingerprint(rofl_path)
+        if result["hash"] in _converted_hashes :
+            os.unlink(rofl_path)
+            result["status"] = "already converted"
+            return result
+
+        game = rofl_reader.rofl_to_game_document(rofl_path)
+        json_path = os.path.join(json_folder, f"{os.path.splitext(file_name)[0]}.json")
+        with open(json_path + ".tmp", "w", encoding="utf8") as f :
+            json.dump(game, f, indent=2, ensure_ascii=False)
+        os.replace(json_path + ".tmp", json_path)
+
+        shutil.move(rofl_path, os.path.join(backup_folder, file_name))
+        result["status"] = "converted"
+    except (OSError, rofl_reader.RoflFormatError) as e :
+        result["error"] = str(e)
+    except Exception as e :
+        # Any other error of a replay is reported with it, the other replays of the folder are still converted
+        result["error"] = f"{type(e).__name__} : {e}"
+    return result
+
+
+def convert_folder(rofl_folder : str = sourceFolderRofl, json_folder : str = targetFolderJson, backup_folder : str = backupFolderRofl, workers : int = None, retry_failed : bool = False) -> dict :
+    """Convert every replay of a folder with a pool of processes. The replays which already failed are ignored until they change.
+
+    Args:
+        rofl_folder (str, optional): Folder of the replays to convert. Defaults to sourceFolderRofl.
+        json_folder (str, optional): Folder of the JSON games. Defaults to targetFolderJson.
+        backup_folder (str, optional): Folder of the converted replays. Defaults to backupFolderRofl.
+        workers (int, optional): Number of processes. Defaults to None for the number of CPU.
+        retry_failed (bool, optional): Convert again the replays which failed, even if they did not change. Defaults to False.
+
+    Returns:
+        dict: Report with the converted, skipped (already converted), failed and ignored (failed before, unchanged) replays and the duration
+    """
+    start = time.perf_counter()
+    for folder in (json_folder, backup_folder) :
+        os.makedirs(folder, exist_ok=True)
+    manifest = read_manifest(backup_folder)
+    failures = {} if retry_failed else read_manifest(backup_folder, FAILURES_NAME)
+    report = {"converted" : [], "skipped" : [], "failed" : [], "ignored" : []}
+    signatures = {}
+    for file_name in sorted(os.listdir(rofl_folder)) :
+        path = os.path.join(rofl_folder, file_name)
+        if file_name.endswith(".rofl") and os.path.isfile(path) :
+            signatures[path] = get_file_signature(path)
+            if failures.get(file_name, {}).get("signature") == signatures[path] :
+                report["ignored"].append(file_name)
+                del signatures[path]
+    # The failures of the replays removed or changed since are forgotten
+    failures = {file_name : failure for file_name, failure in failures.items() if file_name in report["ignored"]}
+    paths = list(signatures)
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(frozenset(manifest),)) as executor :
+        # Only a few replays per process are submitted at once, the memory does not grow with the number of replays
+        max_in_flight = 2 * workers
+        remaining, in_flight = iter(paths), set()
+        while True :
+            for path in remaining :
+                in_flight.add(executor.submit(convert_replay, path, json_folder, backup_folder))
+                if len(in_flight) >= max_in_flight :
+                    break
+            if not in_flight :
+                break
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done :
+                result = future.result()
+                if result["status"] == "converted" :
+                    manifest[result["hash"]] = {"file" : result["file"], "json" : f"{os.path.splitext(result['file'])[0]}.json", "converted_at" : time.strftime("%Y-%m-%dT%H:%M:%S")}
+                    write_manifest(backup_folder, manifest)
+                    report["converted"].append(result["file"])
+                elif result["status"] == "already converted" :
+                    report["skipped"].append(result["file"])
+                else :
+                    print(f"Erreur lors de la conversion du fichier {result['file']} : {result['error']}")
+                    report["failed"].append(result["file"])
+                    failures[result["file"]] = {"signature" : signatures[os.path.join(rofl_folder, result["file"])], "error" : result["error"], "failed_at" : time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+    write_manifest(backup_folder, failures, FAILURES_NAME)
+
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+
+def push_converted(json_folder : str = targetFolderJson, workers : int = None, batch_size : int = None) -> dict :
+    """Push the JSON games into the scrim_matches collection (see push_json_to_db.push_folder)"""
+    import pymongo
+    import push_json_to_db
+
+    client = pymongo.MongoClient(host=os.getenv("ATLAS_CONNEXION_STRING"))
+    try :
+        collection = client["lol_match_database"]["scrim_matches"]
+        return push_json_to_db.push_folder(collection, json_folder, push_json_to_db.get_team_dict(), workers=workers, batch_size=batch_size or push_json_to_db.DEFAULT_BATCH_SIZE)
+    finally :
+        client.close()
+
+
+if __name__ == "__main__" :
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rofl-folder", default=sourceFolderRofl)
+    parser.add_argument("--json-folder", default=targetFolderJson)
+    parser.add_argument("--backup-folder", default=backupFolderRofl)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=None, help="Number of games per bulk write of the push")
+    parser.add_argument("--no-push", action="store_true", help="Only convert the replays, without pushing the JSON games")
+    parser.add_argument("--retry-failed", action="store_true", help="Convert again the replays which failed, even if they did not change")
+    args = parser.parse_args()
+
+    report = convert_folder(args.rofl_folder, args.json_folder, args.backup_folder, workers=args.workers, retry_failed=args.retry_failed)
+    print(f"{len(report['converted'])} replays converted in {report['seconds']:.2f} s, {len(report['skipped'])} already converted.")
+    if report["failed"] :
+        print(f"Failed replays (kept in {args.rofl_folder}) : {', '.join(report['failed'])}")
+    if report["ignored"] :
+        print(f"{len(report['ignored'])} replays which already failed are ignored until they change (--retry-failed to convert them again).")
+
+    if not args.no_push :
+        push_report = push_converted(args.json_folder, workers=args.workers, batch_size=args.batch_size)
+        print(f"{push_report['games']} games pushed from {len(push_report['pushed'])} files ({push_report['games_per_second']:.0f} games/s).")
+        if push_report["failed"] :
+            print(f"Failed files (kept in {args.json_folder}, run again to retry) : {', '.join(push_report['failed'])}")
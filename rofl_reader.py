@@ -0,0 +1,179 @@
+import hashlib
+import mmap
+import os
+import re
+import json
+import struct
+
+# Read the patch and the end of game stats (statsJson) of a .rofl replay without loading the replay.
+# The file is memory-mapped and only its header and its metadata block are read, the replay payload
+# (most of the file) is never touched, so the cost does not depend on the size of the replay.
+#   * Legacy format ("RIOT" + 0x00) : the offset and length of the metadata are stored in the header, after the signature.
+#   * Current format ("RIOT" + 0x02) : the metadata JSON is at the end of the file, followed by its length (uint32).
+# The games built by rofl_to_game_document are the same as the JSON files written by main.js.
+# Run with : python rofl_reader.py path/to/replay.rofl
+
+ROFL_MAGIC = b"RIOT"
+SIGNATURE_LENGTH = 256
+# Header of the legacy format : header length, file length, metadata offset, metadata length, payload header offset, payload header length, payload offset
+LEGACY_HEADER = struct.Struct("<HIIIIII")
+HEADER_SIZE = 4096
+# Same pattern as getPatch in main.js (15.1 or 15.1.6), so the patches match the games already in the database
+PATCH_PATTERN = re.compile(rb"\d{1,2}\.\d{1,2}(?:\.\d{1,2})?")
+POSITIONS = ["TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"]
+# Prefix (DDMM) of the file names of the official matches for each stage (1 for the GA, 2 for the second stage...)
+OFFICIAL_MATCH_STAGES = {
+    1 : ("1904", "2004"),
+    2 : ("1005", "1105", "1705", "1805"),
+    3 : ("0706", "0806", "1406", "1506"),
+    4 : ("1207", "1307", "1907", "2007"),
+    5 : ("0208", "0308", "0908", "1008"),
+    6 : ("3008", "3108", "0609", "0709"),
+}
+
+
+class RoflFormatError(ValueError) :
+    """The file is not a .rofl replay or its metadata can not be read"""
+
+
+def find_patch(text : bytes) -> str :
+    """Find the first patch (15.1 or 15.1.6) in a block of bytes, the null bytes are ignored
+
+    Args:
+        text (bytes): Block of bytes (header of the replay or game version)
+
+    Returns:
+        str: The patch, None if there is none
+    """
+    match = PATCH_PATTERN.search(text.replace(b"\0", b""))
+    return match.group(0).decode("ascii") if match else None
+
+
+def _read_metadata_block(replay : mmap.mmap) -> bytes :
+    """Locate and read the metadata JSON of a mapped replay"""
+    size = len(replay)
+    if size < len(ROFL_MAGIC) + 2 or replay[:len(ROFL_MAGIC)] != ROFL_MAGIC :
+        raise RoflFormatError("not a ROFL file")
+
+    if replay[len(ROFL_MAGIC)] == 0 :
+        header_offset = len(ROFL_MAGIC) + 2 + SIGNATURE_LENGTH
+        if size < header_offset + LEGACY_HEADER.size :
+            raise RoflFormatError("truncated header")
+        _, _, metadata_offset, metadata_length, _, _, _ = LEGACY_HEADER.unpack_from(replay, header_offset)
+        start, end = metadata_offset, metadata_offset + metadata_length
+    else :
+        (metadata_length,) = struct.unpack_from("<I", replay, size - 4)
+        start, end = size - 4 - metadata_length, size - 4
+
+    if start < 0 or end > size or start >= end :
+        raise RoflFormatError("metadata out of the file")
+    return replay[start:end]
+
+
+def get_replay_fingerprint(rofl_path : str) -> str :
+    """Fingerprint of a replay : SHA-256 of its size, its header (with the signature of the replay) and its metadata block.
+    Like read_rofl_metadata, the payload is not read.
+
+    Args:
+        rofl_path (str): Path of the replay
+
+    Raises:
+        RoflFormatError: If the file is not a .rofl replay
+
+    Returns:
+        str: The fingerprint (hex digest)
+    """
+    with open(rofl_path, "rb") as f :
+        size = os.fstat(f.fileno()).st_size
+        if size == 0 :
+            raise RoflFormatError("empty file")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as replay :
+            digest = hashlib.sha256(str(size).encode("ascii"))
+            digest.update(replay[:HEADER_SIZE])
+            digest.update(_read_metadata_block(replay))
+    return digest.hexdigest()
+
+
+def read_rofl_metadata(rofl_path : str) -> dict :
+    """Read the metadata of a .rofl replay, only the header and the metadata block are read
+
+    Args:
+        rofl_path (str): Path of the replay
+
+    Returns:
+        dict: The metadata (gameLength, lastGameChunkId, lastKeyFrameId...) with statsJson parsed into a list of participants,
+            and "patch" the patch of the game (None if it is not found)
+    """
+    with open(rofl_path, "rb") as f :
+        if os.fstat(f.fileno()).st_size == 0 :
+            raise RoflFormatError("empty file")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as replay :
+            metadata_block = _read_metadata_block(replay)
+            header = replay[:HEADER_SIZE]
+
+    try :
+        metadata = json.loads(metadata_block)
+        if not isinstance(metadata, dict) :
+            raise ValueError("the metadata is not an object")
+        if isinstance(metadata.get("statsJson"), str) :
+            metadata["statsJson"] = json.loads(metadata["statsJson"])
+    except (ValueError, AttributeError) as e :
+        raise RoflFormatError(f"invalid metadata : {e}") from e
+
+    # The legacy format stores the version in the metadata, the current one in the header
+    patch = find_patch(str(metadata.get("gameVersion", "")).encode("ascii", "ignore"))
+    metadata["patch"] = patch if patch else find_patch(header)
+    return metadata
+
+
+def get_official_match(file_name : str) -> int :
+    """Stage of an official match from the name of its file
+
+    Args:
+        file_name (str): Name of the replay (starting with DDMM)
+
+    Returns:
+        int: N for the Nth stage (1 for the GA), 0 if it is not an official match
+    """
+    for stage, prefixes in OFFICIAL_MATCH_STAGES.items() :
+        if file_name.startswith(prefixes) :
+            return stage
+    return 0
+
+
+def rofl_to_game_document(rofl_path : str) -> dict :
+    """Build the game document of a .rofl replay, with the same keys as the JSON files of main.js
+
+    Args:
+        rofl_path (str): Path of the replay
+
+    Raises:
+        RoflFormatError: If the file is not a replay or its metadata is not a game
+
+    Returns:
+        dict: The game with jsonFileName, patchVersion, officialMatch, gameDuration and participants (with TRUE_POSITION)
+    """
+    metadata = read_rofl_metadata(rofl_path)
+    file_name = os.path.splitext(os.path.basename(rofl_path))[0]
+
+    game = {key : value for key, value in metadata.items() if key not in ("patch", "gameLength", "statsJson")}
+    game["jsonFileName"] = file_name
+    if metadata["patch"] :
+        game["patchVersion"] = metadata["patch"]
+    game["officialMatch"] = get_official_match(file_name)
+    if "gameLength" in metadata :
+        game["gameDuration"] = metadata["gameLength"]
+    participants = metadata.get("statsJson") or []
+    if not isinstance(participants, list) or not all(isinstance(participant, dict) for participant in participants) :
+        raise RoflFormatError("invalid statsJson : expected a list of participants")
+    game["participants"] = participants
+    for index, participant in enumerate(game["participants"]) :
+        participant["TRUE_POSITION"] = POSITIONS[index % 5]
+    return game
+
+
+if __name__ == "__main__" :
+    import sys
+    for path in sys.argv[1:] :
+        game = rofl_to_game_document(path)
+        print(f"{game['jsonFileName']} : patch {game.get('patchVersion')}, {len(game['participants'])} participants, {game.get('gameDuration')} ms")
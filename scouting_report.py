@@ -0,0 +1,220 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import draft_analyze
+
+# Scouting reports of every team : pick priority, ban priority and presence of the team on each side.
+# The tables of every (team, side) are computed together from the fact table of the drafts (draft_analyze.build_draft_facts),
+# with one bincount per table instead of one query and one walk over the drafts per team and side.
+# The HTML report of each team is rendered by a pool of processes. The tables and the reports are stored in .cache/scouting
+# with the fingerprint of the drafts they come from : they are only computed again when the drafts change.
+# Run with : python scouting_report.py [--workers 4] [--refresh]
+
+DEFAULT_REPORT_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "scouting")
+INDEX_NAME = "index.json"
+SCOUTING_TABLES = ["pick_priority", "ban_priority", "presence"]
+PICK_SLOTS = ["B1", "B2_B3", "R1_R2"]
+SIDE_PICK_SLOTS = {"blue" : ["B1", "B2_B3"], "red" : ["R1_R2"]}
+
+
+def get_drafts_fingerprint(facts : pd.DataFrame) -> str :
+    """Fingerprint of the content of a fact table : a corrected draft (champion, team...) changes it, the order of the rows does not"""
+    row_hashes = pd.util.hash_pandas_object(facts[draft_analyze.DRAFT_FACT_COLUMNS].astype({"draft_id" : str}), index=False)
+    return hashlib.sha256(f"{len(facts)}|{int(row_hashes.sum())}".encode()).hexdigest()
+
+
+def _to_long_table(counts : np.ndarray, teams : pd.Index, champions : pd.Index, columns : list) -> pd.DataFrame :
+    """Convert an array of counts (team, side, champion, column) into a table with TEAM, SIDE, Champion and `columns`, without the empty rows"""
+    team_codes, side_codes, champion_codes = np.nonzero(counts.sum(axis=3) > 0)
+    table = pd.DataFrame({
+        "TEAM" : teams.to_numpy(dtype=object)[team_codes],
+        "SIDE" : np.array(draft_analyze.DRAFT_SIDES, dtype=object)[side_codes],
+        "Champion" : champions.to_numpy(dtype=object)[champion_codes],
+    })
+    for index, column in enumerate(columns) :
+        table[column] = counts[team_codes, side_codes, champion_codes, index]
+    return table
+
+
+def compute_scouting_tables(facts : pd.DataFrame) -> dict :
+    """Compute the scouting tables of every team and side
+
+    Args:
+        facts (pd.DataFrame): Fact table of the drafts (see draft_analyze.build_draft_facts)
+
+    Returns:
+        dict: Dictionnary table name (SCOUTING_TABLES) -> DataFrame with TEAM, SIDE and Champion, and :
+            * pick_priority : B1, B2_B3, R1_R2 and Total (see draft_analyze.calculate_pick_priority)
+            * ban_priority : Frequency, the first three bans of the team (see draft_analyze.calculate_ban_priority_by_side)
+            * presence : Presence, Pick Count and Ban Count of both teams in the drafts of the team on the side (see draft_analyze.calculate_pick_ban_counts)
+    """
+    teams, champions = facts["team"].cat.categories, facts["champion"].cat.categories
+    nb_teams, nb_sides, nb_champions = len(teams), len(draft_analyze.DRAFT_SIDES), len(champions)
+    team_codes = facts["team"].cat.codes.to_numpy().astype(np.int64)
+    opponent_codes = facts["opponent"].cat.codes.to_numpy().astype(np.int64)
+    side_codes = facts["side"].cat.codes.to_numpy().astype(np.int64)
+    is_ban = (facts["action"] == "ban").to_numpy()
+    orders = facts["order"].to_numpy()
+    champion_codes = facts["champion"].cat.codes.to_numpy().astype(np.int64)
+
+    def count(kept : np.ndarray, team : np.ndarray, side : np.ndarray, column : np.ndarray, nb_columns : int) -> np.ndarray :
+        kept = kept & (team >= 0) & (champion_codes >= 0)
+        flat_codes = ((team[kept] * nb_sides + side[kept]) * nb_champions + champion_codes[kept]) * nb_columns + column[kept]
+        return np.bincount(flat_codes, minlength=nb_teams * nb_sides * nb_champions * nb_columns).reshape(nb_teams, nb_sides, nb_champions, nb_columns)
+
+    # Pick slot : B1 (first blue pick), B2_B3 (second and third blue picks), R1_R2 (first two red picks)
+    slots = np.where(side_codes == 0, np.minimum(orders, 1), 2)
+    is_priority_pick = ~is_ban & (orders < np.where(side_codes == 0, 3, 2))
+    pick_counts = count(is_priority_pick, team_codes, side_codes, slots, len(PICK_SLOTS))
+    ban_counts = count(is_ban & (orders < 3), team_codes, side_codes, np.zeros(len(facts), dtype=np.int64), 1)
+    # Presence on a side counts every pick and ban of the drafts where the team plays this side
+    presence_counts = sum(
+        count(np.ones(len(facts), dtype=bool), np.where(side_codes == side_code, team_codes, opponent_codes), np.full(len(facts), side_code), is_ban.astype(np.int64), 2)
+        for side_code in range(nb_sides)
+    )
+
+    pick_priority = _to_long_table(pick_counts, teams, champions, PICK_SLOTS)
+    pick_priority["Total"] = pick_priority[PICK_SLOTS].sum(axis=1)
+    ban_priority = _to_long_table(ban_counts, teams, champions, ["Frequency"])
+    presence = _to_long_table(presence_counts, teams, champions, ["Pick Count", "Ban Count"])
+    presence.insert(3, "Presence", presence["Pick Count"] + presence["Ban Count"])
+    return {"pick_priority" : pick_priority, "ban_priority" : ban_priority, "presence" : presence}
+
+
+def get_team_report(tables : dict, team : str, side : str) -> dict :
+    """Tables of a team on a side, in the format of the draft_analyze functions
+
+    Args:
+        tables (dict): Scouting tables (see compute_scouting_tables)
+        team (str): Name of the team
+        side (str): "blue" or "red"
+
+    Returns:
+        dict: Dictionnary table name -> DataFrame (pick_priority, ban_priority and presence)
+    """
+    def rows(name : str) -> pd.DataFrame :
+        table = tables[name]
+        return table.loc[(table["TEAM"] == team) & (table["SIDE"] == side)].drop(columns=["TEAM", "SIDE"])
+
+    slots = SIDE_PICK_SLOTS[side]
+    pick_priority = rows("pick_priority")[["Champion"] + slots + ["Total"]]
+    pick_priority = pick_priority.sort_values(by=["Total", slots[0], "Champion"], ascending=[False, False, True])
+    ban_priority = rows("ban_priority").sort_values(by=["Frequency", "Champion"], ascending=[False, True])
+    presence = rows("presence").sort_values(by=["Presence", "Pick Count", "Champion"], ascending=[False, False, True])
+    return {
+        "pick_priority" : pick_priority.reset_index(drop=True),
+        "ban_priority" : ban_priority.reset_index(drop=True),
+        "presence" : presence.reset_index(drop=True),
+    }
+
+
+def get_report_file_name(team : str) -> str :
+    """Name of the HTML report of a team"""
+    return re.sub(r"[^\w-]+", "_", str(team).strip()) + ".html"
+
+
+def render_team_report(team : str, reports : dict) -> str :
+    """Render the HTML report of a team
+
+    Args:
+        team (str): Name of the team
+        reports (dict): Dictionnary side -> tables of the team (see get_team_report)
+
+    Returns:
+        str: The HTML page
+    """
+    titles = {"pick_priority" : "Pick priority", "ban_priority" : "Ban priority (first three bans)", "presence" : "Presence in the drafts"}
+    sections = [f"<h1>Scouting report : {team.strip()}</h1>"]
+    for side, tables in reports.items() :
+        sections.append(f"<h2>{side.capitalize()} side</h2>")
+        for name, table in tables.items() :
+            sections.append(f"<h3>{titles[name]}</h3>")
+            sections.append(table.head(20).to_html(index=False, border=0) if len(table) else "<p>No draft</p>")
+    return "<html><head><meta charset='utf-8'></head><body>\n" + "\n".join(sections) + "\n</body></html>"
+
+
+def _render_and_write(team : str, reports : dict, report_folder : str) -> str :
+    """Render the report of a team and write it in the report folder, return the file name"""
+    file_name = get_report_file_name(team)
+    with open(os.path.join(report_folder, file_name), "w", encoding="utf8") as f :
+        f.write(render_team_report(team, reports))
+    return file_name
+
+
+def read_report_index(report_folder : str = DEFAULT_REPORT_FOLDER) -> dict :
+    """Read the index of the report store ({"fingerprint", "created_at", "teams" : team -> file name}), None if there is none"""
+    index_path = os.path.join(report_folder, INDEX_NAME)
+    if not os.path.isfile(index_path) :
+        return None
+    with open(index_path, "r") as f :
+        return json.load(f)
+
+
+def load_scouting_tables(report_folder : str = DEFAULT_REPORT_FOLDER) -> dict :
+    """Read the scouting tables of the report store (see compute_scouting_tables)"""
+    return {name : pd.read_parquet(os.path.join(report_folder, f"{name}.parquet")) for name in SCOUTING_TABLES}
+
+
+def build_scouting_reports(facts : pd.DataFrame, report_folder : str = DEFAULT_REPORT_FOLDER, workers : int = None, refresh : bool = False) -> dict :
+    """Compute the scouting tables of every team, render the report of each team and store them.
+    Nothing is computed if the store already contains the reports of the same drafts.
+
+    Args:
+        facts (pd.DataFrame): Fact table of the drafts (see draft_analyze.build_draft_facts)
+        report_folder (str, optional): Folder of the report store. Defaults to DEFAULT_REPORT_FOLDER.
+        workers (int, optional): Number of processes rendering the reports. Defaults to None for the number of CPU.
+        refresh (bool, optional): Compute the reports even if the store is up to date. Defaults to False.
+
+    Returns:
+        dict: The index of the store ({"fingerprint", "created_at", "teams" : team -> file name}) and "cached" (True if nothing was computed)
+    """
+    fingerprint = get_drafts_fingerprint(facts)
+    index = read_report_index(report_folder)
+    if not refresh and index is not None and index["fingerprint"] == fingerprint :
+        return {**index, "cached" : True}
+
+    os.makedirs(report_folder, exist_ok=True)
+    tables = compute_scouting_tables(facts)
+    for name, table in tables.items() :
+        tmp_path = os.path.join(report_folder, f"{name}.parquet.tmp")
+        table.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, os.path.join(report_folder, f"{name}.parquet"))
+
+    teams = sorted(set(tables["presence"]["TEAM"]))
+    team_reports = [{side : get_team_report(tables, team, side) for side in draft_analyze.DRAFT_SIDES} for team in teams]
+    with ProcessPoolExecutor(max_workers=workers) as executor :
+        file_names = list(executor.map(_render_and_write, teams, team_reports, [report_folder] * len(teams)))
+
+    # The index is written last : an interrupted build is done again on the next run
+    index = {"fingerprint" : fingerprint, "created_at" : time.strftime("%Y-%m-%dT%H:%M:%S"), "teams" : dict(zip(teams, file_names))}
+    with open(os.path.join(report_folder, INDEX_NAME + ".tmp"), "w") as f :
+        json.dump(index, f, indent=1)
+    os.replace(os.path.join(report_folder, INDEX_NAME + ".tmp"), os.path.join(report_folder, INDEX_NAME))
+    return {**index, "cached" : False}
+
+
+if __name__ == "__main__" :
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--folder", default=DEFAULT_REPORT_FOLDER)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--refresh", action="store_true", help="Compute the reports even if the drafts did not change")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    connect = draft_analyze.connect_database('lol_match_database', host=os.getenv("ATLAS_CONNEXION_STRING"))
+    try :
+        drafts = draft_analyze.read_and_create_dataframe(draft_analyze.get_collection(connect, "drafts"))
+    finally :
+        connect.client.close()
+    index = build_scouting_reports(draft_analyze.build_draft_facts(drafts), args.folder, workers=args.workers, refresh=args.refresh)
+    status = "already up to date" if index["cached"] else "written"
+    print(f"{len(index['teams'])} scouting reports {status} in {args.folder} ({time.perf_counter() - start:.2f} s)")
@@ -0,0 +1,93 @@
+import os
+import pandas as pd
+from bson import ObjectId
+import json_scrim
+
+# Local columnar snapshot of the flattened scrim_matches table (one row per (match,participant)).
+# The snapshot is stored in Parquet with `_id` as an hex string, so it can be refreshed with a delta query
+# on the documents inserted after the greatest `_id` of the snapshot.
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "scrim_matches.parquet")
+
+
+def read_snapshot(cache_path : str = DEFAULT_CACHE_PATH) -> pd.DataFrame :
+    """Read the local snapshot of the participants table
+
+    Args:
+        cache_path (str, optional): Path of the Parquet snapshot. Defaults to DEFAULT_CACHE_PATH.
+
+    Returns:
+        pd.DataFrame: The snapshot (with `_id` as hex string), None if there is no snapshot
+    """
+    if not os.path.isfile(cache_path) :
+        return None
+    return pd.read_parquet(cache_path)
+
+
+def write_snapshot(data : pd.DataFrame, cache_path : str = DEFAULT_CACHE_PATH) :
+    """Write the participants table as a Parquet snapshot. The file is replaced atomically.
+
+    Args:
+        data (pd.DataFrame): The participants table (`_id` as ObjectId or hex string)
+        cache_path (str, optional): Path of the Parquet snapshot. Defaults to DEFAULT_CACHE_PATH.
+    """
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    data.assign(_id=data["_id"].astype(str)).to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, cache_path)
+
+
+def ids_to_object_id(ids : pd.Series) -> pd.Series :
+    """Convert a Series of hex strings into ObjectId, building one ObjectId per game instead of one per row
+
+    Args:
+        ids (pd.Series): Series of `_id` as hex strings
+
+    Returns:
+        pd.Series: Series of ObjectId
+    """
+    codes, uniques = pd.factorize(ids)
+    object_ids = pd.array([ObjectId(value) for value in uniques], dtype=object)
+    return pd.Series(object_ids.take(codes), index=ids.index, name=ids.name, dtype=object)
+
+
+def load_participants_dataframe(collection, cache_path : str = DEFAULT_CACHE_PATH, refresh : bool = False, batch_size : int = json_scrim.DEFAULT_BATCH_SIZE) -> pd.DataFrame :
+    """Load the participants table from the local snapshot and append the games inserted since the last load.
+    Only the documents with an `_id` greater than the greatest `_id` of the snapshot are fetched.
+    Documents updated or deleted in the collection after being cached are not seen, use `refresh` to rebuild the snapshot.
+
+    Args:
+        collection : Mongo collection (scrim_matches)
+        cache_path (str, optional): Path of the Parquet snapshot. Defaults to DEFAULT_CACHE_PATH.
+        refresh (bool, optional): Ignore the snapshot and rebuild it from the full collection. Defaults to False.
+        batch_size (int, optional): Number of documents fetched per cursor batch. Defaults to json_scrim.DEFAULT_BATCH_SIZE.
+
+    Returns:
+        pd.DataFrame: DataFrame with one row per (match,participant), same as json_scrim.read_and_create_dataframe
+    """
+    snapshot = None if refresh else read_snapshot(cache_path)
+    if snapshot is not None :
+        # Snapshots written before the marker was dropped at load may still contain it
+        snapshot = json_scrim.drop_stored_ally_marker(snapshot)
+    if snapshot is None or snapshot.empty :
+        query = {}
+    else :
+        query = {"_id" : {"$gt" : ObjectId(snapshot["_id"].max())}}
+
+    new_games = list(collection.find(query, batch_size=batch_size))
+    delta = json_scrim.create_participants_dataframe(new_games)
+
+    if snapshot is None or snapshot.empty :
+        data = delta
+    elif delta.empty :
+        data = snapshot
+    else :
+        # Categories differ between the snapshot and the delta, the schema is applied again on the concatenation
+        data = pd.concat([snapshot, delta.assign(_id=delta["_id"].astype(str))], ignore_index=True)
+        data = json_scrim.apply_schema(data)
+
+    if not delta.empty :
+        write_snapshot(data, cache_path)
+    if data.empty :
+        return data
+    return data.assign(_id=ids_to_object_id(data["_id"].astype(str)))
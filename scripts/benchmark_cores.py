@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+import random
+import argparse
+from itertools import combinations
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import json_scrim
+import champion_cores
+from synthetic_data import make_games, FakeCollection, TEAM_DICT, CHAMPIONS
+
+# Benchmark of champion_cores.mine_champion_cores on synthetic games.
+# Some fixed team compositions are played in a part of the games so that 4 and 5 champion cores exist.
+# Run with : python scripts/benchmark_cores.py
+
+
+def add_compositions(games : list, nb_compositions : int = 20, rate : float = 0.3, seed : int = 0) -> list :
+    """Replace the champions of one side by a fixed composition in a part of the games"""
+    rng = random.Random(seed)
+    compositions = [rng.sample(CHAMPIONS, 5) for _ in range(nb_compositions)]
+    for game in games :
+        if rng.random() < rate :
+            first = rng.choice([0, 5])
+            composition = rng.choice(compositions)
+            others = [participant["SKIN"] for participant in game["participants"][5 - first:10 - first] if participant["SKIN"] not in composition]
+            replacements = iter([champion for champion in CHAMPIONS if champion not in composition and champion not in others])
+            for participant in game["participants"][5 - first:10 - first] :
+                if participant["SKIN"] in composition :
+                    participant["SKIN"] = next(replacements)
+            for participant, champion in zip(game["participants"][first:first + 5], composition) :
+                participant["SKIN"] = champion
+    return games
+
+
+def brute_force_cores(data, min_size : int, max_size : int, min_support : int) -> set :
+    """Count every combination of each game side, kept to check the miner on small inputs"""
+    counts = {}
+    team_mask = json_scrim.get_team_mask(data, TEAM_DICT)
+    for side, side_rows in (("ally", data.loc[team_mask]), ("enemy", data.loc[~team_mask])) :
+        for champions in side_rows.groupby("_id")["SKIN"].agg(lambda skins : sorted(skins.astype(str))) :
+            for size in range(min_size, max_size + 1) :
+                for core in combinations(champions, size) :
+                    counts[(side, core)] = counts.get((side, core), 0) + 1
+    return {(side, core, games) for (side, core), games in counts.items() if games >= min_support}
+
+
+if __name__ == "__main__" :
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--min-support", type=int, default=20)
+    args = parser.parse_args()
+
+    small = json_scrim.read_and_create_dataframe(FakeCollection(add_compositions(make_games(300))))
+    mined = champion_cores.mine_champion_cores(small, TEAM_DICT, min_support=3)
+    assert set(zip(mined["SIDE"], mined["CHAMPIONS"], mined["GAMES"])) == brute_force_cores(small, 3, 5, 3)
+
+    all_games = add_compositions(make_games(max(args.sizes)))
+    print(f"{'games':>8} {'mining (s)':>11} {'cores 3':>8} {'cores 4':>8} {'cores 5':>8}")
+    for size in args.sizes :
+        data = json_scrim.read_and_create_dataframe(FakeCollection(all_games[:size]))
+        start = time.perf_counter()
+        cores = champion_cores.mine_champion_cores(data, TEAM_DICT, min_support=args.min_support)
+        elapsed = time.perf_counter() - start
+        counts = cores["SIZE"].value_counts().to_dict()
+        print(f"{size:>8} {elapsed:>11.3f} {counts.get(3, 0):>8} {counts.get(4, 0):>8} {counts.get(5, 0):>8}")
@@ -0,0 +1,121 @@
+import os
+import sys
+import time
+import argparse
+import itertools
+from collections import Counter
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import draft_analyze
+from synthetic_data import make_drafts, DRAFT_TEAMS
+
+# Benchmark of the draft statistics computed on the fact table (draft_analyze.build_draft_facts) against the previous
+# implementations walking the draft documents, on synthetic drafts. The results of both are compared.
+# The fact table is built once per load of the drafts (see dataset_service.get_draft_facts), its build time is shown apart.
+# Run with : python scripts/benchmark_drafts.py [--nb-drafts 10000]
+
+
+def legacy_count_bans(data : pd.DataFrame) -> pd.DataFrame :
+    """Previous implementation of count_champs_bansv2 (Counters over the lists of bans), kept for comparison"""
+    blue_bans = Counter(list(itertools.chain.from_iterable(data['blue.bans'].dropna())))
+    red_bans = Counter(list(itertools.chain.from_iterable(data['red.bans'].dropna())))
+    champions_bans_df = pd.DataFrame([blue_bans,red_bans]).T.rename(columns={0:'Blue',1:'Red'}).fillna(0)
+    champions_bans_df['Blue'] = champions_bans_df['Blue'].astype(int)
+    champions_bans_df['Red'] = champions_bans_df['Red'].astype(int)
+    champions_bans_df['total'] = champions_bans_df['Blue'] + champions_bans_df['Red']
+    return champions_bans_df
+
+
+def legacy_pick_ban_counts(drafts : list) -> pd.DataFrame :
+    """Previous implementation of calculate_pick_ban_counts, kept for comparison"""
+    pick_counter, ban_counter = Counter(), Counter()
+    for draft in drafts :
+        pick_counter.update(draft['blue']['picks'])
+        pick_counter.update(draft['red']['picks'])
+        ban_counter.update(draft['blue']['bans'])
+        ban_counter.update(draft['red']['bans'])
+    stats = [{'Champion' : champ, 'Presence' : pick_counter[champ] + ban_counter[champ], 'Pick Count' : pick_counter[champ], 'Ban Count' : ban_counter[champ]}
+             for champ in set(pick_counter) | set(ban_counter)]
+    return pd.DataFrame(stats).sort_values(by=['Presence', 'Pick Count', 'Champion'], ascending=[False, False, True])
+
+
+def legacy_pick_priority(drafts : list, team_name : str, side : str) -> pd.DataFrame :
+    """Previous implementation of calculate_pick_priority, kept for comparison"""
+    counters = {"B1" : Counter(), "B2_B3" : Counter(), "R1_R2" : Counter()}
+    for draft in drafts :
+        if draft[side]["team"] != team_name :
+            continue
+        picks = draft[side]["picks"]
+        if side == "blue" :
+            counters["B1"].update(picks[:1])
+            counters["B2_B3"].update(picks[1:3])
+        else :
+            counters["R1_R2"].update(picks[:2])
+    positions = ["B1", "B2_B3"] if side == "blue" else ["R1_R2"]
+    champions = set().union(*(counters[position] for position in positions))
+    data = [{"Champion" : champ, **{position : counters[position][champ] for position in positions}, "Total" : sum(counters[position][champ] for position in positions)} for champ in champions]
+    return pd.DataFrame(data)
+
+
+def legacy_ban_priority(drafts : list, team_name : str, side : str) -> pd.DataFrame :
+    """Previous implementation of calculate_ban_priority_by_side, kept for comparison"""
+    ban_counter = Counter()
+    for draft in drafts :
+        if draft[side]["team"] == team_name :
+            ban_counter.update(draft[side]["bans"][:3])
+    return pd.DataFrame([{"Champion" : champ, "Frequency" : freq} for champ, freq in ban_counter.items()])
+
+
+def same_table(first : pd.DataFrame, second : pd.DataFrame, key : str) -> bool :
+    """Compare two tables whatever the order of their rows (ties can be ordered differently)"""
+    first = first.set_index(key).sort_index()
+    second = second.set_index(key)[first.columns].sort_index()
+    return first.index.astype(str).equals(second.index.astype(str)) and (first.to_numpy() == second.to_numpy()).all()
+
+
+def run_legacy(drafts : list, drafts_df : pd.DataFrame) -> dict :
+    results = {"bans" : legacy_count_bans(drafts_df), "presence" : legacy_pick_ban_counts(drafts)}
+    for team, side in itertools.product(DRAFT_TEAMS, ["blue", "red"]) :
+        results[("picks", team, side)] = legacy_pick_priority(drafts, team, side)
+        results[("bans", team, side)] = legacy_ban_priority(drafts, team, side)
+    return results
+
+
+def run_facts(facts : pd.DataFrame) -> dict :
+    results = {"bans" : draft_analyze.count_champs_bansv2(facts), "presence" : draft_analyze.calculate_pick_ban_counts(facts)}
+    for team, side in itertools.product(DRAFT_TEAMS, ["blue", "red"]) :
+        results[("picks", team, side)] = draft_analyze.calculate_pick_priority(facts, team, side)
+        results[("bans", team, side)] = draft_analyze.calculate_ban_priority_by_side(facts, team, side)
+    return results
+
+
+if __name__ == "__main__" :
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nb-drafts", type=int, default=10000)
+    args = parser.parse_args()
+
+    drafts = make_drafts(args.nb_drafts)
+    drafts_df = pd.json_normalize(drafts)
+
+    start = time.perf_counter()
+    legacy = run_legacy(drafts, drafts_df)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    draft_facts = draft_analyze.build_draft_facts(drafts_df)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    facts = run_facts(draft_facts)
+    facts_time = time.perf_counter() - start
+
+    for name, table in legacy.items() :
+        key = "Champion" if name != "bans" else None
+        if key is None :
+            assert same_table(table.rename_axis("Champion").reset_index(), facts[name].rename_axis("Champion").reset_index(), "Champion"), name
+        else :
+            assert same_table(table, facts[name], key), name
+
+    print(f"{args.nb_drafts} drafts, {len(legacy)} tables : legacy {legacy_time:.3f} s, fact table {facts_time:.3f} s (x{legacy_time / facts_time:.1f})"
+          f" + {build_time:.3f} s to build the fact table ({len(draft_facts)} rows, once per load of the drafts)")
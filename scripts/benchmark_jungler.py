@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+import argparse
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import json_scrim
+from synthetic_data import make_games, FakeCollection, TEAM_DICT
+
+# Benchmark of json_scrim.get_jungler_puuid on synthetic games.
+# Run with : python scripts/benchmark_jungler.py
+
+
+def legacy_get_jungler_puuid(data : pd.DataFrame, jungler_filter : list, team_dict : dict) -> pd.DataFrame :
+    """Previous implementation (one Python call per row), kept for comparison"""
+    puuids = []
+    if "Old Jungler" in jungler_filter :
+        puuids += team_dict["JUNGLE"]
+    if "New Jungler" in jungler_filter :
+        puuids += team_dict["JUNGLE_2"]
+
+    team_puuids = []
+    for v in team_dict.values() :
+        team_puuids += v
+
+    def keep_row(row) :
+        if row["TRUE_POSITION"] != "JUNGLE" :
+            return True
+        if row["PUUID"] not in team_puuids :
+            return True
+        return row["PUUID"] in puuids
+
+    return data[data.apply(keep_row, axis=1)]
+
+
+def time_filter(function, data : pd.DataFrame, jungler_filter : list) -> float :
+    start = time.perf_counter()
+    function(data, jungler_filter, team_dict=TEAM_DICT)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__" :
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 20000])
+    args = parser.parse_args()
+
+    all_games = make_games(max(args.sizes))
+    print(f"{'games':>8} {'rows':>8} {'legacy (s)':>12} {'isin (s)':>10} {'isin + IS_ALLY (s)':>20} {'speedup':>9}")
+    for size in args.sizes :
+        data = json_scrim.read_and_create_dataframe(FakeCollection(all_games[:size]))
+        data_with_membership = json_scrim.add_team_membership(data, TEAM_DICT)
+        for jungler_filter in (["Old Jungler"], ["New Jungler"]) :
+            expected = legacy_get_jungler_puuid(data, jungler_filter, TEAM_DICT)
+            assert expected.index.equals(json_scrim.get_jungler_puuid(data_with_membership, jungler_filter, TEAM_DICT).index)
+        legacy_time = time_filter(legacy_get_jungler_puuid, data, ["New Jungler"])
+        isin_time = time_filter(json_scrim.get_jungler_puuid, data, ["New Jungler"])
+        membership_time = time_filter(json_scrim.get_jungler_puuid, data_with_membership, ["New Jungler"])
+        print(f"{size:>8} {len(data):>8} {legacy_time:>12.3f} {isin_time:>10.4f} {membership_time:>20.4f} {legacy_time / membership_time:>8.0f}x")
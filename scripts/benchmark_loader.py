@@ -0,0 +1,46 @@
+import os
+import sys
+import time
+import argparse
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import json_scrim
+from synthetic_data import make_games, FakeCollection
+
+# Benchmark of json_scrim.read_and_create_dataframe on synthetic games.
+# Run with : python scripts/benchmark_loader.py
+
+
+def legacy_read_and_create_dataframe(collection) -> pd.DataFrame :
+    """Previous implementation (one pd.concat per game), kept for comparison"""
+    df = pd.DataFrame()
+    for game in collection.find() :
+        df = pd.concat([df,pd.json_normalize(game)])
+    df = df.explode('participants').reset_index(drop=True)
+    df_participants = pd.json_normalize(df['participants'])
+    df = pd.concat([df.drop(columns='participants'),df_participants],axis = 1)
+    df['VISION_WARDS_BOUGHT_IN_GAME'] = df['VISION_WARDS_BOUGHT_IN_GAME'].fillna(0).astype('int')
+    df['datetime'] = pd.to_datetime(df['jsonFileName'].apply(lambda x : x.split('_')[0]), format='%d%m%Y')
+    return df
+
+
+def time_loader(loader, collection) -> float :
+    start = time.perf_counter()
+    loader(collection)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__" :
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000, 10000, 50000])
+    parser.add_argument("--legacy-max", type=int, default=2000, help="Largest size measured with the legacy loader")
+    args = parser.parse_args()
+
+    all_games = make_games(max(args.sizes))
+    print(f"{'games':>8} {'bulk (s)':>10} {'bulk us/game':>14} {'legacy (s)':>12}")
+    for size in args.sizes :
+        collection = FakeCollection(all_games[:size])
+        bulk_time = time_loader(json_scrim.read_and_create_dataframe, collection)
+        legacy_time = time_loader(legacy_read_and_create_dataframe, collection) if size <= args.legacy_max else float("nan")
+        print(f"{size:>8} {bulk_time:>10.3f} {bulk_time / size * 1e6:>14.1f} {legacy_time:>12.3f}")
@@ -0,0 +1,36 @@
+import os
+import sys
+import argparse
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import json_scrim
+from synthetic_data import make_games
+
+# Memory used by the participants table with and without the declared schema (json_scrim.apply_schema).
+# Run with : python scripts/benchmark_memory.py
+
+
+def create_untyped_dataframe(games : list) -> pd.DataFrame :
+    """Participants table without the schema (object columns, as before the schema was declared)"""
+    df = pd.json_normalize(games).explode('participants', ignore_index=True)
+    df = pd.concat([df.drop(columns='participants'), pd.json_normalize(df['participants'].tolist())], axis=1)
+    df['datetime'] = pd.to_datetime(df['jsonFileName'].str.split('_').str[0], format='%d%m%Y')
+    return df
+
+
+if __name__ == "__main__" :
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=10000)
+    args = parser.parse_args()
+
+    games = make_games(args.games)
+    untyped = json_scrim.memory_report(create_untyped_dataframe(games))
+    typed = json_scrim.memory_report(json_scrim.create_participants_dataframe(games))
+
+    report = untyped.join(typed, lsuffix=" before", rsuffix=" after", how="outer")
+    report["MB before"] = report.pop("bytes before") / 1e6
+    report["MB after"] = report.pop("bytes after") / 1e6
+    print(report.sort_values(by="MB before", ascending=False).round(3).to_string())
+    total_before, total_after = report["MB before"].sum(), report["MB after"].sum()
+    print(f"\n{args.games} games : {total_before:.1f} MB -> {total_after:.1f} MB ({total_before / total_after:.1f}x smaller)")
@@ -0,0 +1,54 @@
+import os
+import sys
+import json
+import time
+import struct
+import argparse
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import rofl_reader
+from synthetic_data import POSITIONS, CHAMPIONS
+
+# Benchmark of rofl_reader.read_rofl_metadata on a fake replay of the current format, with a large payload.
+# Run with : python scripts/benchmark_rofl.py [--size-mb 300]
+
+
+def write_fake_replay(path : str, payload_size : int, version : str = "15.3.659.1234") :
+    """Write a fake replay : magic, version in the header, a sparse payload of `payload_size` bytes, then the metadata and its length"""
+    participants = [
+        {"PUUID" : f"puuid-{index}", "SKIN" : CHAMPIONS[index], "TEAM" : "100" if index < 5 else "200", "WIN" : "Win" if index < 5 else "Fail", "INDIVIDUAL_POSITION" : POSITIONS[index % 5]}
+        for index in range(10)
+    ]
+    metadata = json.dumps({"gameLength" : 1834000, "lastGameChunkId" : 62, "lastKeyFrameId" : 30, "statsJson" : json.dumps(participants)}).encode()
+    with open(path, "wb") as f :
+        f.write(rofl_reader.ROFL_MAGIC + b"\x02\x00" + b"\0" * 9 + bytes([len(version)]) + version.encode())
+        f.seek(payload_size, os.SEEK_CUR)
+        f.write(metadata + struct.pack("<I", len(metadata)))
+
+
+def legacy_get_patch(path : str) -> str :
+    """Previous approach of main.js : read the whole file and search the patch in all of it"""
+    with open(path, "rb") as f :
+        return rofl_reader.find_patch(f.read())
+
+
+if __name__ == "__main__" :
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder :
+        path = os.path.join(folder, "01022025_fake.rofl")
+        write_fake_replay(path, args.size_mb * 1024 * 1024)
+
+        start = time.perf_counter()
+        game = rofl_reader.rofl_to_game_document(path)
+        reader_time = time.perf_counter() - start
+        assert game["patchVersion"] == "15.3.65" and len(game["participants"]) == 10
+
+        start = time.perf_counter()
+        assert legacy_get_patch(path) == game["patchVersion"]
+        legacy_time = time.perf_counter() - start
+
+    print(f"Replay of {args.size_mb} MB : header reader {reader_time * 1000:.2f} ms, full read {legacy_time * 1000:.0f} ms")
@@ -0,0 +1,76 @@
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+# Cold start budget of the analytics modules, measured with python -X importtime.
+# Each module is imported in a new interpreter, its import time is compared to the import time of pandas and numpy (needed anyway)
+# and the presentation and network packages must not be imported (they are imported when a chart or a connection is asked).
+# Run with : python scripts/check_import_time.py [--budget-ms 200] (exit code 1 if a module is over budget)
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
+MODULES = ["json_scrim", "draft_analyze", "champion_cores", "winrate_series", "scrim_cache", "dataset_service", "utils", "rofl_reader"]
+BASELINE_PACKAGES = ["pandas", "numpy"]
+FORBIDDEN_PACKAGES = ["plotly", "streamlit", "skimage", "pymongo", "requests"]
+DEFAULT_BUDGET_MS = 200
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)$")
+
+
+def measure_import(module : str) -> dict :
+    """Import a module in a new interpreter with -X importtime
+
+    Args:
+        module (str): Name of the module
+
+    Returns:
+        dict: Dictionnary imported module -> (cumulative import time in µs, depth in the import tree)
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.environ.get("PYTHONPATH", "")]))
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, env=env, cwd=ROOT)
+    if process.returncode != 0 :
+        raise RuntimeError(f"import {module} failed :\n{process.stderr[-2000:]}")
+    cumulative = {}
+    for line in process.stderr.splitlines() :
+        match = IMPORT_TIME_LINE.match(line)
+        if match :
+            cumulative[match.group(4)] = (int(match.group(2)), len(match.group(3)))
+    return cumulative
+
+
+def check_module(module : str, budget_ms : float, repeat : int = 3) -> dict :
+    """Measure the import of a module (best of `repeat` runs) and check it against the budget
+
+    Args:
+        module (str): Name of the module
+        budget_ms (float): Maximum import time of the module without BASELINE_PACKAGES (ms)
+        repeat (int, optional): Number of runs. Defaults to 3.
+
+    Returns:
+        dict: {"module", "total_ms", "own_ms" (without BASELINE_PACKAGES), "forbidden" (list), "ok"}
+    """
+    runs = [measure_import(module) for _ in range(repeat)]
+    best = min(runs, key=lambda cumulative : cumulative[module][0])
+    total_ms = best[module][0] / 1000
+    # numpy is imported by pandas, it is only counted apart when the module imports it first
+    baseline = [best[package] for package in BASELINE_PACKAGES if package in best]
+    min_depth = min((depth for _, depth in baseline), default=0)
+    own_ms = total_ms - sum(time for time, depth in baseline if depth == min_depth) / 1000
+    imported_packages = {name.split(".")[0] for name in best}
+    forbidden = [package for package in FORBIDDEN_PACKAGES if package in imported_packages]
+    return {"module" : module, "total_ms" : total_ms, "own_ms" : own_ms, "forbidden" : forbidden, "ok" : own_ms <= budget_ms and not forbidden}
+
+
+if __name__ == "__main__" :
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help=f"Maximum import time of a module, without {' and '.join(BASELINE_PACKAGES)}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    results = [check_module(module, args.budget_ms, args.repeat) for module in args.modules]
+    for result in results :
+        status = "OK  " if result["ok"] else "FAIL"
+        forbidden = f", imports {', '.join(result['forbidden'])}" if result["forbidden"] else ""
+        print(f"{status} {result['module']:<16} {result['total_ms']:7.0f} ms ({result['own_ms']:.0f} ms without {' and '.join(BASELINE_PACKAGES)}){forbidden}")
+    sys.exit(0 if all(result["ok"] for result in results) else 1)
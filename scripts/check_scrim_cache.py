@@ -0,0 +1,51 @@
+import os
+import sys
+import tempfile
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+import json_scrim
+import scrim_cache
+from synthetic_data import make_games, TEAM_DICT, FakeCollection
+
+# Check of the team membership of a snapshot refreshed with new games after a roster change : the snapshot holds games
+# stored before the IS_ALLY marker (added at ingest by json_scrim.normalize_game_document), the delta holds games marked
+# with the old roster. The mask of the team (json_scrim.get_team_mask) must follow the current roster, not the stored marker.
+# Run with : python scripts/check_scrim_cache.py (exit code 1 if the membership is wrong)
+
+
+def check_mixed_snapshot(nb_old_games : int = 150, nb_new_games : int = 50) -> bool :
+    """Build a snapshot of old games, refresh it with normalized games, change the jungler of the roster
+    and compare the team mask with the PUUID membership
+
+    Args:
+        nb_old_games (int, optional): Number of games of the snapshot, without IS_ALLY. Defaults to 150.
+        nb_new_games (int, optional): Number of games of the delta, with IS_ALLY. Defaults to 50.
+
+    Returns:
+        bool: True if every row has the right membership
+    """
+    games = make_games(nb_old_games + nb_new_games)
+    old_games = games[:nb_old_games]
+    new_games = [json_scrim.normalize_game_document(game, TEAM_DICT) for game in games[nb_old_games:]]
+    with tempfile.TemporaryDirectory() as folder :
+        cache_path = os.path.join(folder, "scrim_matches.parquet")
+        scrim_cache.load_participants_dataframe(FakeCollection(old_games), cache_path)
+        # FakeCollection ignores the query, it only returns the games inserted after the snapshot
+        data = scrim_cache.load_participants_dataframe(FakeCollection(new_games), cache_path)
+        reloaded = scrim_cache.read_snapshot(cache_path)
+
+    ok = len(data) == 10 * (nb_old_games + nb_new_games)
+    ok &= "IS_ALLY" not in data.columns and "IS_ALLY" not in reloaded.columns
+    for roster_name, team_dict in [("ingest roster", TEAM_DICT), ("new roster", {**TEAM_DICT, "JUNGLE" : ["new-jungler"]})] :
+        expected = data["PUUID"].isin([puuid for puuids in team_dict.values() for puuid in puuids])
+        roster_ok = json_scrim.get_team_mask(data, team_dict).equals(expected)
+        roster_ok &= json_scrim.get_team_mask(reloaded, team_dict).equals(pd.Series(expected.to_numpy(), index=reloaded.index, name=expected.name))
+        roster_ok &= json_scrim.add_team_membership(data, team_dict)["IS_ALLY"].equals(expected.rename("IS_ALLY"))
+        print(f"{'OK  ' if roster_ok else 'FAIL'} {roster_name} : snapshot of {nb_old_games} games without IS_ALLY + {nb_new_games} games with it, {int(expected.sum())} ally rows")
+        ok &= roster_ok
+    return ok
+
+
+if __name__ == "__main__" :
+    sys.exit(0 if check_mixed_snapshot() else 1)
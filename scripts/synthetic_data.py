@@ -0,0 +1,136 @@
+import random
+import datetime
+from bson import ObjectId
+
+# Fake data used by the benchmark scripts, shaped like the documents of the scrim_matches collection
+
+POSITIONS = ["TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"]
+CHAMPIONS = [
+    "Aatrox", "Ahri", "Akali", "Alistar", "Ashe", "Azir", "Bard", "Braum", "Caitlyn", "Camille",
+    "Corki", "Ezreal", "Gnar", "Gragas", "Jarvan", "Jax", "Jayce", "Jinx", "Kaisa", "Kalista",
+    "Karma", "Kennen", "Khazix", "Leblanc", "LeeSin", "Leona", "Lulu", "Maokai", "Nautilus", "Nidalee",
+    "Orianna", "Poppy", "Rakan", "Renekton", "Rell", "Rumble", "Ryze", "Sejuani", "Sylas", "Syndra",
+    "TahmKench", "Taliyah", "Thresh", "Varus", "Vi", "Viego", "Xayah", "XinZhao", "Yone", "Zeri",
+]
+ENEMY_TEAMS = ["Kinder Ratio", "IWG", "Team Alpha", "Team Beta", "Team Gamma"]
+PATCHES = ["15.1", "15.2", "15.3", "15.4", "15.5"]
+TEAM_DICT = {position: [f"ally-{position.lower()}"] for position in POSITIONS}
+TEAM_DICT["JUNGLE_2"] = ["ally-jungle-2"]
+
+
+def make_game(rng : random.Random, game_number : int) -> dict :
+    """Create a fake game document with 10 participants (the ally team is on a random side)
+
+    Args:
+        rng (random.Random): Random generator
+        game_number (int): Number of the game, used to build the json file name
+
+    Returns:
+        dict: The game document
+    """
+    date = datetime.date(2025, 1, 1) + datetime.timedelta(days=rng.randrange(365))
+    ally_side = rng.choice(["100", "200"])
+    blue_win = rng.random() < 0.5
+    champions = rng.sample(CHAMPIONS, 10)
+    participants = []
+    for index in range(10):
+        team = "100" if index < 5 else "200"
+        position = POSITIONS[index % 5]
+        if team == ally_side :
+            puuid = TEAM_DICT["JUNGLE_2"][0] if position == "JUNGLE" and rng.random() < 0.3 else TEAM_DICT[position][0]
+        else :
+            puuid = f"enemy-{rng.randrange(500)}"
+        participants.append({
+            "PUUID" : puuid,
+            "RIOT_ID_GAME_NAME" : puuid,
+            "SKIN" : champions[index],
+            "TEAM" : team,
+            "WIN" : "Win" if (team == "100") == blue_win else "Fail",
+            "TRUE_POSITION" : position,
+            "INDIVIDUAL_POSITION" : position,
+            "CHAMPIONS_KILLED" : str(rng.randrange(15)),
+            "NUM_DEATHS" : str(rng.randrange(12)),
+            "ASSISTS" : str(rng.randrange(20)),
+            "GOLD_EARNED" : str(rng.randrange(6000, 18000)),
+            "TOTAL_DAMAGE_DEALT_TO_CHAMPIONS" : str(rng.randrange(3000, 40000)),
+            "VISION_SCORE" : str(rng.randrange(5, 90)),
+            "MINIONS_KILLED" : str(rng.randrange(0, 350)),
+            "NEUTRAL_MINIONS_KILLED" : str(rng.randrange(0, 200)),
+            "LEVEL" : str(rng.randrange(11, 19)),
+            "VISION_WARDS_BOUGHT_IN_GAME" : str(rng.randrange(0, 12)),
+        })
+    return {
+        "_id" : ObjectId(f"{0x60000000 + game_number:08x}{rng.getrandbits(64):016x}"),
+        "gameDuration" : rng.randrange(1200000, 2400000),
+        "jsonFileName" : f"{date.strftime('%d%m%Y')}_{game_number % 6 + 1}",
+        "patchVersion" : rng.choice(PATCHES),
+        "officialMatch" : rng.choice([0, 0, 0, 1, 2]),
+        "enemyTeamName" : rng.choice(ENEMY_TEAMS),
+        "gameType" : rng.choice(["scrim", "official"]),
+        "participants" : participants,
+    }
+
+
+def make_games(nb_games : int, seed : int = 0) -> list :
+    """Create a list of fake game documents
+
+    Args:
+        nb_games (int): Number of games
+        seed (int, optional): Seed of the random generator. Defaults to 0.
+
+    Returns:
+        list: List of game documents
+    """
+    rng = random.Random(seed)
+    return [make_game(rng, game_number) for game_number in range(nb_games)]
+
+
+DRAFT_TEAMS = ["SCL"] + ENEMY_TEAMS
+
+
+def make_draft(rng : random.Random, draft_number : int) -> dict :
+    """Create a fake draft document (shaped like the documents of draft_scraping), the SCL team plays most drafts
+
+    Args:
+        rng (random.Random): Random generator
+        draft_number (int): Number of the draft, used to build its date and link
+
+    Returns:
+        dict: The draft document
+    """
+    date = datetime.date(2025, 1, 1) + datetime.timedelta(days=rng.randrange(365))
+    teams = ["SCL", rng.choice(ENEMY_TEAMS)] if rng.random() < 0.8 else rng.sample(ENEMY_TEAMS, 2)
+    rng.shuffle(teams)
+    champions = rng.sample(CHAMPIONS, 20)
+    bans = [champion if rng.random() < 0.95 else "None" for champion in champions[10:]]
+    return {
+        "_id" : ObjectId(f"{0x61000000 + draft_number:08x}{rng.getrandbits(64):016x}"),
+        "link" : f"https://draftlol.dawe.gg/fake{draft_number}",
+        "date" : f"{date.strftime('%d%m%Y')}_{draft_number % 6 + 1}",
+        "blue" : {"picks" : champions[:5], "bans" : bans[:5], "team" : teams[0]},
+        "red" : {"picks" : champions[5:10], "bans" : bans[5:], "team" : teams[1]},
+    }
+
+
+def make_drafts(nb_drafts : int, seed : int = 0) -> list :
+    """Create a list of fake draft documents
+
+    Args:
+        nb_drafts (int): Number of drafts
+        seed (int, optional): Seed of the random generator. Defaults to 0.
+
+    Returns:
+        list: List of draft documents
+    """
+    rng = random.Random(seed)
+    return [make_draft(rng, draft_number) for draft_number in range(nb_drafts)]
+
+
+class FakeCollection :
+    """Minimal in-memory stand-in for a pymongo collection (only `find` is supported)"""
+
+    def __init__(self, documents : list) :
+        self.documents = documents
+
+    def find(self, filter : dict = None, projection : dict = None, batch_size : int = 0) :
+        return iter(self.documents)
@@ -6,16 +6,22 @@ import plotly.graph_objects as go
 from dotenv import load_dotenv
 load_dotenv()
 import os
+import functools
 import requests
 from typing import Literal
 import streamlit as st
 import sqlitecloud
 #https://github.com/Allan-Cao
 
-# for use with dotenv
-# API_KEY = os.getenv("API_KEY")
+REQUEST_TIMEOUT = 10
+
+
+def get_api_key() -> str :
+    """Riot API key, read from the streamlit secrets when it is needed"""
+    # for use with dotenv
+    # return os.getenv("API_KEY")
+    return st.secrets["API_KEY"]['key']
 
-API_KEY = st.secrets["API_KEY"]['key']
 
 def get_league_HL_player() -> tuple:
     """Request the API to get all master+ players
@@ -23,12 +29,12 @@ def get_league_HL_player() -> tuple:
     Returns:
         tuple: A list with challenger and GM players and another with master players.
     """
-
-    challenger_call = requests.get(f"https://euw1.api.riotgames.com/lol/league/v4/challengerleagues/by-queue/RANKED_SOLO_5x5?api_key={API_KEY}")
+    API_KEY = get_api_key()
+    challenger_call = requests.get(f"https://euw1.api.riotgames.com/lol/league/v4/challengerleagues/by-queue/RANKED_SOLO_5x5?api_key={API_KEY}", timeout=REQUEST_TIMEOUT)
     challenger_call.raise_for_status()
-    grandmaster_call = requests.get(f"https://euw1.api.riotgames.com/lol/league/v4/grandmasterleagues/by-queue/RANKED_SOLO_5x5?api_key={API_KEY}")
+    grandmaster_call = requests.get(f"https://euw1.api.riotgames.com/lol/league/v4/grandmasterleagues/by-queue/RANKED_SOLO_5x5?api_key={API_KEY}", timeout=REQUEST_TIMEOUT)
     grandmaster_call.raise_for_status()
-    master_call = requests.get(f"https://euw1.api.riotgames.com/lol/league/v4/masterleagues/by-queue/RANKED_SOLO_5x5?api_key={API_KEY}")
+    master_call = requests.get(f"https://euw1.api.riotgames.com/lol/league/v4/masterleagues/by-queue/RANKED_SOLO_5x5?api_key={API_KEY}", timeout=REQUEST_TIMEOUT)
     master_call.raise_for_status()
     
     return challenger_call.json()['entries'] + grandmaster_call.json()['entries'] , master_call.json()['entries']
@@ -56,9 +62,17 @@ def calculate_cutoffs(gm_chall_player : list,master_player : list) -> tuple :
     grandmaster_cutoff = gm_player_lbBased[-1]["leaguePoints"] + 1
     return challenger_cutoff, grandmaster_cutoff
 
-#HL Cutoffs
-gm_chall_player,master_player = get_league_HL_player()
-challenger_cutoff, grandmaster_cutoff = calculate_cutoffs(gm_chall_player,master_player)
+
+@functools.lru_cache(maxsize=1)
+def get_tiers() -> dict :
+    """Points of each tier, the HL cutoffs are requested on the first call and then kept for the whole process
+
+    Returns:
+        dict: Dictionnary tier -> points, with GRANDMASTER and CHALLENGER from the current cutoffs
+    """
+    gm_chall_player,master_player = get_league_HL_player()
+    challenger_cutoff, grandmaster_cutoff = calculate_cutoffs(gm_chall_player,master_player)
+    return {**tiers, 'GRANDMASTER': 2800+grandmaster_cutoff, 'CHALLENGER': 2800+challenger_cutoff}
 
 tiers = {
     'IRON': 0,
@@ -69,8 +83,6 @@ tiers = {
     'EMERALD' : 2000,
     'DIAMOND': 2400,
     'MASTER': 2800,
-    'GRANDMASTER': 2800+grandmaster_cutoff,
-    'CHALLENGER': 2800+challenger_cutoff
 }
 
 divisions = {
@@ -98,6 +110,7 @@ def plot_soloq_tracking():
     soloq_df["date"] = pd.to_datetime(soloq_df["date"])
 
     #Plot
+    all_tiers = get_tiers()
     images_path = "images/rank_emblems/"
     fig = go.Figure()
 
@@ -111,8 +124,8 @@ def plot_soloq_tracking():
         legend_title_text='Roles',
         yaxis=dict(
             tickmode='array',
-            tickvals=list(tiers.values()),
-            ticktext=list(tiers.keys()),
+            tickvals=list(all_tiers.values()),
+            ticktext=list(all_tiers.keys()),
             showgrid=True,
             gridwidth=1,
             zeroline=False,
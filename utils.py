@@ -1,9 +1,48 @@
-import requests
+import threading
+import time
 
 
 ##CONSTANTS
 
-DDRAGON_VERSION = requests.get("https://ddragon.leagueoflegends.com/api/versions.json").json()[0]
+DDRAGON_VERSIONS_URL = "https://ddragon.leagueoflegends.com/api/versions.json"
+# Used when Data Dragon can not be reached, the images of an older version stay available
+DEFAULT_DDRAGON_VERSION = "15.1.1"
+REQUEST_TIMEOUT = 5
+# After a failed request, Data Dragon is requested again after this delay (seconds)
+DDRAGON_RETRY_SECONDS = 300
+
+_ddragon_lock = threading.Lock()
+_ddragon_version = None
+_ddragon_failed_at = None
+
+
+def get_ddragon_version() -> str :
+    """Latest Data Dragon version, requested on the first use and then kept for the whole process.
+    A failed request is not kept : DEFAULT_DDRAGON_VERSION is used and the request is made again after DDRAGON_RETRY_SECONDS.
+
+    Returns:
+        str: The version (for example 15.1.1), DEFAULT_DDRAGON_VERSION if Data Dragon can not be reached
+    """
+    global _ddragon_version, _ddragon_failed_at
+    with _ddragon_lock :
+        if _ddragon_version is not None :
+            return _ddragon_version
+        if _ddragon_failed_at is not None and time.monotonic() - _ddragon_failed_at < DDRAGON_RETRY_SECONDS :
+            return DEFAULT_DDRAGON_VERSION
+        import requests
+        try :
+            _ddragon_version = requests.get(DDRAGON_VERSIONS_URL, timeout=REQUEST_TIMEOUT).json()[0]
+            return _ddragon_version
+        except (requests.RequestException, ValueError, IndexError, KeyError) :
+            _ddragon_failed_at = time.monotonic()
+            return DEFAULT_DDRAGON_VERSION
+
+
+def __getattr__(name : str) :
+    # utils.DDRAGON_VERSION is still available, it is only requested when it is read
+    if name == "DDRAGON_VERSION" :
+        return get_ddragon_version()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_champion_image_from_id(champion_id) -> str :
@@ -15,4 +54,16 @@ def get_champion_image_from_id(champion_id) -> str :
     Returns:
         str: The PNG image, src link of the champion
     """
-    return f"https://ddragon.leagueoflegends.com/cdn/{DDRAGON_VERSION}/img/champion/{champion_id}.png"
+    return f"https://ddragon.leagueoflegends.com/cdn/{get_ddragon_version()}/img/champion/{champion_id}.png"
+
+
+def get_match_key(name) :
+    """Key joining a scrim game to its draft (i.e : 03022025_2), computed at ingest and scraping and stored as matchKey in both collections
+
+    Args:
+        name (str): The jsonFileName of the game or the date of the draft
+
+    Returns:
+        str: The name without blank space, None if there is no name
+    """
+    return name.replace(" ", "") if isinstance(name, str) else None
@@ -22,36 +22,41 @@ st.set_page_config(layout="wide")
 #Import scrim data
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
 import json_scrim
+import dataset_service
+# The shared tables are handed to the page as shallow copies
+dataset_service.enable_copy_on_write()
 
-connect = json_scrim.connect_database('lol_match_database', host=st.secrets["MONGO_DB"]["RO_connection_string"])
-scrim_matches = json_scrim.get_collection(connect, "scrim_matches")
-data_scrim_matches = json_scrim.read_and_create_dataframe(scrim_matches)
-
+mongo_host = st.secrets["MONGO_DB"]["RO_connection_string"]
 team_dico = st.secrets["TEAM_SCRIM_ID"]
+data_scrim_matches = dataset_service.get_scrim_matches(mongo_host, team_dict=team_dico)
+
 team_games = json_scrim.filter_data_on_team(data_scrim_matches, team_dict=team_dico)
 
 default_team_dict = st.secrets["TEAM_SCRIM_ID"]
 
 #sidebar
 with st.sidebar :
+    # The filters build a Mongo query, only the matching games are loaded
+    scrim_query = {}
+
     ## Filter data on patch
-    patch_filter = st.multiselect("Patch",options=data_scrim_matches["patchVersion"].unique().tolist(), default=[], key="patch_filter")
-    data_scrim_matches = json_scrim.filter_data_patch(data_scrim_matches, patch_filter)
+    patch_filter = st.multiselect("Patch",options=dataset_service.get_distinct(mongo_host, "patchVersion", scrim_query), default=[], key="patch_filter")
+    scrim_query = json_scrim.filter_data_patch(scrim_query, patch_filter)
 
     ## Filter on enemyTeam
-    enemyTeam_filter = st.multiselect("Enemy Team",options=data_scrim_matches["enemyTeamName"].unique().tolist(), default=[], key="enemyTeam_filter")
-    data_scrim_matches = json_scrim.filter_data_enemy_team(data_scrim_matches, enemyTeam_filter)
+    enemyTeam_filter = st.multiselect("Enemy Team",options=dataset_service.get_distinct(mongo_host, "enemyTeamName", scrim_query), default=[], key="enemyTeam_filter")
+    scrim_query = json_scrim.filter_data_enemy_team(scrim_query, enemyTeam_filter)
 
     ## Filter on typeGame
-    game_types = data_scrim_matches["gameType"].unique().tolist()
+    game_types = dataset_service.get_distinct(mongo_host, "gameType", scrim_query)
     display_mapping = {gt.capitalize(): gt for gt in game_types}
     typeGame_filter_display = st.multiselect("Type of game",options=list(display_mapping.keys()), default=[], key="typeGame_filter")
     typeGame_filter = [display_mapping[val] for val in typeGame_filter_display]
-    data_scrim_matches = json_scrim.filter_data_typeGame(data_scrim_matches, typeGame_filter)
+    scrim_query = json_scrim.filter_data_typeGame(scrim_query, typeGame_filter)
 
     ## Filter on side
     side_filter = st.multiselect("Side",options=["Blue","Red"], default=[], key="side_filter")
-    data_scrim_matches = json_scrim.filter_data_team_side(data_scrim_matches, side_filter,team_dict=default_team_dict)
+    scrim_query = json_scrim.filter_data_team_side(scrim_query, side_filter,team_dict=default_team_dict)
 
     ## Filter on date
     date_filter = st.date_input(
@@ -61,7 +66,8 @@ with st.sidebar :
         "today",
         format="DD.MM.YYYY"
     )
-    data_scrim_matches = (json_scrim.filter_data_date(data_scrim_matches, date_filter[0], date_filter[1])     if len(date_filter) == 2 else data_scrim_matches)
+    scrim_query = (json_scrim.filter_data_date(scrim_query, date_filter[0], date_filter[1])     if len(date_filter) == 2 else scrim_query)
+    data_scrim_matches = dataset_service.get_scrim_matches(mongo_host, scrim_query, team_dict=default_team_dict)
     
 
 
@@ -82,14 +88,16 @@ history_columns_config = {
     ),
 }
 
-st.dataframe(json_scrim.history(data_scrim_matches, dict_name=st.secrets["TEAM_DICT_NAME"],), hide_index=True,  column_order=history_columns_order,column_config=history_columns_config
+st.dataframe(json_scrim.history(data_scrim_matches, dict_name=st.secrets["TEAM_DICT_NAME"], team_dict=default_team_dict), hide_index=True,  column_order=history_columns_order,column_config=history_columns_config
 )
 
 
 # Winrate by side group by week
 # st.header("Winrate by side through time")
 st.header("Winrate par side au fil du temps")
-winrate_by_side_time = json_scrim.get_winrate_by_side_every_two_weeks(team_games, True)
+winrate_windows = {"Semaine" : 1, "2 semaines" : 2, "20 dernières parties" : "20 games"}
+winrate_window = st.segmented_control("Période", options=list(winrate_windows.keys()), default="2 semaines", selection_mode="single")
+winrate_by_side_time = json_scrim.get_winrate_by_side_over_time(team_games, winrate_windows.get(winrate_window, 2), True)
 st.plotly_chart(winrate_by_side_time,use_container_width=True)
 
 # Winrate by side bar
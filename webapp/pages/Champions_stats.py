@@ -7,7 +7,10 @@ import sys
 from dotenv import load_dotenv
 import datetime
 import json_scrim
+import champion_cores
+import dataset_service
 import streamlit as st
+dataset_service.enable_copy_on_write()
 
 # Check user connection
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
@@ -20,33 +23,34 @@ load_dotenv()
 default_team_dict = st.secrets["TEAM_SCRIM_ID"]
 # %%
 #Connect to database
-connect = json_scrim.connect_database('lol_match_database', host=st.secrets["MONGO_DB"]["RO_connection_string"])
-scrim_matches = json_scrim.get_collection(connect,"scrim_matches")
-data_scrim_matches = json_scrim.read_and_create_dataframe(scrim_matches)
+mongo_host = st.secrets["MONGO_DB"]["RO_connection_string"]
 
 #app config
 st.set_page_config(layout="wide")
 
 #Filter official matches sidebar
 with st.sidebar :
+    # The filters build a Mongo query, only the matching games are loaded
+    scrim_query = {}
+
     ## Filter data on patch
-    patch_filter = st.multiselect("Patch",options=data_scrim_matches["patchVersion"].unique().tolist(), default=[], key="patch_filter")
-    data_scrim_matches = json_scrim.filter_data_patch(data_scrim_matches, patch_filter)
+    patch_filter = st.multiselect("Patch",options=dataset_service.get_distinct(mongo_host, "patchVersion", scrim_query), default=[], key="patch_filter")
+    scrim_query = json_scrim.filter_data_patch(scrim_query, patch_filter)
 
     ## Filter on enemyTeam
-    enemyTeam_filter = st.multiselect("Enemy Team",options=data_scrim_matches["enemyTeamName"].unique().tolist(), default=[], key="enemyTeam_filter")
-    data_scrim_matches = json_scrim.filter_data_enemy_team(data_scrim_matches, enemyTeam_filter)
+    enemyTeam_filter = st.multiselect("Enemy Team",options=dataset_service.get_distinct(mongo_host, "enemyTeamName", scrim_query), default=[], key="enemyTeam_filter")
+    scrim_query = json_scrim.filter_data_enemy_team(scrim_query, enemyTeam_filter)
 
     ## Filter on typeGame
-    game_types = data_scrim_matches["gameType"].unique().tolist()
+    game_types = dataset_service.get_distinct(mongo_host, "gameType", scrim_query)
     display_mapping = {gt.capitalize(): gt for gt in game_types}
     typeGame_filter_display = st.multiselect("Type of game",options=list(display_mapping.keys()), default=[], key="typeGame_filter")
     typeGame_filter = [display_mapping[val] for val in typeGame_filter_display]
-    data_scrim_matches = json_scrim.filter_data_typeGame(data_scrim_matches, typeGame_filter)
+    scrim_query = json_scrim.filter_data_typeGame(scrim_query, typeGame_filter)
 
     ## Filter on side
     side_filter = st.multiselect("Side",options=["Blue","Red"], default=[], key="side_filter")
-    data_scrim_matches = json_scrim.filter_data_team_side(data_scrim_matches, side_filter,team_dict=default_team_dict)
+    scrim_query = json_scrim.filter_data_team_side(scrim_query, side_filter,team_dict=default_team_dict)
 
     ## Filter on date
     date_filter = st.date_input(
@@ -56,14 +60,15 @@ with st.sidebar :
         "today",
         format="DD.MM.YYYY"
     )
-    data_scrim_matches = (json_scrim.filter_data_date(data_scrim_matches, date_filter[0], date_filter[1])     if len(date_filter) == 2 else data_scrim_matches)
+    scrim_query = (json_scrim.filter_data_date(scrim_query, date_filter[0], date_filter[1])     if len(date_filter) == 2 else scrim_query)
     
 
 
 
     ## Filter official matches
     official_filter = st.multiselect("Offical matches",options=[0,1,2,3,4,5,6],default=[],key="official_match",disabled=True)
-    data_scrim_matches = json_scrim.filter_data_official_matches(data_scrim_matches, official_filter)
+    scrim_query = json_scrim.filter_data_official_matches(scrim_query, official_filter)
+    data_scrim_matches = dataset_service.get_scrim_matches(mongo_host, scrim_query, team_dict=default_team_dict)
     
     
 
@@ -122,7 +127,14 @@ selected_roles = [ROLE_MAP[r] for r in selected_roles_display]
 if len(selected_roles) <2 :
     st.info("You need to select 2 roles.", icon="ℹ️")
 else :
-    duo_winrate = json_scrim.calculate_duo_winrate(team_filtered_games,roles=selected_roles)
+    duo_side = "enemy" if st.toggle("Duos adverses", value=False) else "ally"
+    duo_table = dataset_service.get_duo_table(
+        mongo_host,
+        scrim_query,
+        team_dict=default_team_dict,
+        roster=[json_scrim.JUNGLER_FILTER_ROLES[jungler] for jungler in jungler_filter]
+    )
+    duo_winrate = json_scrim.calculate_duo_winrate(team_filtered_games,roles=selected_roles,duo_table=duo_table,side=duo_side)
     st.dataframe(duo_winrate, width="stretch",height="stretch",hide_index=True, column_config={
         f"{selected_roles[0]}_CHAMPION" : st.column_config.ImageColumn(),
         f"{selected_roles[1]}_CHAMPION" : st.column_config.ImageColumn(),
@@ -130,6 +142,24 @@ else :
     })
 
 
+#Cores de champions
+st.write("Cores de champions")
+core_size_column, core_games_column = st.columns(2)
+core_size = core_size_column.selectbox("Nombre de champions", options=[3,4,5], index=0)
+core_min_games = core_games_column.number_input("Nombre minimum de parties", min_value=1, value=champion_cores.DEFAULT_MIN_SUPPORT)
+# Mined once for the filters and parameters, not on every rerun of the page
+champion_cores_table = dataset_service.get_champion_cores(
+    mongo_host,
+    scrim_query,
+    team_dict=default_team_dict,
+    roster=[json_scrim.JUNGLER_FILTER_ROLES[jungler] for jungler in jungler_filter],
+    min_size=core_size,
+    max_size=core_size,
+    min_support=core_min_games
+)
+st.dataframe(champion_cores_table.loc[champion_cores_table["SIDE"] == "ally"].drop(columns=["SIDE","SIZE"]), width="stretch", hide_index=True)
+
+
 #Winrate ennemies champs
 st.write("Winrate adverse")
 enemies_columns = st.columns(5)
@@ -17,16 +17,14 @@ load_dotenv()
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 import draft_analyze
 import json_scrim
+import dataset_service
+dataset_service.enable_copy_on_write()
 
 # %%
 ## Draft analyze
-connect = draft_analyze.connect_database('lol_match_database', host=st.secrets["MONGO_DB"]["RO_connection_string"])
-drafts = draft_analyze.get_collection(connect,"drafts")
-drafts_df = draft_analyze.read_and_create_dataframe(drafts)
-scrims = json_scrim.get_collection(connect, "scrim_matches")
-scrims_df = json_scrim.read_and_create_dataframe(scrims)
-
-merged_data = draft_analyze.merge_scrim_with_draft(scrims_df,drafts_df)
+drafts_df = dataset_service.get_drafts(st.secrets["MONGO_DB"]["RO_connection_string"])
+# Merged once per load of the games and the drafts, not on every render
+merged_data = dataset_service.get_scrims_with_drafts(st.secrets["MONGO_DB"]["RO_connection_string"])
 
 
 ## Bans chart
@@ -36,8 +34,9 @@ merged_data = draft_analyze.merge_scrim_with_draft(scrims_df,drafts_df)
 ## Bans chart images
 st.subheader("Number of bans")
 bans_filter = st.segmented_control("Bans filter",options=["Both","Enemies bans","Allies bans"],default="Both", selection_mode="single")
-drafts_df = draft_analyze.filter_drafts(drafts_df,"SCL",bans_filter)
-figure_bansv2= draft_analyze.count_champs_bansv2(drafts_df,chart=True)
+draft_facts = dataset_service.get_draft_facts(st.secrets["MONGO_DB"]["RO_connection_string"])
+draft_bans = draft_analyze.filter_drafts(draft_facts,"SCL",bans_filter)
+figure_bansv2= draft_analyze.count_champs_bansv2(draft_bans,chart=True)
 
 ## DataFrame
 # st.dataframe(drafts_df)
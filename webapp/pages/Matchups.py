@@ -10,29 +10,35 @@ st.set_page_config(layout="wide")
 # Check user connection
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 import json_scrim
+import dataset_service
+dataset_service.enable_copy_on_write()
 load_dotenv()
 #Connect database
 default_team_dict = st.secrets["TEAM_SCRIM_ID"]
-connect = json_scrim.connect_database('lol_match_database', host=st.secrets["MONGO_DB"]["RO_connection_string"])
-scrim_matches = json_scrim.get_collection(connect,"scrim_matches")
-data_scrim_matches = json_scrim.read_and_create_dataframe(scrim_matches)
+matchup_cube = dataset_service.get_matchup_cube(st.secrets["MONGO_DB"]["RO_connection_string"], team_dict=default_team_dict)
 
 #Matchups by role
 st.subheader("Matchups par role")
 roles = ["TOP","JUNGLE","MIDDLE","BOTTOM","UTILITY"]
 role_filter = st.segmented_control("Role filter",options=roles,default="TOP", selection_mode="single")
-matchup_table, matchup_style = json_scrim.calculate_matchup_winrate(data_scrim_matches,default_team_dict,role=role_filter)
+matchup_table, matchup_style = json_scrim.calculate_matchup_winrate(None,default_team_dict,role=role_filter,matchup_cube=matchup_cube)
 st.dataframe(matchup_style, hide_index=True)
 
 #Detail d'un matchup
 st.subheader("Matchup details")
-print(np.sort(matchup_table["ALLY_CHAMPION"].unique()))
-ally_champ = st.selectbox("Champion",options = np.sort(matchup_table["ALLY_CHAMPION"].unique()),index=None, placeholder="Select a champion")
-possible_enemies_champs = np.sort(matchup_table[matchup_table["ALLY_CHAMPION"]==ally_champ]["ENEMY_CHAMPION"].unique())
+role_matchups = matchup_cube.get(role_filter, {"enemies" : {}, "details" : {}})
+ally_champ = st.selectbox("Champion",options = sorted(role_matchups["enemies"]),index=None, placeholder="Select a champion")
+possible_enemies_champs = role_matchups["enemies"].get(ally_champ, [])
 disable_enemy = True
 if ally_champ != None :
     disable_enemy = False
 enemy_champ = st.selectbox("Enemy champion",options = possible_enemies_champs,index=None, placeholder="Select a champion",disabled=disable_enemy)
+if enemy_champ != None :
+    matchup = role_matchups["details"][(ally_champ, enemy_champ)]
+    games, winrate = st.columns(2)
+    games.metric("Nombre de parties", matchup["GAMES"], border=True)
+    winrate.metric("Winrate (%)", round(matchup["Winrate (%)"], 2), border=True)
+    st.write("Parties : " + ", ".join(str(game_id) for game_id in matchup["GAME_IDS"]))
 
 
 #Footer
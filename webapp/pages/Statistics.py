@@ -7,12 +7,12 @@ import streamlit as st
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 import json_scrim
+import dataset_service
+dataset_service.enable_copy_on_write()
 load_dotenv()
 
 default_team_dict = st.secrets["TEAM_SCRIM_ID"]
-connect = json_scrim.connect_database('lol_match_database', host=st.secrets["MONGO_DB"]["RO_connection_string"])
-scrim_matches = json_scrim.get_collection(connect,"scrim_matches")
-data_scrim_matches = json_scrim.read_and_create_dataframe(scrim_matches)
+data_scrim_matches = dataset_service.get_scrim_matches(st.secrets["MONGO_DB"]["RO_connection_string"], team_dict=default_team_dict)
 
 st.set_page_config(layout="wide")
 team_filtered_games = json_scrim.filter_data_on_team(data_scrim_matches, team_dict=default_team_dict)
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+# Winrate time series of the team (blue side, red side and global).
+# The games are reduced to one row per game with its date parsed once, the period series are computed in one grouped pass
+# and the rolling series over the last N games with cumulative sums.
+
+SIDES = {"100" : "Blue", "200" : "Red"}
+
+
+def get_game_results(data : pd.DataFrame) -> pd.DataFrame :
+    """Reduce the team data to one row per game
+
+    Args:
+        data (pd.DataFrame): The filtered dataframe from team's data, one row per (match,participant)
+
+    Returns:
+        pd.DataFrame: DataFrame sorted by date with the columns _id, date, Blue (bool, the team played on blue side), Red and Win
+    """
+    games = data.drop_duplicates(subset="_id", keep="last")
+    if "datetime" in games.columns :
+        dates = pd.to_datetime(games["datetime"])
+    else :
+        # The date is the prefix of the json file name, parsed once per game
+        dates = pd.to_datetime(games["jsonFileName"].astype(str).str.split("_").str[0], format="%d%m%Y")
+    sides = games["TEAM"].astype(str)
+    results = pd.DataFrame({
+        "_id" : games["_id"].to_numpy(),
+        "date" : dates.to_numpy(),
+        "Blue" : (sides == "100").to_numpy(),
+        "Red" : (sides == "200").to_numpy(),
+        "Win" : games["WIN"].astype(bool).to_numpy(),
+    })
+    return results.sort_values("date", kind="stable").reset_index(drop=True)
+
+
+def get_week_period(dates : pd.Series, weeks : int = 2) -> pd.Series :
+    """Period of `weeks` weeks of each date, numbered by its last week of the year (ISO week number, year is ignored).
+    With weeks = 2 the odd weeks are paired with the next even week.
+
+    Args:
+        dates (pd.Series): Dates
+        weeks (int, optional): Number of weeks of a period. Defaults to 2.
+
+    Returns:
+        pd.Series: Week number of the period
+    """
+    week_of_the_year = dates.dt.isocalendar().week.astype(int)
+    return (week_of_the_year + weeks - 1) // weeks * weeks
+
+
+def get_period_winrate(data : pd.DataFrame, weeks : int = 2) -> pd.DataFrame :
+    """Compute the blue, red and global winrate by period of `weeks` weeks in one grouped pass
+
+    Args:
+        data (pd.DataFrame): The filtered dataframe from team's data
+        weeks (int, optional): Number of weeks of a period. Defaults to 2.
+
+    Returns:
+        pd.DataFrame: DataFrame indexed by Week with the columns Blue, Red, Global (winrates in %, NaN without game) and Games
+    """
+    results = get_game_results(data)
+    counts = pd.DataFrame({
+        "Week" : get_week_period(results["date"], weeks).to_numpy(),
+        "Games" : 1,
+        "Wins" : results["Win"].astype(int),
+        **{f"{side}_games" : results[side].astype(int) for side in SIDES.values()},
+        **{f"{side}_wins" : (results[side] & results["Win"]).astype(int) for side in SIDES.values()},
+    }).groupby("Week").sum()
+
+    winrates = pd.DataFrame({
+        side : counts[f"{side}_wins"] / counts[f"{side}_games"].replace(0, np.nan) * 100 for side in SIDES.values()
+    })
+    winrates["Global"] = counts["Wins"] / counts["Games"] * 100
+    winrates["Games"] = counts["Games"]
+    return winrates
+
+
+def get_rolling_winrate(data : pd.DataFrame, nb_games : int = 20) -> pd.DataFrame :
+    """Compute the blue, red and global winrate over the last `nb_games` games, after each game, with cumulative sums
+
+    Args:
+        data (pd.DataFrame): The filtered dataframe from team's data
+        nb_games (int, optional): Number of games of the window. Defaults to 20.
+
+    Returns:
+        pd.DataFrame: DataFrame indexed by Game (number of the game, from 1) with the columns date, Blue, Red, Global (winrates in %) and Games
+    """
+    results = get_game_results(data)
+    columns = {
+        "Games" : np.ones(len(results), dtype=int),
+        "Wins" : results["Win"].to_numpy(dtype=int),
+        **{f"{side}_games" : results[side].to_numpy(dtype=int) for side in SIDES.values()},
+        **{f"{side}_wins" : (results[side] & results["Win"]).to_numpy(dtype=int) for side in SIDES.values()},
+    }
+    # Sum over the window = cumulative sum at the game - cumulative sum nb_games before
+    windows = {}
+    for name, values in columns.items() :
+        cumulative = np.concatenate([[0], np.cumsum(values)])
+        windows[name] = cumulative[1:] - cumulative[np.maximum(np.arange(1, len(values) + 1) - nb_games, 0)]
+
+    with np.errstate(divide="ignore", invalid="ignore") :
+        rolling = pd.DataFrame({
+            "date" : results["date"].to_numpy(),
+            **{side : np.where(windows[f"{side}_games"] > 0, windows[f"{side}_wins"] / windows[f"{side}_games"] * 100, np.nan) for side in SIDES.values()},
+            "Global" : windows["Wins"] / windows["Games"] * 100,
+            "Games" : windows["Games"],
+        }, index=pd.RangeIndex(1, len(results) + 1, name="Game"))
+    return rolling